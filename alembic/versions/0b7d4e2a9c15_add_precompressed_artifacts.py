@@ -0,0 +1,34 @@
+"""add precompressed artifacts
+
+Revision ID: 0b7d4e2a9c15
+Revises: f3a8c2d91b04
+Create Date: 2026-10-18 15:21:09.264017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d4e2a9c15'
+down_revision: Union[str, Sequence[str], None] = 'f3a8c2d91b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('test_artifacts', sa.Column('deflate_storage_key', sa.String(), nullable=True))
+    op.add_column('test_artifacts', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('test_artifacts', sa.Column('deflated_size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('test_artifacts', sa.Column('crc32', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('test_artifacts', 'crc32')
+    op.drop_column('test_artifacts', 'deflated_size_bytes')
+    op.drop_column('test_artifacts', 'size_bytes')
+    op.drop_column('test_artifacts', 'deflate_storage_key')
@@ -0,0 +1,71 @@
+"""address ranges on blocks and regions
+
+Revision ID: 5e8b2d47c1a9
+Revises: d41f8b6e2a37
+Create Date: 2026-10-18 18:02:37.514820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b2d47c1a9'
+down_revision: Union[str, Sequence[str], None] = 'd41f8b6e2a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both the type change and the stored generated columns rewrite the whole table under
+    # an ACCESS EXCLUSIVE lock: regions is locked during the first steps, blocks while its
+    # range columns are added, and uploads wait for each rewrite to finish. Run it in a
+    # maintenance window on large databases.
+    # Region addresses get the bigint width the block ones have had since 558b11af1c05
+    op.alter_column('regions', 'paddr',
+               existing_type=sa.INTEGER(),
+               type_=sa.BigInteger(),
+               existing_nullable=False)
+    op.alter_column('regions', 'size',
+               existing_type=sa.INTEGER(),
+               type_=sa.BigInteger(),
+               existing_nullable=False)
+    op.alter_column('regions', 'vaddr',
+               existing_type=sa.INTEGER(),
+               type_=sa.BigInteger(),
+               existing_nullable=False)
+    for table in ('blocks', 'regions'):
+        op.add_column(table, sa.Column('vaddr_range', postgresql.INT8RANGE(), sa.Computed('int8range(vaddr, vaddr + size)', persisted=True), nullable=True))
+        op.add_column(table, sa.Column('paddr_range', postgresql.INT8RANGE(), sa.Computed('int8range(paddr, paddr + size)', persisted=True), nullable=True))
+    # Only the indexes are built concurrently, uploads keep inserting layouts meanwhile
+    with op.get_context().autocommit_block():
+        for table in ('blocks', 'regions'):
+            for column in ('vaddr_range', 'paddr_range'):
+                op.create_index(f'ix_{table}_{column}', table, [column], unique=False, postgresql_using='gist', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in ('blocks', 'regions'):
+            for column in ('vaddr_range', 'paddr_range'):
+                op.drop_index(f'ix_{table}_{column}', table_name=table, postgresql_using='gist', postgresql_concurrently=True, if_exists=True)
+    for table in ('blocks', 'regions'):
+        op.drop_column(table, 'paddr_range')
+        op.drop_column(table, 'vaddr_range')
+    op.alter_column('regions', 'vaddr',
+               existing_type=sa.BigInteger(),
+               type_=sa.INTEGER(),
+               existing_nullable=False)
+    op.alter_column('regions', 'size',
+               existing_type=sa.BigInteger(),
+               type_=sa.INTEGER(),
+               existing_nullable=False)
+    op.alter_column('regions', 'paddr',
+               existing_type=sa.BigInteger(),
+               type_=sa.INTEGER(),
+               existing_nullable=False)
@@ -0,0 +1,33 @@
+"""trigram index on test names
+
+Revision ID: 7c2e9f41d6a8
+Revises: 0b7d4e2a9c15
+Create Date: 2026-10-18 16:40:52.117306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9f41d6a8'
+down_revision: Union[str, Sequence[str], None] = '0b7d4e2a9c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built concurrently so uploads and listings keep working on a large tests table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tests_name_trgm', 'tests', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # pg_trgm is left installed: other objects of the database may depend on it
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tests_name_trgm', table_name='tests', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""index layout foreign keys
+
+Revision ID: a3f6c1e8d092
+Revises: 5e8b2d47c1a9
+Create Date: 2026-10-18 19:24:05.630158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f6c1e8d092'
+down_revision: Union[str, Sequence[str], None] = '5e8b2d47c1a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LAYOUT_FOREIGN_KEYS = [
+    ('modules', 'test_id'),
+    ('partitions', 'module_id'),
+    ('blocks', 'module_id'),
+    ('blocks', 'partition_id'),
+    ('regions', 'block_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so uploads keep inserting layouts meanwhile
+    with op.get_context().autocommit_block():
+        for table, column in LAYOUT_FOREIGN_KEYS:
+            op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table, column in LAYOUT_FOREIGN_KEYS:
+            op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table, postgresql_concurrently=True, if_exists=True)
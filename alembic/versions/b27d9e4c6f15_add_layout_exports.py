@@ -0,0 +1,48 @@
+"""add layout exports
+
+Revision ID: b27d9e4c6f15
+Revises: a3f6c1e8d092
+Create Date: 2026-10-18 21:12:44.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b27d9e4c6f15'
+down_revision: Union[str, Sequence[str], None] = 'a3f6c1e8d092'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('layout_exports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='layoutexportstatus'), nullable=False),
+    sa.Column('table', sa.Enum('BLOCKS', 'REGIONS', name='layouttable'), nullable=False),
+    sa.Column('format', sa.Enum('ARROW', 'PARQUET', name='columnarformat'), nullable=False),
+    sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=True),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('requested_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('requested_by_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['requested_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_layout_exports_requested_by_id'), 'layout_exports', ['requested_by_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_layout_exports_requested_by_id'), table_name='layout_exports')
+    op.drop_table('layout_exports')
+    sa.Enum(name='columnarformat').drop(op.get_bind())
+    sa.Enum(name='layouttable').drop(op.get_bind())
+    sa.Enum(name='layoutexportstatus').drop(op.get_bind())
@@ -0,0 +1,74 @@
+"""add memory metrics to tests
+
+Revision ID: c8e41f7a2d53
+Revises: b27d9e4c6f15
+Create Date: 2026-10-18 23:02:17.415926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e41f7a2d53'
+down_revision: Union[str, Sequence[str], None] = 'b27d9e4c6f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MEMORY_METRICS = [
+    'mapped_bytes',
+    'readable_bytes',
+    'writable_bytes',
+    'executable_bytes',
+    'uncached_bytes',
+    'shadow_bytes',
+    'largest_contiguous_bytes',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in MEMORY_METRICS:
+        op.add_column('tests', sa.Column(column, sa.BigInteger(), nullable=False, server_default='0'))
+        op.alter_column('tests', column, server_default=None)
+    # Same figures as IngestionService._memory_metrics; twins take those of their owner
+    op.execute("""
+        UPDATE tests
+        SET mapped_bytes = m.mapped_bytes,
+            readable_bytes = m.readable_bytes,
+            writable_bytes = m.writable_bytes,
+            executable_bytes = m.executable_bytes,
+            uncached_bytes = m.uncached_bytes,
+            shadow_bytes = m.shadow_bytes,
+            largest_contiguous_bytes = m.largest_contiguous_bytes
+        FROM (
+            SELECT modules.test_id,
+                   coalesce(sum(blocks.size), 0) AS mapped_bytes,
+                   coalesce(sum(blocks.size) FILTER (WHERE strpos(blocks.access, 'R') > 0), 0) AS readable_bytes,
+                   coalesce(sum(blocks.size) FILTER (WHERE strpos(blocks.access, 'W') > 0), 0) AS writable_bytes,
+                   coalesce(sum(blocks.size) FILTER (WHERE strpos(blocks.access, 'X') > 0), 0) AS executable_bytes,
+                   coalesce(sum(blocks.size) FILTER (WHERE blocks.cache_policy <> 'DEFAULT'), 0) AS uncached_bytes,
+                   coalesce(sum(blocks.size) FILTER (WHERE blocks.is_shadow), 0) AS shadow_bytes,
+                   coalesce(max(blocks.size) FILTER (WHERE blocks.is_contiguous), 0) AS largest_contiguous_bytes
+            FROM blocks
+            LEFT JOIN partitions ON partitions.id = blocks.partition_id
+            JOIN modules ON modules.id = coalesce(blocks.module_id, partitions.module_id)
+            GROUP BY modules.test_id
+        ) AS m
+        WHERE m.test_id = coalesce(tests.duplicate_of_id, tests.id)
+    """)
+    # Built concurrently so uploads keep writing tests meanwhile
+    with op.get_context().autocommit_block():
+        for column in MEMORY_METRICS:
+            op.create_index(op.f(f'ix_tests_{column}'), 'tests', [column], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for column in MEMORY_METRICS:
+            op.drop_index(op.f(f'ix_tests_{column}'), table_name='tests', postgresql_concurrently=True, if_exists=True)
+    for column in reversed(MEMORY_METRICS):
+        op.drop_column('tests', column)
@@ -0,0 +1,69 @@
+"""add test facet rollup
+
+Revision ID: d41f8b6e2a37
+Revises: 7c2e9f41d6a8
+Create Date: 2026-10-18 17:25:14.903552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8b6e2a37'
+down_revision: Union[str, Sequence[str], None] = '7c2e9f41d6a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('test_facet_rollup',
+    sa.Column('status', postgresql.ENUM('PENDING', 'PROCESSING', 'PARSED', 'ERROR', name='teststatus', create_type=False), nullable=False),
+    sa.Column('platform_id', sa.Integer(), nullable=False),
+    sa.Column('test_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['platform_id'], ['platforms.id'], ),
+    sa.PrimaryKeyConstraint('status', 'platform_id')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION test_facet_rollup_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.platform_id = NEW.platform_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE test_facet_rollup SET test_count = test_count - 1
+                WHERE status = OLD.status AND platform_id = OLD.platform_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO test_facet_rollup (status, platform_id, test_count)
+                VALUES (NEW.status, NEW.platform_id, 1)
+                ON CONFLICT (status, platform_id)
+                DO UPDATE SET test_count = test_facet_rollup.test_count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # The table is locked while the trigger is created and the rollup backfilled,
+    # so no transition slips in between
+    op.execute("LOCK TABLE tests IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        CREATE TRIGGER tests_facet_rollup
+        AFTER INSERT OR DELETE OR UPDATE OF status, platform_id ON tests
+        FOR EACH ROW EXECUTE FUNCTION test_facet_rollup_apply()
+    """)
+    op.execute("""
+        INSERT INTO test_facet_rollup (status, platform_id, test_count)
+        SELECT status, platform_id, count(*) FROM tests GROUP BY status, platform_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tests_facet_rollup ON tests")
+    op.execute("DROP FUNCTION IF EXISTS test_facet_rollup_apply()")
+    op.drop_table('test_facet_rollup')
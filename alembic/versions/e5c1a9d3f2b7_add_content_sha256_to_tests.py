@@ -0,0 +1,34 @@
+"""add content sha256 to tests
+
+Revision ID: e5c1a9d3f2b7
+Revises: 106add0641e6
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c1a9d3f2b7'
+down_revision: Union[str, Sequence[str], None] = '106add0641e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tests', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.add_column('tests', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('tests_duplicate_of_id_fkey', 'tests', 'tests', ['duplicate_of_id'], ['id'])
+    op.create_index('ix_tests_parsed_content_sha256', 'tests', ['content_sha256'], unique=False, postgresql_where=sa.text("status = 'PARSED'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tests_parsed_content_sha256', table_name='tests', postgresql_where=sa.text("status = 'PARSED'"))
+    op.drop_constraint('tests_duplicate_of_id_fkey', 'tests', type_='foreignkey')
+    op.drop_column('tests', 'duplicate_of_id')
+    op.drop_column('tests', 'content_sha256')
@@ -0,0 +1,42 @@
+"""add export archives
+
+Revision ID: f3a8c2d91b04
+Revises: e5c1a9d3f2b7
+Create Date: 2026-10-18 14:03:27.418530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c2d91b04'
+down_revision: Union[str, Sequence[str], None] = 'e5c1a9d3f2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('export_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('storage_key')
+    )
+    op.create_index(op.f('ix_export_archives_last_used_at'), 'export_archives', ['last_used_at'], unique=False)
+    op.create_index(op.f('ix_export_archives_test_id'), 'export_archives', ['test_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_export_archives_test_id'), table_name='export_archives')
+    op.drop_index(op.f('ix_export_archives_last_used_at'), table_name='export_archives')
+    op.drop_table('export_archives')
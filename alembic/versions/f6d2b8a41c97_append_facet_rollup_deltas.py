@@ -0,0 +1,90 @@
+"""append facet rollup deltas
+
+Revision ID: f6d2b8a41c97
+Revises: c8e41f7a2d53
+Create Date: 2026-10-18 23:48:36.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d2b8a41c97'
+down_revision: Union[str, Sequence[str], None] = 'c8e41f7a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOLD_DELTAS = """
+    WITH moved AS (
+        DELETE FROM test_facet_rollup_delta RETURNING status, platform_id, delta
+    )
+    INSERT INTO test_facet_rollup (status, platform_id, test_count)
+    SELECT status, platform_id, sum(delta) FROM moved GROUP BY status, platform_id
+    ON CONFLICT (status, platform_id)
+    DO UPDATE SET test_count = test_facet_rollup.test_count + excluded.test_count
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('test_facet_rollup_delta',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('status', postgresql.ENUM('PENDING', 'PROCESSING', 'PARSED', 'ERROR', name='teststatus', create_type=False), nullable=False),
+    sa.Column('platform_id', sa.Integer(), nullable=False),
+    sa.Column('delta', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['platform_id'], ['platforms.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # The trigger appends a delta instead of upserting the rollup row, whose lock was held
+    # until commit and so serialized the uploads of a platform. The rollup keeps its counts
+    # as the base the deltas are added to.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION test_facet_rollup_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.platform_id = NEW.platform_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO test_facet_rollup_delta (status, platform_id, delta)
+                VALUES (OLD.status, OLD.platform_id, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO test_facet_rollup_delta (status, platform_id, delta)
+                VALUES (NEW.status, NEW.platform_id, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # No transition may append a delta between the fold and the drop
+    op.execute("LOCK TABLE tests IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION test_facet_rollup_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.platform_id = NEW.platform_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE test_facet_rollup SET test_count = test_count - 1
+                WHERE status = OLD.status AND platform_id = OLD.platform_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO test_facet_rollup (status, platform_id, test_count)
+                VALUES (NEW.status, NEW.platform_id, 1)
+                ON CONFLICT (status, platform_id)
+                DO UPDATE SET test_count = test_facet_rollup.test_count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(FOLD_DELTAS)
+    op.drop_table('test_facet_rollup_delta')
@@ -38,6 +38,12 @@ if settings.DLQ_DRAIN_ENABLED:
         "schedule": float(settings.DLQ_DRAIN_INTERVAL_SECONDS),
         "options": {"expires": settings.DLQ_DRAIN_INTERVAL_SECONDS},
     }
+# The tests trigger appends rollup deltas whether or not facets are read from the rollup
+beat_schedule["compact-facet-rollup"] = {
+    "task": "memory_allocator.compact_facet_rollup",
+    "schedule": float(settings.TEST_FACETS_ROLLUP_COMPACT_INTERVAL_SECONDS),
+    "options": {"expires": settings.TEST_FACETS_ROLLUP_COMPACT_INTERVAL_SECONDS},
+}
 celery_app.conf.beat_schedule = beat_schedule
 celery_app.conf.task_queues = [
     Queue(
@@ -6,6 +6,8 @@ from celery.signals import (
     setup_logging,
     task_postrun,
     task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
 )
 from kombu import Exchange, Queue
 
@@ -51,3 +53,31 @@ def _declare_dead_letter_queue(**kwargs):
             routing_key=DEAD_LETTER_ROUTING_KEY,
             durable=True,
         ).declare(channel=conn.default_channel)
+
+
+@worker_process_init.connect
+def _start_process_pool(**kwargs):
+    from app.core.config import get_settings
+    from app.memory_allocator.utils.thread_utils import init_process_pool
+    settings = get_settings()
+    if settings.PARSE_EXECUTOR == "process":
+        init_process_pool(settings.PARSE_PROCESS_WORKERS)
+
+
+@worker_process_shutdown.connect
+def _stop_process_pool(**kwargs):
+    from app.memory_allocator.utils.thread_utils import shutdown_process_pool
+    shutdown_process_pool()
+
+
+# Connected after _start_process_pool so the parse pool is forked before the loop exists
+@worker_process_init.connect
+def _start_worker_runtime(**kwargs):
+    from app.core.worker_runtime import init_worker_runtime
+    init_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs):
+    from app.core.worker_runtime import shutdown_worker_runtime
+    shutdown_worker_runtime()
@@ -41,6 +41,7 @@ class Settings(BaseSettings):
     # Storage
     STORAGE_BACKEND: Literal["local", "s3"] = "local"
     STORAGE_PATH: str
+    STORAGE_SPOOL_MAX_BYTES: int = 16 * 1024 * 1024
 
     # S3 / MinIO
     S3_ENDPOINT_URL: str | None = None
@@ -50,6 +51,8 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: SecretStr | None = None
     S3_REGION: str = "us-east-1"
     S3_PRESIGN_TTL_SECONDS: int = 600
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MAX_POOL_CONNECTIONS: int = 10
     MINIO_PORT: int = 9000
     MINIO_CONSOLE_PORT: int = 9001
 
@@ -71,6 +74,7 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_CELERY_DB: int
     REDIS_EVENTS_DB: int
+    REDIS_CACHE_DB: int = 2
 
     @computed_field
     @property
@@ -78,6 +82,12 @@ class Settings(BaseSettings):
         password = quote(self.REDIS_PASSWORD.get_secret_value(), safe="")
         return f"redis://:{password}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_EVENTS_DB}"
 
+    @computed_field
+    @property
+    def REDIS_CACHE_URL(self) -> str:  # noqa: N802
+        password = quote(self.REDIS_PASSWORD.get_secret_value(), safe="")
+        return f"redis://:{password}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_CACHE_DB}"
+
     # Celery
     @computed_field
     @property
@@ -95,6 +105,36 @@ class Settings(BaseSettings):
             f"@{self.RABBITMQ_HOST}:{self.RABBITMQ_PORT}/{self.RABBITMQ_VHOST}"
         )
 
+    # Ingestion
+    INGESTION_BULK_PERSIST: bool = True
+    UPLOAD_DEDUP_ENABLED: bool = True
+    PARSE_EXECUTOR: Literal["thread", "process"] = "thread"
+    PARSE_PROCESS_WORKERS: int = 4
+    ARTIFACT_UPLOAD_CONCURRENCY: int = 4
+    ARTIFACT_PRECOMPRESS_ENABLED: bool = True
+    ARTIFACT_PRECOMPRESS_MIN_BYTES: int = 64 * 1024
+
+    # Listing
+    TEST_COUNT_MODE: Literal["exact", "cached", "estimated"] = "exact"
+    TEST_COUNT_CACHE_TTL_SECONDS: int = 60
+    TEST_FACETS_ROLLUP_ENABLED: bool = False
+    TEST_FACETS_ROLLUP_COMPACT_INTERVAL_SECONDS: int = 60
+
+    # Validation
+    VALIDATION_PRECHECK_ENABLED: bool = False
+
+    # Export
+    EXPORT_FETCH_CONCURRENCY: int = 8
+    EXPORT_PREFETCH_MAX_BYTES: int = 64 * 1024 ** 2
+    EXPORT_CACHE_ENABLED: bool = True
+    EXPORT_CACHE_MAX_BYTES: int = 5 * 1024 ** 3
+
+    # Parse cache
+    PARSE_CACHE_BACKEND: Literal["none", "redis", "disk"] = "redis"
+    PARSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    PARSE_CACHE_PATH: str = "/tmp/autorunning/parse-cache"
+    PARSE_CACHE_MAX_ENTRIES: int = 10000
+
     # Websocket
     WS_MAX_CONNECTIONS_PER_USER: int = 5
 
@@ -16,6 +16,8 @@ from app.memory_allocator.exceptions import (
     EmptyFileError,
     ExportNotAvailableError,
     InvalidUploadError,
+    LayoutExportNotFoundError,
+    LayoutExportNotReadyError,
     ParsingError,
     PlatformExtractionError,
     PlatformNotFoundError,
@@ -58,12 +60,14 @@ DOMAIN_ERROR_STATUS: dict[int, tuple[type[DomainError], ...]] = {
         PlatformNotFoundError,
         ArtifactNotFoundError,
         StorageKeyNotFoundError,
+        LayoutExportNotFoundError,
     ),
     status.HTTP_409_CONFLICT: (
         UserAlreadyExistsError,
         TestNotValidatableError,
         TagAlreadyExistsError,
         ExportNotAvailableError,
+        LayoutExportNotReadyError,
     ),
 }
 
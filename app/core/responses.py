@@ -0,0 +1,48 @@
+import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import aiofiles.os
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+
+NOT_MODIFIED_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+
+
+async def file_response(request: Request, path: Path, filename: str,
+                        media_type: str) -> Response:
+    """
+    Send a file on the local disk by path, leaving the copy to the server (sendfile where
+    the ASGI server offers it). FileResponse answers `Range`/`If-Range` requests and sets
+    a strong ETag and Last-Modified from the file's mtime and size; a matching
+    `If-None-Match` or `If-Modified-Since` gets `304` without a body.
+    """
+    stat_result = await aiofiles.os.stat(path)
+    response = FileResponse(path, stat_result=stat_result, media_type=media_type,
+                            filename=filename)
+    if _not_modified(request, response):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={k: v for k, v in response.headers.items() if k in NOT_MODIFIED_HEADERS},
+        )
+    return response
+
+
+def _not_modified(request: Request, response: Response) -> bool:
+    # RFC 9110 13.1.2: If-None-Match uses the weak comparison and overrides If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response.headers["etag"].removeprefix("W/")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.UTC)
+    return parsedate_to_datetime(response.headers["last-modified"]) <= since
@@ -1,5 +1,7 @@
+import uuid
 from abc import ABC, abstractmethod
-from contextlib import asynccontextmanager
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
 from pathlib import Path
 
 import aioboto3
@@ -8,28 +10,91 @@ import aiofiles.os
 from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 
+from app.core.config import get_settings
+
+settings = get_settings()
 NOT_FOUND_CODES = ("NoSuchKey", "NoSuchBucket", "404")
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # S3 rejects non-final parts under 5 MiB
+DELETE_BATCH_SIZE = 1000  # DeleteObjects limit
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 
 
 def _error_code(exc: ClientError) -> str:
     return str(exc.response.get("Error", {}).get("Code", ""))
 
 
+class StorageReader(ABC):
+    """Sequential reader over one stored object."""
+
+    @abstractmethod
+    async def read(self, size: int = -1) -> bytes:
+        """Return up to `size` bytes, everything left when negative, b"" at the end."""
+
+    async def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        while chunk := await self.read(chunk_size):
+            yield chunk
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.iter_chunks()
+
+
+class StorageWriter(ABC):
+    """Sequential writer of one object; it becomes visible only when the block exits cleanly."""
+
+    @abstractmethod
+    async def write(self, data: bytes) -> None: ...
+
+
 class StorageBackend(ABC):
     @abstractmethod
     async def save(self, key: str, data: bytes) -> None: ...
 
+    async def save_stream(self, key: str, chunks: AsyncIterable[bytes]) -> None:
+        async with self.open_write(key) as writer:
+            async for chunk in chunks:
+                await writer.write(chunk)
+
+    @abstractmethod
+    def open_read(self, key: str) -> AbstractAsyncContextManager[StorageReader]:
+        """Open a stored object for streaming reads; raises KeyError if it does not exist."""
+
+    @abstractmethod
+    def open_write(self, key: str) -> AbstractAsyncContextManager[StorageWriter]:
+        """
+        Open an object for streaming writes. It replaces any previous object under the key
+        only when the block exits cleanly; on an exception nothing is left behind.
+        """
+
     @abstractmethod
     async def load(self, key: str) -> bytes: ...
 
     @abstractmethod
     async def delete(self, key: str) -> None: ...
 
+    @abstractmethod
+    async def delete_many(self, keys: list[str]) -> None:
+        """Delete several objects in one batch; keys that do not exist are skipped."""
+
     @abstractmethod
     async def exists(self, key: str) -> bool: ...
 
     @abstractmethod
-    async def presigned_url(self, key: str, ttl_seconds: int) -> str | None: ...
+    async def presigned_url(self, key: str, ttl_seconds: int,
+                            filename: str | None = None) -> str | None:
+        """Link that downloads the object without credentials, saved as `filename` if given."""
+
+    def local_path(self, key: str) -> Path | None:
+        """Path of the object on the local disk, for backends that keep one."""
+        return None
+
+    async def open(self) -> None:
+        """Acquire long-lived resources; backends without any need not override it."""
+        return None
+
+    async def close(self) -> None:
+        """Release whatever open() acquired."""
+        return None
 
 
 class LocalStorage(StorageBackend):
@@ -48,6 +113,31 @@ class LocalStorage(StorageBackend):
         async with aiofiles.open(full_path, mode="wb") as f:
             await f.write(data)
 
+    @asynccontextmanager
+    async def open_read(self, key: str) -> AsyncIterator[StorageReader]:
+        full_path = self._full_path(key)
+        try:
+            f = await aiofiles.open(full_path, "rb")
+        except FileNotFoundError as e:
+            raise KeyError(key) from e
+        try:
+            yield _LocalReader(f)
+        finally:
+            await f.close()
+
+    @asynccontextmanager
+    async def open_write(self, key: str) -> AsyncIterator[StorageWriter]:
+        full_path = self._full_path(key)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = full_path.with_name(f".{full_path.name}.{uuid.uuid4().hex}.partial")
+        try:
+            async with aiofiles.open(partial_path, mode="wb") as f:
+                yield _LocalWriter(f)
+            await aiofiles.os.replace(partial_path, full_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+
     async def load(self, key: str) -> bytes:
         full_path = self._full_path(key)
         try:
@@ -63,13 +153,102 @@ class LocalStorage(StorageBackend):
         except FileNotFoundError as e:
             raise KeyError(key) from e
 
+    async def delete_many(self, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                await self.delete(key)
+            except KeyError:
+                continue
+
     async def exists(self, key: str) -> bool:
         full_path = self._full_path(key)
         return await aiofiles.os.path.exists(full_path)
 
-    async def presigned_url(self, key: str, ttl_seconds: int) -> None:
+    async def presigned_url(self, key: str, ttl_seconds: int,
+                            filename: str | None = None) -> None:
         return None
 
+    def local_path(self, key: str) -> Path:
+        return self._full_path(key)
+
+
+class _LocalReader(StorageReader):
+    def __init__(self, f):
+        self._f = f
+
+    async def read(self, size: int = -1) -> bytes:
+        return await self._f.read(size)
+
+
+class _LocalWriter(StorageWriter):
+    def __init__(self, f):
+        self._f = f
+
+    async def write(self, data: bytes) -> None:
+        await self._f.write(data)
+
+
+class _S3Reader(StorageReader):
+    def __init__(self, body):
+        self._body = body
+
+    async def read(self, size: int = -1) -> bytes:
+        return await self._body.read(None if size < 0 else size)
+
+
+class _S3Writer(StorageWriter):
+    def __init__(self, client, bucket: str, key: str, part_size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[dict] = []
+
+    async def write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= self._part_size:
+            await self._upload_part(bytes(self._buffer[:self._part_size]))
+            del self._buffer[:self._part_size]
+
+    async def complete(self) -> None:
+        if self._upload_id is None:
+            await self._client.put_object(
+                Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer)
+            )
+            return
+        if self._buffer:
+            await self._upload_part(bytes(self._buffer))
+        await self._client.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    async def abort(self) -> None:
+        if self._upload_id is not None:
+            await self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+
+    async def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            upload = await self._client.create_multipart_upload(
+                Bucket=self._bucket, Key=self._key
+            )
+            self._upload_id = upload["UploadId"]
+        part_number = len(self._parts) + 1
+        response = await self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
 
 class S3Storage(StorageBackend):
     def __init__(
@@ -80,8 +259,14 @@ class S3Storage(StorageBackend):
         region: str,
         endpoint_url: str | None = None,
         public_endpoint_url: str | None = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
     ):
         self._bucket = bucket
+        self._part_size = part_size
+        self._config = BotoConfig(
+            signature_version="s3v4", max_pool_connections=max_pool_connections
+        )
         self._endpoint_url = endpoint_url
         self._public_endpoint_url = public_endpoint_url or endpoint_url
         self._session = aioboto3.Session(
@@ -89,19 +274,77 @@ class S3Storage(StorageBackend):
             aws_secret_access_key=secret_key,
             region_name=region,
         )
+        self._exit_stack: AsyncExitStack | None = None
+        self._clients: dict[bool, object] = {}
+
+    async def open(self) -> None:
+        """
+        Open one pooled client per endpoint and reuse it for every call until close().
+        Clients are bound to the running event loop, so open() and close() must run on it.
+        """
+        if self._exit_stack is not None:
+            return
+        stack = AsyncExitStack()
+        try:
+            for public in (False, True):
+                self._clients[public] = await stack.enter_async_context(self._new_client(public))
+        except BaseException:
+            self._clients.clear()
+            await stack.aclose()
+            raise
+        self._exit_stack = stack
+
+    async def close(self) -> None:
+        if self._exit_stack is None:
+            return
+        stack, self._exit_stack = self._exit_stack, None
+        self._clients.clear()
+        await stack.aclose()
+
+    def _new_client(self, public: bool):
+        endpoint = self._public_endpoint_url if public else self._endpoint_url
+        return self._session.client("s3", endpoint_url=endpoint, config=self._config)
 
     @asynccontextmanager
     async def _client(self, public: bool = False):
-        endpoint = self._public_endpoint_url if public else self._endpoint_url
-        async with self._session.client(
-            "s3", endpoint_url=endpoint, config=BotoConfig(signature_version="s3v4")
-        ) as client:
+        # Outside open()/close() every call pays for its own short-lived client
+        if public in self._clients:
+            yield self._clients[public]
+            return
+        async with self._new_client(public) as client:
             yield client
 
     async def save(self, key: str, data: bytes) -> None:
         async with self._client() as client:
             await client.put_object(Bucket=self._bucket, Key=key, Body=data)
 
+    @asynccontextmanager
+    async def open_read(self, key: str) -> AsyncIterator[StorageReader]:
+        async with self._client() as client:
+            try:
+                response = await client.get_object(Bucket=self._bucket, Key=key)
+            except ClientError as exc:
+                if _error_code(exc) in NOT_FOUND_CODES:
+                    raise KeyError(key) from exc
+                raise
+            async with response["Body"] as body:
+                yield _S3Reader(body)
+
+    @asynccontextmanager
+    async def open_write(self, key: str) -> AsyncIterator[StorageWriter]:
+        """
+        Buffers up to one part: small objects become a single PUT, larger ones a multipart
+        upload that is aborted if the block raises.
+        """
+        async with self._client() as client:
+            writer = _S3Writer(client, self._bucket, key, self._part_size)
+            try:
+                yield writer
+                await writer.complete()
+            except BaseException:
+                await writer.abort()
+                raise
+
     async def load(self, key: str) -> bytes:
         try:
             async with self._client() as client:
@@ -123,15 +366,70 @@ class S3Storage(StorageBackend):
             raise
 
     async def delete(self, key: str) -> None:
-        if not await self.exists(key):
-            raise KeyError(key)
         async with self._client() as client:
+            try:
+                await client.head_object(Bucket=self._bucket, Key=key)
+            except ClientError as exc:
+                if _error_code(exc) in NOT_FOUND_CODES:
+                    raise KeyError(key) from exc
+                raise
             await client.delete_object(Bucket=self._bucket, Key=key)
 
-    async def presigned_url(self, key: str, ttl_seconds: int) -> str:
+    async def delete_many(self, keys: list[str]) -> None:
+        async with self._client() as client:
+            for start in range(0, len(keys), DELETE_BATCH_SIZE):
+                batch = keys[start:start + DELETE_BATCH_SIZE]
+                await client.delete_objects(
+                    Bucket=self._bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+
+    async def presigned_url(self, key: str, ttl_seconds: int,
+                            filename: str | None = None) -> str:
+        params = {"Bucket": self._bucket, "Key": key}
+        if filename is not None:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
         async with self._client(public=True) as client:
             return await client.generate_presigned_url(
                 "get_object",
-                Params={"Bucket": self._bucket, "Key": key},
+                Params=params,
                 ExpiresIn=ttl_seconds,
             )
+
+
+class _StorageHolder:
+    storage: StorageBackend | None = None
+
+
+_holder = _StorageHolder()
+
+
+def create_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY.get_secret_value(),
+            secret_key=settings.S3_SECRET_KEY.get_secret_value(),
+            region=settings.S3_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        )
+    return LocalStorage(Path(settings.STORAGE_PATH))
+
+
+async def init_storage(storage: StorageBackend) -> None:
+    await storage.open()
+    _holder.storage = storage
+
+
+async def close_storage() -> None:
+    if _holder.storage is not None:
+        await _holder.storage.close()
+        _holder.storage = None
+
+
+def current_storage() -> StorageBackend | None:
+    return _holder.storage
+
@@ -6,6 +6,9 @@ from app.db import WorkerSessionLocal
 from app.memory_allocator.repositories import (
     ArtifactRepository,
     DeadLetterRepository,
+    ExportArchiveRepository,
+    LayoutExportRepository,
+    LayoutRepository,
     PlatformRepository,
     TagRepository,
     TestRepository,
@@ -24,6 +27,9 @@ class UnitOfWork:
         self.validations = ValidationRepository(session)
         self.tags = TagRepository(session)
         self.dead_letters = DeadLetterRepository(session)
+        self.layouts = LayoutRepository(session)
+        self.export_archives = ExportArchiveRepository(session)
+        self.layout_exports = LayoutExportRepository(session)
 
     async def commit(self) -> None:
         await self.session.commit()
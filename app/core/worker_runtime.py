@@ -0,0 +1,41 @@
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
+from app.core.storage import close_storage, create_storage, init_storage
+
+
+class _RunnerHolder:
+    runner: asyncio.Runner | None = None
+
+
+_holder = _RunnerHolder()
+
+
+def init_worker_runtime() -> None:
+    """
+    Give the worker process one event loop for its whole life, so clients opened here
+    (the pooled storage) stay usable by every task instead of dying with asyncio.run.
+    """
+    if _holder.runner is not None:
+        return
+    runner = asyncio.Runner()
+    runner.run(init_storage(create_storage()))
+    _holder.runner = runner
+
+
+def shutdown_worker_runtime() -> None:
+    runner, _holder.runner = _holder.runner, None
+    if runner is None:
+        return
+    try:
+        runner.run(close_storage())
+    finally:
+        runner.close()
+
+
+def run_async[T](coro: Coroutine[Any, Any, T]) -> T:
+    """Run a task coroutine on the process loop, or on a fresh one outside a worker."""
+    if _holder.runner is None:
+        return asyncio.run(coro)
+    return _holder.runner.run(coro)
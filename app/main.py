@@ -15,10 +15,17 @@ from app.core.events import (
     init_event_bus,
 )
 from app.core.logging_config import setup_logging
+from app.core.storage import close_storage, create_storage, init_storage
+from app.memory_allocator.routers.layout_exports_routes import router as layout_exports_router
 from app.memory_allocator.routers.platforms_routes import router as platforms_router
 from app.memory_allocator.routers.tags_routes import router as tags_router
 from app.memory_allocator.routers.tests_routes import router as tests_router
 from app.memory_allocator.routers.tests_ws_routes import router as ws_tests_router
+from app.memory_allocator.utils.count_cache import (
+    close_count_cache,
+    create_count_cache,
+    init_count_cache,
+)
 from app.users.routes import router as users_router
 
 setup_logging()
@@ -37,8 +44,12 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
             logger.info("app.event_bus_ready")
         except Exception as exc:
             logger.warning("app.event_bus_unavailable", extra={"error": str(exc)})
+        await init_storage(create_storage())
+        init_count_cache(create_count_cache())
         yield
     finally:
+        await close_count_cache()
+        await close_storage()
         await close_event_bus()
 
 
@@ -55,6 +66,7 @@ app.include_router(tests_router)
 app.include_router(users_router)
 app.include_router(platforms_router)
 app.include_router(tags_router)
+app.include_router(layout_exports_router)
 app.include_router(ws_tests_router)
 
 
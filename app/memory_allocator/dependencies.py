@@ -1,10 +1,12 @@
 from fastapi import Depends
 
+from app.core.config import get_settings
 from app.core.dependencies import get_event_bus, get_storage, get_uow
 from app.core.events import EventBus
 from app.core.storage import StorageBackend
 from app.core.unit_of_work import UnitOfWork
 from app.memory_allocator.checker import Checker, get_checker
+from app.memory_allocator.enums import TotalMode
 from app.memory_allocator.notifications import StatusNotifier
 from app.memory_allocator.services import (
     IngestionService,
@@ -14,12 +16,17 @@ from app.memory_allocator.services import (
     ValidationService,
 )
 from app.memory_allocator.services.export_service import ExportService
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from app.memory_allocator.tasks.tasks_layout_export import export_layout
 from app.memory_allocator.tasks.tasks_testcase import process_test
 from app.memory_allocator.tasks.tasks_validation import process_validation
+from app.memory_allocator.utils.count_cache import current_count_cache
+
+settings = get_settings()
 
 
 def get_status_notifier(bus: EventBus = Depends(get_event_bus)) -> StatusNotifier:
-    return StatusNotifier(bus=bus)
+    return StatusNotifier(bus=bus, count_cache=current_count_cache())
 
 
 def get_ingestion_service(
@@ -31,12 +38,19 @@ def get_ingestion_service(
         uow=uow,
         storage=storage,
         enqueue_processing=process_test.delay,
-        notifier=notifier
+        notifier=notifier,
+        dedup_uploads=settings.UPLOAD_DEDUP_ENABLED,
+        count_cache=current_count_cache()
     )
 
 
 def get_test_service(uow: UnitOfWork = Depends(get_uow)) -> TestcaseService:
-    return TestcaseService(uow=uow)
+    return TestcaseService(
+        uow=uow,
+        count_cache=current_count_cache(),
+        count_mode=TotalMode(settings.TEST_COUNT_MODE),
+        facets_rollup=settings.TEST_FACETS_ROLLUP_ENABLED,
+    )
 
 
 def get_validation_service(
@@ -48,7 +62,8 @@ def get_validation_service(
         uow=uow,
         checker=checker,
         enqueue_validation=process_validation.delay,
-        notifier=notifier
+        notifier=notifier,
+        precheck=settings.VALIDATION_PRECHECK_ENABLED,
     )
 
 
@@ -64,4 +79,17 @@ def get_export_service(
     uow: UnitOfWork = Depends(get_uow),
     storage: StorageBackend = Depends(get_storage)
 ) -> ExportService:
-    return ExportService(uow=uow, storage=storage)
+    return ExportService(
+        uow=uow,
+        storage=storage,
+        fetch_concurrency=settings.EXPORT_FETCH_CONCURRENCY,
+        prefetch_max_bytes=settings.EXPORT_PREFETCH_MAX_BYTES,
+        cache_max_bytes=settings.EXPORT_CACHE_MAX_BYTES if settings.EXPORT_CACHE_ENABLED else None
+    )
+
+
+def get_layout_export_service(
+    uow: UnitOfWork = Depends(get_uow),
+    storage: StorageBackend = Depends(get_storage)
+) -> LayoutExportService:
+    return LayoutExportService(uow=uow, storage=storage, enqueue_export=export_layout.delay)
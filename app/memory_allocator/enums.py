@@ -31,6 +31,106 @@ class ValidationStatus(StrEnum):
     FAILED = "failed"
 
 
+class TotalMode(StrEnum):
+    """
+    How the total of a filtered test case listing is produced.
+
+    EXACT – count(*) over the matching rows.
+    CACHED – a total counted earlier for the same filters; dropped on any status change.
+    ESTIMATED – the planner's row estimate, cheap but approximate.
+    """
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+class AddressSpace(StrEnum):
+    """Address space an address range refers to: block and region `vaddr` or `paddr`."""
+    VIRTUAL = "virtual"
+    PHYSICAL = "physical"
+
+
+class MemoryMetric(StrEnum):
+    """
+    Memory use of a test case, summed over the sizes of its blocks at parsing time.
+
+    MAPPED_BYTES – every block.
+    READABLE_BYTES, WRITABLE_BYTES, EXECUTABLE_BYTES – blocks whose `access` has R, W, X.
+    UNCACHED_BYTES – blocks with a `cache_policy` other than DEFAULT, e.g. IO. The
+        non-default policies are summed together, not broken down per policy.
+    SHADOW_BYTES – shadow blocks.
+    LARGEST_CONTIGUOUS_BYTES – size of the largest single block flagged `is_contiguous`.
+        Adjacent blocks are not merged, so this is not the largest contiguous mapped span.
+    """
+    MAPPED_BYTES = "mapped_bytes"
+    READABLE_BYTES = "readable_bytes"
+    WRITABLE_BYTES = "writable_bytes"
+    EXECUTABLE_BYTES = "executable_bytes"
+    UNCACHED_BYTES = "uncached_bytes"
+    SHADOW_BYTES = "shadow_bytes"
+    LARGEST_CONTIGUOUS_BYTES = "largest_contiguous_bytes"
+
+
+class LayoutIssueKind(StrEnum):
+    """
+    Layout error found by the built-in pre-check, before the external checker runs.
+
+    VIRTUAL_OVERLAP – two blocks of one address space overlap, safety zones included.
+    PHYSICAL_OVERLAP – two regions of one address space map the same physical memory.
+    BAD_ALIGN – `align` is not a power of two.
+    MISALIGNED – a block address is not a multiple of its `align`.
+    REGION_OUTSIDE_BLOCK – a region reaches past the addresses of its block.
+    """
+    VIRTUAL_OVERLAP = "virtual_overlap"
+    PHYSICAL_OVERLAP = "physical_overlap"
+    BAD_ALIGN = "bad_align"
+    MISALIGNED = "misaligned"
+    REGION_OUTSIDE_BLOCK = "region_outside_block"
+
+
+class FacetSource(StrEnum):
+    """
+    Where the facet counts of a test case listing come from.
+
+    QUERY – grouped counts over the matching tests.
+    ROLLUP – per status and platform totals kept up to date by a trigger.
+    """
+    QUERY = "query"
+    ROLLUP = "rollup"
+
+
+class LayoutTable(StrEnum):
+    """Layout rows a columnar export holds: one per block or one per region."""
+    BLOCKS = "blocks"
+    REGIONS = "regions"
+
+
+class ColumnarFormat(StrEnum):
+    """
+    File format of a columnar layout export.
+
+    ARROW – Arrow IPC stream, readable batch by batch while it arrives.
+    PARQUET – compressed Parquet file, readable once complete.
+    """
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+class LayoutExportStatus(StrEnum):
+    """
+    Lifecycle of one columnar layout export job: PENDING -> RUNNING -> COMPLETED | FAILED.
+
+    PENDING – the job is queued.
+    RUNNING – a worker is writing the file.
+    COMPLETED – terminal, the file is in the storage and can be downloaded.
+    FAILED – terminal, the file could not be written.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class ArtifactKind(StrEnum):
     """Role of a single file extracted from an uploaded test case archive."""
     CONFIG = "config"
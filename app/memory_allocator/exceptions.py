@@ -59,3 +59,13 @@ class ArtifactNotFoundError(DomainError):
 class StorageKeyNotFoundError(DomainError):
     def __init__(self, storage_key: str):
         super().__init__(f"Storage key {storage_key} does not exist")
+
+
+class LayoutExportNotFoundError(DomainError):
+    def __init__(self, export_id: int):
+        super().__init__(f"Layout export with id {export_id} does not exist")
+
+
+class LayoutExportNotReadyError(DomainError):
+    def __init__(self, export_id: int, status: str):
+        super().__init__(f"Layout export with id {export_id} is not completed (status: {status})")
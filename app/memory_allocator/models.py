@@ -2,22 +2,34 @@ import datetime
 import uuid
 
 from sqlalchemy import (
+    DDL,
     BigInteger,
     CheckConstraint,
     Column,
+    Computed,
     DateTime,
     Enum,
     ForeignKey,
     Index,
+    SmallInteger,
+    String,
     Table,
     Text,
+    event,
     text,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import INT8RANGE, JSONB, Range
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
-from app.memory_allocator.enums import ArtifactKind, TestStatus, ValidationStatus
+from app.memory_allocator.enums import (
+    ArtifactKind,
+    ColumnarFormat,
+    LayoutExportStatus,
+    LayoutTable,
+    TestStatus,
+    ValidationStatus,
+)
 from app.users.models import User
 
 test_case_tag = Table(
@@ -128,6 +140,11 @@ class TestArtifact(Base):
         DateTime(timezone=True),
         default=lambda: datetime.datetime.now(datetime.UTC)
     )
+    # Raw deflate stream of the content, spliced as is into export archives
+    deflate_storage_key: Mapped[str | None] = mapped_column(nullable=True)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    deflated_size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    crc32: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
 
     test_id: Mapped[int] = mapped_column(ForeignKey("tests.id"), nullable=False)
     test: Mapped["TestCase"] = relationship(back_populates="artifacts")
@@ -150,6 +167,18 @@ class TestCase(Base):
             "uploaded_at",
             postgresql_where=text("status = 'PENDING'"),
         ),
+        Index(
+            "ix_tests_parsed_content_sha256",
+            "content_sha256",
+            postgresql_where=text("status = 'PARSED'"),
+        ),
+        # Serves the case-insensitive substring search on name (ILIKE '%...%'), needs pg_trgm
+        Index(
+            "ix_tests_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -168,6 +197,10 @@ class TestCase(Base):
     platform_id: Mapped[int] = mapped_column(ForeignKey("platforms.id"), nullable=False)
     uploaded_by_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
 
+    # Content addressing: byte-identical uploads share the layout and artifacts of a twin
+    content_sha256: Mapped[str | None] = mapped_column(String(64))
+    duplicate_of_id: Mapped[int | None] = mapped_column(ForeignKey("tests.id"))
+
     modules: Mapped[list["Module"]] = relationship(
         "Module", back_populates="test", cascade="all, delete-orphan"
     )
@@ -189,6 +222,24 @@ class TestCase(Base):
     kernel_entry_count: Mapped[int] = mapped_column(nullable=False, default=0)
     user_entry_count: Mapped[int] = mapped_column(nullable=False, default=0)
 
+    # Memory metrics, one column per MemoryMetric
+    mapped_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+    readable_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+    writable_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+    executable_bytes: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, index=True
+    )
+    uncached_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+    shadow_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+    largest_contiguous_bytes: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, index=True
+    )
+
+    @property
+    def layout_owner_id(self) -> int:
+        """Id of the test case whose modules, blocks and regions describe this one."""
+        return self.duplicate_of_id or self.id
+
     def __str__(self):
         return f"Test Case {self.name}_{self.status}"
 
@@ -206,7 +257,7 @@ class Module(Base):
     name: Mapped[str] = mapped_column(nullable=False, index=True)
     address_space_base: Mapped[int | None] = mapped_column()
 
-    test_id: Mapped[int] = mapped_column(ForeignKey("tests.id"), nullable=False)
+    test_id: Mapped[int] = mapped_column(ForeignKey("tests.id"), nullable=False, index=True)
 
     kernel_blocks: Mapped[list["Block"]] = relationship(
         "Block", back_populates="module", cascade="all, delete-orphan"
@@ -233,7 +284,7 @@ class Partition(Base):
     name: Mapped[str] = mapped_column(nullable=False, index=True)
     space_id: Mapped[int] = mapped_column(nullable=False, index=True)
 
-    module_id: Mapped[int] = mapped_column(ForeignKey("modules.id"), nullable=False)
+    module_id: Mapped[int] = mapped_column(ForeignKey("modules.id"), nullable=False, index=True)
 
     module: Mapped["Module"] = relationship("Module", back_populates="partitions")
     blocks: Mapped[list["Block"]] = relationship(
@@ -257,6 +308,9 @@ class Block(Base):
             "(module_id IS NULL) <> (partition_id IS NULL)",
             name="ck_block_single_owner",
         ),
+        # Serve the address overlap search (&&)
+        Index("ix_blocks_vaddr_range", "vaddr_range", postgresql_using="gist"),
+        Index("ix_blocks_paddr_range", "paddr_range", postgresql_using="gist"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -275,6 +329,13 @@ class Block(Base):
     paddr: Mapped[int | None] = mapped_column(BigInteger)
     size: Mapped[int | None] = mapped_column(BigInteger)
     vaddr: Mapped[int | None] = mapped_column(BigInteger)
+    # [addr, addr + size), null while either is unknown
+    vaddr_range: Mapped[Range[int] | None] = mapped_column(
+        INT8RANGE, Computed("int8range(vaddr, vaddr + size)", persisted=True), deferred=True
+    )
+    paddr_range: Mapped[Range[int] | None] = mapped_column(
+        INT8RANGE, Computed("int8range(paddr, paddr + size)", persisted=True), deferred=True
+    )
     shadow_offset: Mapped[int | None] = mapped_column()
     shadow_scale: Mapped[int | None] = mapped_column()
     shadow_type: Mapped[str | None] = mapped_column()
@@ -283,8 +344,8 @@ class Block(Base):
     safety_zone_before_unmapped: Mapped[bool] = mapped_column(nullable=False)
     safety_zone_after_unmapped: Mapped[bool] = mapped_column(nullable=False)
 
-    module_id: Mapped[int | None] = mapped_column(ForeignKey("modules.id"))
-    partition_id: Mapped[int | None] = mapped_column(ForeignKey("partitions.id"))
+    module_id: Mapped[int | None] = mapped_column(ForeignKey("modules.id"), index=True)
+    partition_id: Mapped[int | None] = mapped_column(ForeignKey("partitions.id"), index=True)
 
     module: Mapped["Module | None"] = relationship(back_populates="kernel_blocks")
     partition: Mapped["Partition | None"] = relationship(back_populates="blocks")
@@ -304,13 +365,23 @@ class Region(Base):
     Model of block region.
     """
     __tablename__ = "regions"
+    __table_args__ = (
+        Index("ix_regions_vaddr_range", "vaddr_range", postgresql_using="gist"),
+        Index("ix_regions_paddr_range", "paddr_range", postgresql_using="gist"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    paddr: Mapped[int] = mapped_column(nullable=False)
-    size: Mapped[int] = mapped_column(nullable=False)
-    vaddr: Mapped[int] = mapped_column(nullable=False)
+    paddr: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    vaddr: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    vaddr_range: Mapped[Range[int]] = mapped_column(
+        INT8RANGE, Computed("int8range(vaddr, vaddr + size)", persisted=True), deferred=True
+    )
+    paddr_range: Mapped[Range[int]] = mapped_column(
+        INT8RANGE, Computed("int8range(paddr, paddr + size)", persisted=True), deferred=True
+    )
 
-    block_id: Mapped[int] = mapped_column(ForeignKey("blocks.id"), nullable=False)
+    block_id: Mapped[int] = mapped_column(ForeignKey("blocks.id"), nullable=False, index=True)
 
     block: Mapped["Block"] = relationship(back_populates="regions")
 
@@ -346,3 +417,134 @@ class DeadLetter(Base):
 
     def __repr__(self):
         return str(self)
+
+
+class ExportArchive(Base):
+    """
+    Model of a built export archive kept in the storage
+    """
+    __tablename__ = "export_archives"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    test_id: Mapped[int] = mapped_column(ForeignKey("tests.id"), nullable=False, index=True)
+    storage_key: Mapped[str] = mapped_column(nullable=False, unique=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC)
+    )
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        index=True
+    )
+
+    def __str__(self):
+        return f"Export archive {self.storage_key} of test {self.test_id}"
+
+    def __repr__(self):
+        return str(self)
+
+
+class LayoutExport(Base):
+    """
+    Model of a columnar layout export written to the storage by a worker
+    """
+    __tablename__ = "layout_exports"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[LayoutExportStatus] = mapped_column(
+        Enum(LayoutExportStatus),
+        default=LayoutExportStatus.PENDING,
+        nullable=False
+    )
+    table: Mapped[LayoutTable] = mapped_column(Enum(LayoutTable), nullable=False)
+    format: Mapped[ColumnarFormat] = mapped_column(Enum(ColumnarFormat), nullable=False)
+    filters: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    storage_key: Mapped[str | None] = mapped_column()
+    row_count: Mapped[int | None] = mapped_column(BigInteger)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger)
+    requested_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        nullable=False
+    )
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+
+    requested_by_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
+
+    def __str__(self):
+        return f"Layout export {self.id} of {self.table} as {self.format}"
+
+    def __repr__(self):
+        return str(self)
+
+
+class TestFacetRollup(Base):
+    """
+    Number of test cases per status and platform as of the last compaction; the changes
+    made since are in test_facet_rollup_delta
+    """
+    __tablename__ = "test_facet_rollup"
+
+    status: Mapped[TestStatus] = mapped_column(Enum(TestStatus), primary_key=True)
+    platform_id: Mapped[int] = mapped_column(ForeignKey("platforms.id"), primary_key=True)
+    test_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __str__(self):
+        return f"{self.test_count} tests {self.status} on platform {self.platform_id}"
+
+    def __repr__(self):
+        return str(self)
+
+
+class TestFacetRollupDelta(Base):
+    """
+    One change of a test_facet_rollup count, appended by the trigger on tests. Appending
+    takes no lock on the rollup row, so uploads of one platform do not wait for each other;
+    the deltas are folded into test_facet_rollup by the compaction task.
+    """
+    __tablename__ = "test_facet_rollup_delta"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    status: Mapped[TestStatus] = mapped_column(Enum(TestStatus), nullable=False)
+    platform_id: Mapped[int] = mapped_column(ForeignKey("platforms.id"), nullable=False)
+    delta: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+
+    def __str__(self):
+        return f"{self.delta:+d} tests {self.status} on platform {self.platform_id}"
+
+    def __repr__(self):
+        return str(self)
+
+
+# Same function and trigger as the migrations of test_facet_rollup, for create_all
+FACET_ROLLUP_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION test_facet_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status = NEW.status AND OLD.platform_id = NEW.platform_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO test_facet_rollup_delta (status, platform_id, delta)
+        VALUES (OLD.status, OLD.platform_id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO test_facet_rollup_delta (status, platform_id, delta)
+        VALUES (NEW.status, NEW.platform_id, 1);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+FACET_ROLLUP_TRIGGER = DDL("""
+CREATE TRIGGER tests_facet_rollup
+AFTER INSERT OR DELETE OR UPDATE OF status, platform_id ON tests
+FOR EACH ROW EXECUTE FUNCTION test_facet_rollup_apply()
+""")
+event.listen(Base.metadata, "after_create", FACET_ROLLUP_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "after_create", FACET_ROLLUP_TRIGGER.execute_if(dialect="postgresql"))
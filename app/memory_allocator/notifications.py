@@ -3,6 +3,7 @@ import logging
 from app.core.events import EventBus
 from app.memory_allocator.models import TestCase, ValidationResult
 from app.memory_allocator.schemas import TestStatusEvent, ValidationStatusEvent
+from app.memory_allocator.utils.count_cache import CountCache
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +13,9 @@ def get_channel_name(test_id: int) -> str:
 
 
 class StatusNotifier:
-    def __init__(self, bus: EventBus):
+    def __init__(self, bus: EventBus, count_cache: CountCache | None = None):
         self.bus = bus
+        self.count_cache = count_cache
 
     async def validation_status_changed(self, vr: ValidationResult) -> None:
         channel_name = get_channel_name(vr.test_id)
@@ -39,6 +41,8 @@ class StatusNotifier:
             })
 
     async def test_status_changed(self, test: TestCase) -> None:
+        if self.count_cache is not None:
+            await self.count_cache.invalidate()
         channel_name = get_channel_name(test.id)
         try:
             test_status_event = TestStatusEvent(
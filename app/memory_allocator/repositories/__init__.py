@@ -1,5 +1,8 @@
 from .artifact_repository import ArtifactRepository
 from .deadletter_repository import DeadLetterRepository
+from .export_archive_repository import ExportArchiveRepository
+from .layout_export_repository import LayoutExportRepository
+from .layout_repository import LayoutRepository
 from .platform_repository import PlatformRepository
 from .tag_repository import TagRepository
 from .test_repository import TestRepository
@@ -8,5 +11,6 @@ from .validation_repository import ValidationRepository
 __all__ = [
     "PlatformRepository", "TestRepository",
     "ArtifactRepository", "ValidationRepository", "TagRepository",
-    "DeadLetterRepository"
+    "DeadLetterRepository", "LayoutRepository", "ExportArchiveRepository",
+    "LayoutExportRepository"
 ]
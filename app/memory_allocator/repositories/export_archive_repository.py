@@ -0,0 +1,48 @@
+from collections.abc import Sequence
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.memory_allocator.models import ExportArchive
+
+
+class ExportArchiveRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def add(self, archive: ExportArchive) -> None:
+        self.session.add(archive)
+
+    async def find_by_key(self, storage_key: str) -> ExportArchive | None:
+        query = select(ExportArchive).where(ExportArchive.storage_key == storage_key)
+        return (await self.session.execute(query)).scalar_one_or_none()
+
+    async def list_by_test(self, test_id: int) -> Sequence[ExportArchive]:
+        query = select(ExportArchive).where(ExportArchive.test_id == test_id)
+        return (await self.session.execute(query)).scalars().all()
+
+    async def total_size(self) -> int:
+        total = await self.session.scalar(select(func.sum(ExportArchive.size_bytes)))
+        return total or 0
+
+    async def least_recently_used(self, min_bytes: int) -> Sequence[ExportArchive]:
+        """The least recently used archives whose sizes add up to at least min_bytes."""
+        freed_before = (
+            func.sum(ExportArchive.size_bytes).over(
+                order_by=(ExportArchive.last_used_at, ExportArchive.id)
+            ) - ExportArchive.size_bytes
+        ).label("freed_before")
+        ranked = select(ExportArchive.id, freed_before).subquery()
+        query = (
+            select(ExportArchive)
+            .join(ranked, ranked.c.id == ExportArchive.id)
+            .where(ranked.c.freed_before < min_bytes)
+            .order_by(ExportArchive.last_used_at, ExportArchive.id)
+        )
+        return (await self.session.execute(query)).scalars().all()
+
+    async def delete_many(self, archive_ids: Sequence[int]) -> None:
+        if archive_ids:
+            await self.session.execute(
+                delete(ExportArchive).where(ExportArchive.id.in_(archive_ids))
+            )
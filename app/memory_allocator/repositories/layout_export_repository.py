@@ -0,0 +1,16 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.memory_allocator.models import LayoutExport
+
+
+class LayoutExportRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def add(self, export: LayoutExport) -> None:
+        self.session.add(export)
+
+    async def find_by_id(self, export_id: int) -> LayoutExport | None:
+        query = select(LayoutExport).where(LayoutExport.id == export_id)
+        return (await self.session.execute(query)).scalar_one_or_none()
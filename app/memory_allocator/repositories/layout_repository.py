@@ -0,0 +1,215 @@
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import NamedTuple
+
+from sqlalchemy import (
+    CompoundSelect,
+    Text,
+    cast,
+    func,
+    insert,
+    literal_column,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.memory_allocator.models import Block, Module, Partition, Region
+from app.memory_allocator.schemas import BlockLayout, RegionLayout
+from app.memory_allocator.utils.layout_analyzer import BlockGeometry, RegionGeometry
+
+
+class BlockRows(NamedTuple):
+    """Column values of a block and of its regions, without foreign keys."""
+    values: dict
+    regions: list[dict]
+
+
+class PartitionRows(NamedTuple):
+    """Column values of a partition and of its blocks, without foreign keys."""
+    values: dict
+    blocks: list[BlockRows]
+
+
+class ModuleRows(NamedTuple):
+    """Column values of a module with its whole block tree, without foreign keys."""
+    values: dict
+    kernel_blocks: list[BlockRows]
+    partitions: list[PartitionRows]
+
+    @property
+    def block_count(self) -> int:
+        return len(self.kernel_blocks) + sum(len(p.blocks) for p in self.partitions)
+
+    @property
+    def blocks(self) -> Iterator[BlockRows]:
+        """Kernel blocks, then the blocks of every partition."""
+        yield from self.kernel_blocks
+        for partition in self.partitions:
+            yield from partition.blocks
+
+
+class ModuleHead(NamedTuple):
+    id: int
+    name: str
+    address_space_base: int | None
+
+
+class PartitionHead(NamedTuple):
+    id: int
+    module_id: int
+    name: str
+    space_id: int
+
+
+class BlockDocument(NamedTuple):
+    """A block with its regions as a JSON object, and the module and partition owning it."""
+    module_id: int
+    partition_id: int | None
+    document: str
+
+
+def _json_object(model, fields) -> list:
+    """json_build_object arguments taking the given columns under their own names."""
+    arguments = []
+    for field in fields:
+        arguments += [literal_column(f"'{field}'"), getattr(model, field)]
+    return arguments
+
+
+class LayoutRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def bulk_insert(self, test_id: int, modules: Sequence[ModuleRows]) -> None:
+        """
+        Persist the memory layout of a test with one multi-row INSERT per table.
+        Ids come back in parameter order, so children are linked without a round trip per row.
+        """
+        module_ids = await self._insert_returning_ids(
+            Module, [{**m.values, "test_id": test_id} for m in modules]
+        )
+
+        partitions = [(p, module_id)
+                      for m, module_id in zip(modules, module_ids, strict=True)
+                      for p in m.partitions]
+        partition_ids = await self._insert_returning_ids(
+            Partition, [{**p.values, "module_id": module_id} for p, module_id in partitions]
+        )
+
+        block_owners: list[tuple[BlockRows, int | None, int | None]] = []
+        for m, module_id in zip(modules, module_ids, strict=True):
+            block_owners.extend((b, module_id, None) for b in m.kernel_blocks)
+        for (p, _), partition_id in zip(partitions, partition_ids, strict=True):
+            block_owners.extend((b, None, partition_id) for b in p.blocks)
+        block_ids = await self._insert_returning_ids(Block, [
+            {**b.values, "module_id": module_id, "partition_id": partition_id}
+            for b, module_id, partition_id in block_owners
+        ])
+
+        regions = [{**r, "block_id": block_id}
+                   for (b, _, _), block_id in zip(block_owners, block_ids, strict=True)
+                   for r in b.regions]
+        if regions:
+            await self.session.execute(insert(Region), regions)
+
+    async def block_geometry(self, test_id: int) -> list[BlockGeometry]:
+        """
+        Placement of every block of a test. Partition blocks live in the space of their
+        partition, kernel blocks in the one of their module, told apart by the sign.
+        """
+        query = select(
+            Block.id,
+            Block.name,
+            func.coalesce(Block.partition_id, -Block.module_id),
+            Block.vaddr,
+            Block.paddr,
+            Block.size,
+            Block.align,
+            Block.safety_zone_before,
+            Block.safety_zone_after,
+        ).where(Block.id.in_(self._block_ids(test_id)))
+        return [BlockGeometry(*row) for row in await self.session.execute(query)]
+
+    async def region_geometry(self, test_id: int) -> list[RegionGeometry]:
+        query = (
+            select(Region.block_id, Region.vaddr, Region.paddr, Region.size)
+            .where(Region.block_id.in_(self._block_ids(test_id)))
+        )
+        return [RegionGeometry(*row) for row in await self.session.execute(query)]
+
+    async def list_modules(self, test_id: int) -> list[ModuleHead]:
+        query = (
+            select(Module.id, Module.name, Module.address_space_base)
+            .where(Module.test_id == test_id)
+            .order_by(Module.id)
+        )
+        return [ModuleHead(*row) for row in await self.session.execute(query)]
+
+    async def list_partitions(self, test_id: int) -> list[PartitionHead]:
+        query = (
+            select(Partition.id, Partition.module_id, Partition.name, Partition.space_id)
+            .join(Module, Module.id == Partition.module_id)
+            .where(Module.test_id == test_id)
+            .order_by(Partition.module_id, Partition.id)
+        )
+        return [PartitionHead(*row) for row in await self.session.execute(query)]
+
+    async def stream_block_documents(
+        self,
+        test_id: int,
+        batch_size: int
+    ) -> AsyncIterator[BlockDocument]:
+        """
+        Every block of a test rendered by Postgres as a JSON object shaped like
+        BlockLayout, its regions aggregated in. Ordered by module, then kernel blocks
+        before partition blocks, then by partition and id. Rows come from a server-side
+        cursor, batch_size at a time.
+        """
+        regions = (
+            select(func.coalesce(
+                func.json_agg(aggregate_order_by(
+                    func.json_build_object(*_json_object(Region, RegionLayout.model_fields)),
+                    Region.id,
+                )),
+                literal_column("'[]'::json"),
+            ))
+            .where(Region.block_id == Block.id)
+            .scalar_subquery()
+        )
+        block_fields = [field for field in BlockLayout.model_fields if field != "regions"]
+        document = func.json_build_object(
+            *_json_object(Block, block_fields), literal_column("'regions'"), regions
+        )
+        module_id = func.coalesce(Block.module_id, Partition.module_id)
+        query = (
+            select(module_id, Block.partition_id, cast(document, Text))
+            .select_from(Block)
+            .outerjoin(Partition, Partition.id == Block.partition_id)
+            .where(Block.id.in_(self._block_ids(test_id)))
+            .order_by(module_id, Block.partition_id.nulls_first(), Block.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield BlockDocument(*row)
+
+    @staticmethod
+    def _block_ids(test_id: int) -> CompoundSelect:
+        # One branch per owner kind, so each walks down the foreign key indexes
+        return union_all(
+            select(Block.id)
+            .join(Module, Module.id == Block.module_id)
+            .where(Module.test_id == test_id),
+            select(Block.id)
+            .join(Partition, Partition.id == Block.partition_id)
+            .join(Module, Module.id == Partition.module_id)
+            .where(Module.test_id == test_id),
+        )
+
+    async def _insert_returning_ids(self, model, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        query = insert(model).returning(model.id, sort_by_parameter_order=True)
+        result = await self.session.execute(query, rows)
+        return list(result.scalars().all())
@@ -1,14 +1,77 @@
+import json
 import uuid
-from collections.abc import Sequence
+from collections import Counter
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime
+from typing import NamedTuple
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    String,
+    cast,
+    delete,
+    distinct,
+    func,
+    null,
+    select,
+    tuple_,
+    union,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import Range, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
-from app.memory_allocator.enums import TestStatus
-from app.memory_allocator.models import Tag, TestCase
-from app.memory_allocator.schemas import TestFilter, TestPagination
+from app.memory_allocator.enums import AddressSpace, LayoutTable, TestStatus
+from app.memory_allocator.models import (
+    Block,
+    Module,
+    Partition,
+    Region,
+    Tag,
+    TestArtifact,
+    TestCase,
+    TestFacetRollup,
+    TestFacetRollupDelta,
+    test_case_tag,
+)
+from app.memory_allocator.schemas import (
+    AddressRange,
+    CursorPagination,
+    TestFilter,
+    TestPagination,
+)
+
+
+class FacetCounts(NamedTuple):
+    """Matching tests overall, per status, per platform id and per tag (id, name, count)."""
+    total: int
+    statuses: dict[TestStatus, int]
+    platforms: dict[int, int]
+    tags: list[tuple[int, str, int]]
+
+
+def _contains_pattern(value: str) -> str:
+    """LIKE pattern matching `value` anywhere, with its own wildcards taken literally."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class _Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a select, with its parameters bound as usual."""
+    inherit_cache = False
+
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.query, **kw)}"
 
 
 class TestRepository:
@@ -57,6 +120,20 @@ class TestRepository:
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def find_parsed_twin(self, content_sha256: str, exclude_id: int) -> TestCase | None:
+        query = (
+            select(TestCase)
+            .where(
+                TestCase.content_sha256 == content_sha256,
+                TestCase.status == TestStatus.PARSED,
+                TestCase.id != exclude_id,
+            )
+            .order_by(TestCase.id)
+            .limit(1)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
     def add(self, test: TestCase) -> None:
         self.session.add(test)
 
@@ -79,37 +156,320 @@ class TestRepository:
         filters: TestFilter,
         pagination: TestPagination,
         user_id: uuid.UUID
-    ) -> tuple[Sequence[TestCase], int]:
+    ) -> tuple[Sequence[TestCase], bool]:
+        """
+        One page of matching tests, newest first, and whether more tests follow.
+        A cursor seeks on the primary key, whatever the filters.
+        """
+        conditions = self._filter_conditions(filters, user_id)
+        if pagination.after_id is not None:
+            conditions.append(TestCase.id < pagination.after_id)
+        result_query = (
+            select(TestCase)
+            .where(*conditions)
+            .options(
+                selectinload(TestCase.platform),
+                selectinload(TestCase.uploaded_by))
+            .order_by(TestCase.id.desc())
+            .limit(pagination.limit + 1)
+            .offset(pagination.offset)
+        )
+        result = (await self.session.execute(result_query)).scalars().all()
+
+        return result[:pagination.limit], len(result) > pagination.limit
+
+    async def list_overlapping(
+        self,
+        address_range: AddressRange,
+        filters: TestFilter,
+        pagination: CursorPagination,
+        user_id: uuid.UUID
+    ) -> tuple[Sequence[TestCase], bool]:
+        """
+        Test cases with a block or region overlapping the range, newest first, and whether
+        more follow. Twins match through the layout of the test case they duplicate.
+        """
+        conditions = self._filter_conditions(filters, user_id)
+        conditions.append(
+            func.coalesce(TestCase.duplicate_of_id, TestCase.id).in_(
+                self._overlapping_layouts(address_range)
+            )
+        )
+        if pagination.after_id is not None:
+            conditions.append(TestCase.id < pagination.after_id)
+        result = (await self.session.execute(
+            select(TestCase)
+            .where(*conditions)
+            .options(
+                selectinload(TestCase.platform),
+                selectinload(TestCase.uploaded_by))
+            .order_by(TestCase.id.desc())
+            .limit(pagination.limit + 1)
+        )).scalars().all()
+        return result[:pagination.limit], len(result) > pagination.limit
+
+    @staticmethod
+    def _overlapping_layouts(address_range: AddressRange):
+        """Ids of the test cases owning a block or region that overlaps the range."""
+        span = Range(address_range.start, address_range.end)
+        if address_range.space == AddressSpace.PHYSICAL:
+            block_range, region_range = Block.paddr_range, Region.paddr_range
+        else:
+            block_range, region_range = Block.vaddr_range, Region.vaddr_range
+
+        def owners(query: Select) -> Select:
+            # Kernel blocks hang off the module, user blocks off one of its partitions
+            return (
+                query.outerjoin(Partition, Partition.id == Block.partition_id)
+                .join(Module, Module.id == func.coalesce(Block.module_id, Partition.module_id))
+            )
+
+        return union(
+            owners(select(Module.test_id).select_from(Block))
+            .where(block_range.overlaps(span)),
+            owners(select(Module.test_id).select_from(Region)
+                   .join(Block, Block.id == Region.block_id))
+            .where(region_range.overlaps(span)),
+        )
+
+    async def count_filtered(self, filters: TestFilter, user_id: uuid.UUID) -> int:
+        return await self.session.scalar(
+            select(func.count())
+            .select_from(TestCase)
+            .where(*self._filter_conditions(filters, user_id))
+        )
+
+    async def estimate_filtered(self, filters: TestFilter, user_id: uuid.UUID) -> int:
+        """Planner estimate of the number of matching tests; no row is read."""
+        query = select(TestCase.id).where(*self._filter_conditions(filters, user_id))
+        plan = await self.session.scalar(_Explain(query))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def facet_counts(self, filters: TestFilter, user_id: uuid.UUID) -> FacetCounts:
+        """
+        Every facet of the matching tests in one statement: GROUPING SETS over the tests
+        joined with their tags, counting distinct tests so tags do not inflate the others.
+        """
+        by_status = func.grouping(TestCase.status).label("by_status")
+        by_platform = func.grouping(TestCase.platform_id).label("by_platform")
+        by_tag = func.grouping(Tag.id).label("by_tag")
+        query = (
+            select(TestCase.status, TestCase.platform_id, Tag.id, Tag.name,
+                   by_status, by_platform, by_tag, func.count(distinct(TestCase.id)))
+            .select_from(TestCase)
+            .outerjoin(test_case_tag, test_case_tag.c.test_id == TestCase.id)
+            .outerjoin(Tag, Tag.id == test_case_tag.c.tag_id)
+            .where(*self._filter_conditions(filters, user_id))
+            .group_by(func.grouping_sets(
+                tuple_(TestCase.status),
+                tuple_(TestCase.platform_id),
+                tuple_(Tag.id, Tag.name),
+                tuple_(),
+            ))
+        )
+        total = 0
+        statuses: dict[TestStatus, int] = {}
+        platforms: dict[int, int] = {}
+        tags: list[tuple[int, str, int]] = []
+        rows = await self.session.execute(query)
+        for (status, platform_id, tag_id, tag_name,
+             grouped_status, grouped_platform, grouped_tag, count) in rows:
+            if not grouped_status:
+                statuses[status] = count
+            elif not grouped_platform:
+                platforms[platform_id] = count
+            elif not grouped_tag:
+                if tag_id is not None:  # the group of untagged tests
+                    tags.append((tag_id, tag_name, count))
+            else:
+                total = count
+        return FacetCounts(total, statuses, platforms, tags)
+
+    async def rollup_facet_counts(self, filters: TestFilter, user_id: uuid.UUID) -> FacetCounts:
+        """
+        Status and platform facets read from test_facet_rollup plus the deltas not compacted
+        yet, tags counted from the link table. Only valid for filters on statuses and
+        platform_ids.
+        """
+        counts = union_all(
+            select(TestFacetRollup.status, TestFacetRollup.platform_id,
+                   TestFacetRollup.test_count.label("change")),
+            select(TestFacetRollupDelta.status, TestFacetRollupDelta.platform_id,
+                   TestFacetRollupDelta.delta.label("change")),
+        ).subquery()
+        conditions = []
+        if filters.statuses:
+            conditions.append(counts.c.status.in_(filters.statuses))
+        if filters.platform_ids:
+            conditions.append(counts.c.platform_id.in_(filters.platform_ids))
+        test_count = func.sum(counts.c.change)
+        rollup = await self.session.execute(
+            select(counts.c.status, counts.c.platform_id, test_count)
+            .where(*conditions)
+            .group_by(counts.c.status, counts.c.platform_id)
+            .having(test_count > 0)
+        )
+        statuses: Counter[TestStatus] = Counter()
+        platforms: Counter[int] = Counter()
+        for status, platform_id, count in rollup:
+            statuses[status] += count
+            platforms[platform_id] += count
+
+        tag_query = (
+            select(Tag.id, Tag.name, func.count())
+            .select_from(test_case_tag)
+            .join(Tag, Tag.id == test_case_tag.c.tag_id)
+            .group_by(Tag.id, Tag.name)
+        )
+        tag_conditions = self._filter_conditions(filters, user_id)
+        if tag_conditions:
+            tag_query = (tag_query.join(TestCase, TestCase.id == test_case_tag.c.test_id)
+                         .where(*tag_conditions))
+        tags = [tuple(row) for row in await self.session.execute(tag_query)]
+        return FacetCounts(statuses.total(), dict(statuses), dict(platforms), tags)
+
+    async def compact_facet_rollup(self) -> int:
+        """
+        Fold the committed deltas into test_facet_rollup in one statement; deltas appended
+        meanwhile stay for the next run. Returns the number of rollup rows updated.
+        """
+        moved = (
+            delete(TestFacetRollupDelta)
+            .returning(TestFacetRollupDelta.status, TestFacetRollupDelta.platform_id,
+                       TestFacetRollupDelta.delta)
+            .cte("moved")
+        )
+        query = insert(TestFacetRollup).from_select(
+            ["status", "platform_id", "test_count"],
+            select(moved.c.status, moved.c.platform_id, func.sum(moved.c.delta))
+            .group_by(moved.c.status, moved.c.platform_id),
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[TestFacetRollup.status, TestFacetRollup.platform_id],
+            set_={"test_count": TestFacetRollup.test_count + query.excluded.test_count},
+        ).add_cte(moved)
+        result = await self.session.execute(query)
+        return result.rowcount
+
+    async def stream_parsed_artifacts(
+        self,
+        filters: TestFilter,
+        user_id: uuid.UUID,
+        batch_size: int
+    ) -> AsyncIterator[tuple[int, str, TestArtifact]]:
+        """
+        (test id, test name, artifact) of every PARSED test matching the filters, grouped
+        by test. Rows come from a server-side cursor, batch_size at a time.
+        """
+        query = (
+            select(TestCase.id, TestCase.name, TestArtifact)
+            .join(TestArtifact, TestArtifact.test_id == TestCase.id)
+            .where(TestCase.status == TestStatus.PARSED,
+                   *self._filter_conditions(filters, user_id))
+            .order_by(TestCase.id, TestArtifact.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for test_id, test_name, artifact in result:
+            yield test_id, test_name, artifact
+
+    async def stream_layout_rows(
+        self,
+        table: LayoutTable,
+        filters: TestFilter,
+        user_id: uuid.UUID,
+        batch_size: int
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Block or region rows of every PARSED test matching the filters, as plain tuples
+        with the columns of the export schema of the table. A duplicate upload gets the
+        rows of the layout it shares, under its own id. Rows come from a server-side
+        cursor in batches of batch_size, in no particular order.
+        """
+        owner_id = func.coalesce(TestCase.duplicate_of_id, TestCase.id).label("owner_id")
+        tests = (
+            select(TestCase.id, owner_id)
+            .where(TestCase.status == TestStatus.PARSED,
+                   *self._filter_conditions(filters, user_id))
+            .subquery()
+        )
+        if table == LayoutTable.BLOCKS:
+            query = self._layout_block_rows(tests)
+        else:
+            query = self._layout_region_rows(tests)
+        result = await self.session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    def _layout_block_rows(tests) -> Executable:
+        columns = [
+            Block.id.label("block_id"), Block.name, Block.access, Block.align,
+            Block.cache_policy, Block.content_type, Block.init_file, Block.init_stage,
+            Block.init_type, Block.is_contiguous, Block.is_shadow, Block.is_system,
+            Block.no_shadow, Block.vaddr, Block.paddr, Block.size, Block.shadow_offset,
+            Block.shadow_scale, Block.shadow_type, Block.safety_zone_before,
+            Block.safety_zone_after, Block.safety_zone_before_unmapped,
+            Block.safety_zone_after_unmapped,
+        ]
+        return union_all(
+            select(
+                tests.c.id.label("test_id"), Module.id.label("module_id"),
+                Module.name.label("module"), cast(null(), Integer).label("partition_id"),
+                cast(null(), String).label("partition"), cast(null(), Integer).label("space_id"),
+                *columns,
+            )
+            .join_from(tests, Module, Module.test_id == tests.c.owner_id)
+            .join(Block, Block.module_id == Module.id),
+            select(
+                tests.c.id, Module.id, Module.name, Partition.id, Partition.name,
+                Partition.space_id, *columns,
+            )
+            .join_from(tests, Module, Module.test_id == tests.c.owner_id)
+            .join(Partition, Partition.module_id == Module.id)
+            .join(Block, Block.partition_id == Partition.id),
+        )
+
+    @staticmethod
+    def _layout_region_rows(tests) -> Executable:
+        owned_blocks = union_all(
+            select(tests.c.id.label("test_id"), Block.id.label("block_id"))
+            .join_from(tests, Module, Module.test_id == tests.c.owner_id)
+            .join(Block, Block.module_id == Module.id),
+            select(tests.c.id, Block.id)
+            .join_from(tests, Module, Module.test_id == tests.c.owner_id)
+            .join(Partition, Partition.module_id == Module.id)
+            .join(Block, Block.partition_id == Partition.id),
+        ).subquery()
+        return (
+            select(owned_blocks.c.test_id, Region.block_id, Region.id.label("region_id"),
+                   Region.vaddr, Region.paddr, Region.size)
+            .join_from(owned_blocks, Region, Region.block_id == owned_blocks.c.block_id)
+        )
+
+    @staticmethod
+    def _filter_conditions(filters: TestFilter, user_id: uuid.UUID) -> list:
         conditions = []
         if filters.statuses:
             conditions.append(TestCase.status.in_(filters.statuses))
         if filters.name:
-            conditions.append(TestCase.name.ilike(f"%{filters.name}%"))
+            # One bound pattern, without lower(), so the trigram index on name can serve it
+            conditions.append(TestCase.name.ilike(_contains_pattern(filters.name), escape="\\"))
         if filters.platform_ids:
             conditions.append(TestCase.platform_id.in_(filters.platform_ids))
         if filters.tags:
             conditions.append(TestCase.tags.any(Tag.name.in_(filters.tags)))
         if filters.mine:
             conditions.append(TestCase.uploaded_by_id == user_id)
-
-        query_base = select(TestCase).where(*conditions)
-        total = await self.session.scalar(
-            select(func.count())
-            .select_from(TestCase)
-            .where(*conditions)
-        )
-        result_query = (
-            query_base
-            .options(
-                selectinload(TestCase.platform),
-                selectinload(TestCase.uploaded_by))
-            .order_by(TestCase.id.desc())
-            .limit(pagination.limit)
-            .offset(pagination.offset)
-        )
-        result = (await self.session.execute(result_query)).scalars().all()
-
-        return result, total
+        for metric, (low, high) in filters.metric_bounds.items():
+            column = getattr(TestCase, metric)
+            if low is not None:
+                conditions.append(column >= low)
+            if high is not None:
+                conditions.append(column <= high)
+        return conditions
 
     async def find_stale_pending(self, older_than: datetime, limit: int) -> Sequence[TestCase]:
         query = (
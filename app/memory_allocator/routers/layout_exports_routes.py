@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+from app.auth.dependencies import get_current_user
+from app.core.openapi import error
+from app.core.responses import file_response
+from app.memory_allocator.dependencies import get_layout_export_service
+from app.memory_allocator.schemas import (
+    ArtifactFileDomain,
+    ArtifactLinkDomain,
+    LayoutExportRequest,
+    LayoutExportResponse,
+)
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from app.memory_allocator.utils.columnar import MEDIA_TYPES
+from app.users.models import User
+
+router = APIRouter(
+    prefix="/layout-exports",
+    tags=["layout exports"],
+    responses={401: error("Missing, expired or invalid token")},
+)
+
+
+@router.post(
+    "",
+    response_model=LayoutExportResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Request a columnar export of layout rows",
+    description=(
+        "Queues a job writing the same rows as `GET /tests/layout/export` to a file in the "
+        "storage. Poll `GET /layout-exports/{export_id}` until it is `completed`, then "
+        "download it from `GET /layout-exports/{export_id}/file`."
+    ),
+    responses={422: error("Request validation failed")},
+)
+async def request_export(
+    request: LayoutExportRequest,
+    service: LayoutExportService = Depends(get_layout_export_service),
+    current_user: User = Depends(get_current_user),
+) -> LayoutExportResponse:
+    export = await service.request_export(request, current_user)
+    return LayoutExportResponse.model_validate(export)
+
+
+@router.get(
+    "/{export_id}",
+    response_model=LayoutExportResponse,
+    summary="Get a layout export job by id",
+    description="Only the user who requested the export can see it.",
+    responses={
+        404: error("Layout export not found"),
+        422: error("Request validation failed"),
+    },
+)
+async def get_export(
+    export_id: int,
+    service: LayoutExportService = Depends(get_layout_export_service),
+    current_user: User = Depends(get_current_user),
+) -> LayoutExportResponse:
+    export = await service.get(export_id, current_user)
+    return LayoutExportResponse.model_validate(export)
+
+
+@router.get(
+    "/{export_id}/file",
+    response_model=None,
+    response_class=StreamingResponse,
+    summary="Download the file of a completed layout export",
+    description=(
+        "Answers `302` with a presigned link on an object storage backend and sends the "
+        "file on the local one, with `ETag`, `Last-Modified` and `Range` support."
+    ),
+    responses={
+        200: {
+            "description": "Arrow IPC stream or Parquet file",
+            "content": {media_type: {} for media_type in MEDIA_TYPES.values()},
+        },
+        302: {
+            "description": "Redirect to a presigned link of the file",
+            "headers": {
+                "Location": {"description": "Presigned link", "schema": {"type": "string"}}
+            },
+        },
+        404: error("Layout export not found"),
+        409: error("Layout export is not completed yet"),
+        422: error("Request validation failed"),
+    },
+)
+async def download_export(
+    export_id: int,
+    request: Request,
+    service: LayoutExportService = Depends(get_layout_export_service),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    export = await service.get(export_id, current_user)
+    file = await service.download(export_id, current_user)
+    media_type = MEDIA_TYPES[export.format]
+    if isinstance(file, ArtifactLinkDomain):
+        return RedirectResponse(file.url, status_code=status.HTTP_302_FOUND)
+    if isinstance(file, ArtifactFileDomain):
+        return await file_response(request, file.path, file.filename, media_type)
+    return StreamingResponse(
+        file.chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file.filename}"'},
+    )
@@ -1,27 +1,36 @@
-import io
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, Query, Response, UploadFile, status
+from fastapi import APIRouter, Depends, File, Query, Request, Response, UploadFile, status
 from fastapi.responses import RedirectResponse, StreamingResponse
 
 from app.auth.dependencies import get_current_user
 from app.core.openapi import error
+from app.core.responses import file_response
 from app.memory_allocator.dependencies import (
     get_export_service,
     get_ingestion_service,
+    get_layout_export_service,
     get_test_service,
     get_validation_service,
 )
 from app.memory_allocator.schemas import (
+    ArtifactFileDomain,
     ArtifactLinkDomain,
+    LayoutExportRequest,
     PaginatedTestsResponse,
+    TestFacetsResponse,
+    TestFilter,
+    TestLayoutResponse,
     TestListQuery,
+    TestOverlapQuery,
     TestPagination,
     TestResponse,
     ValidationResponse,
 )
 from app.memory_allocator.services import IngestionService, TestcaseService, ValidationService
 from app.memory_allocator.services.export_service import ExportService
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from app.memory_allocator.utils.columnar import MEDIA_TYPES
 from app.users.models import User
 
 router = APIRouter(
@@ -40,7 +49,15 @@ router = APIRouter(
         "values combine as OR: `?statuses=PARSED&statuses=ERROR` returns test cases in "
         "either status. `name` matches a case-insensitive substring, `mine` limits the "
         "result to the test cases uploaded by the current user. "
-        "`total` counts every match of the filters, ignoring `limit` and `offset`."
+        "`total` counts every match of the filters, ignoring `limit` and `offset`; pass "
+        "`include_total=false` to skip the count, `total` is then null. `total_mode` picks "
+        "how the total is produced: `exact` counts the matches, `cached` reuses a total "
+        "counted for the same filters until a test case changes status (a miss counts and "
+        "reports `exact`), `estimated` takes the query planner's estimate. The response "
+        "tells which mode produced `total`. "
+        "Test cases come newest first. For deep pages prefer `after` over `offset`: pass "
+        "the `next_cursor` of the previous page and the listing seeks straight past it. "
+        "`next_cursor` is null on the last page."
     ),
     responses={
         422: error("Request validation failed"),
@@ -51,13 +68,152 @@ async def list_all(
     service: TestcaseService = Depends(get_test_service),
     current_user: User = Depends(get_current_user),
 ) -> PaginatedTestsResponse:
-    pagination = TestPagination(limit=query.limit, offset=query.offset)
-    tests, total = await service.list_tests(query, pagination, current_user)
+    pagination = TestPagination(
+        limit=query.limit,
+        offset=query.offset,
+        after=query.after,
+        include_total=query.include_total,
+        total_mode=query.total_mode,
+    )
+    page = await service.list_tests(query, pagination, current_user)
     return PaginatedTestsResponse(
-        tests=[TestResponse.model_validate(t) for t in tests],
-        total=total,
+        tests=[TestResponse.model_validate(t) for t in page.tests],
+        total=page.total,
+        total_mode=page.total_mode,
         limit=pagination.limit,
-        offset=pagination.offset
+        offset=pagination.offset,
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get(
+    "/facets",
+    response_model=TestFacetsResponse,
+    summary="Count test cases per status, platform and tag",
+    description=(
+        "Takes the same filters as `GET /tests` and returns every count a filter sidebar "
+        "needs in one response: the total and the number of matching test cases per "
+        "status, platform and tag. Values with no match are left out. A test case with "
+        "several tags counts once under each of them, so tag counts may add up to more "
+        "than `total`. `source` tells whether the counts were computed from the test "
+        "cases (`query`) or read from the per status and platform totals (`rollup`), "
+        "which serve requests filtering on nothing but `statuses` and `platform_ids`."
+    ),
+    responses={
+        422: error("Request validation failed"),
+    },
+)
+async def facets(
+    query: Annotated[TestFilter, Query()],
+    service: TestcaseService = Depends(get_test_service),
+    current_user: User = Depends(get_current_user),
+) -> TestFacetsResponse:
+    facet_counts = await service.facets(query, current_user)
+    return TestFacetsResponse.model_validate(facet_counts.model_dump())
+
+
+@router.get(
+    "/overlaps",
+    response_model=PaginatedTestsResponse,
+    summary="Find test cases by address range",
+    description=(
+        "Test cases with at least one block or region overlapping the half-open range "
+        "`[start, end)` of the `physical` (`paddr`) or `virtual` (`vaddr`) address space. "
+        "Blocks without an address or size never match. Takes the same filters as "
+        "`GET /tests`. Test cases come newest first, paged by `after` only: pass the "
+        "`next_cursor` of the previous page, it is null on the last one. `total` is "
+        "always null."
+    ),
+    responses={
+        422: error("Request validation failed, or `end` is not above `start`"),
+    },
+)
+async def list_overlapping(
+    query: Annotated[TestOverlapQuery, Query()],
+    service: TestcaseService = Depends(get_test_service),
+    current_user: User = Depends(get_current_user),
+) -> PaginatedTestsResponse:
+    page = await service.list_overlapping(query, query, query, current_user)
+    return PaginatedTestsResponse(
+        tests=[TestResponse.model_validate(t) for t in page.tests],
+        total=None,
+        limit=query.limit,
+        offset=0,
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Download many test cases as one zip archive",
+    description=(
+        "Takes the same filters as `GET /tests` and streams a single archive with one "
+        "`<test id>-<test name>/` directory per matching test case. Only `PARSED` test "
+        "cases are included; artifacts missing from the storage are skipped."
+    ),
+    responses={
+        200: {
+            "description": "Zip archive with the artifacts of every matching test case",
+            "content": {"application/zip": {}},
+            "headers": {
+                "Content-Disposition": {
+                    "description": 'attachment; filename="tests.zip"',
+                    "schema": {"type": "string"},
+                }
+            },
+        },
+        422: error("Request validation failed"),
+    },
+)
+async def export_many(
+    query: Annotated[TestFilter, Query()],
+    service: ExportService = Depends(get_export_service),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    chunks = await service.export_many(query, current_user)
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="tests.zip"'},
+    )
+
+
+@router.get(
+    "/layout/export",
+    response_class=StreamingResponse,
+    summary="Download the layout rows of many test cases as Arrow or Parquet",
+    description=(
+        "Takes the same filters as `GET /tests` and streams one row per block, or per "
+        "region, of every matching `PARSED` test case as an Arrow IPC stream or a Parquet "
+        "file, written one record batch at a time while the rows are read. Rows come in "
+        "no particular order; a duplicate upload gets the rows of the layout it shares. "
+        "For very large sets, `POST /layout-exports` writes the file in the background."
+    ),
+    responses={
+        200: {
+            "description": "Block or region rows of every matching test case",
+            "content": {media_type: {} for media_type in MEDIA_TYPES.values()},
+            "headers": {
+                "Content-Disposition": {
+                    "description": 'attachment; filename="<table>.<arrows|parquet>"',
+                    "schema": {"type": "string"},
+                }
+            },
+        },
+        422: error("Request validation failed"),
+    },
+)
+async def export_layouts(
+    query: Annotated[LayoutExportRequest, Query()],
+    service: LayoutExportService = Depends(get_layout_export_service),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    export = await service.stream(query, current_user)
+    return StreamingResponse(
+        export.chunks,
+        media_type=MEDIA_TYPES[query.format],
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
     )
 
 
@@ -138,6 +294,31 @@ async def get_test_by_id(
     return TestResponse.model_validate(test)
 
 
+@router.get(
+    "/{test_id}/layout",
+    response_model=None,
+    response_class=StreamingResponse,
+    summary="Get the memory layout of a test case",
+    description=(
+        "Modules with their kernel blocks and partitions, partitions with their blocks, "
+        "blocks with their regions. Built from a fixed number of queries and streamed "
+        "while it is read, so large layouts neither wait nor sit in memory as a whole."
+    ),
+    responses={
+        200: {"model": TestLayoutResponse, "description": "Layout tree of the test case"},
+        404: error("Test case not found"),
+        422: error("Request validation failed"),
+    },
+)
+async def get_layout(
+    test_id: int,
+    service: TestcaseService = Depends(get_test_service),
+    _: User = Depends(get_current_user),
+) -> StreamingResponse:
+    chunks = await service.layout(test_id)
+    return StreamingResponse(chunks, media_type="application/json")
+
+
 @router.get(
     "/{test_id}/validations",
     response_model=list[ValidationResponse],
@@ -200,11 +381,16 @@ async def detach_tag(
 
 @router.get(
     "/{test_id}/export",
+    response_model=None,
     response_class=StreamingResponse,
     summary="Download a test case as a zip archive",
     description=(
         "The archive is rebuilt from the stored artifacts — the originally uploaded zip "
-        "is deleted once parsing succeeds. Artifacts missing from the storage are skipped."
+        "is deleted once parsing succeeds — and streamed while it is being built, so no "
+        "`Content-Length` is sent. Artifacts missing from the storage are skipped. "
+        "Built archives are cached per artifact set: a repeated export answers `302` with "
+        "a presigned link on an object storage backend and sends the cached file on the "
+        "local one, with `ETag`, `Last-Modified` and `Range` support."
     ),
     responses={
         200: {
@@ -217,6 +403,12 @@ async def detach_tag(
                 }
             },
         },
+        302: {
+            "description": "Redirect to a presigned link of the cached archive",
+            "headers": {
+                "Location": {"description": "Presigned link", "schema": {"type": "string"}}
+            },
+        },
         404: error("Test case not found"),
         409: error("Test case is not PARSED — there is nothing to export"),
         422: error("Request validation failed"),
@@ -224,14 +416,19 @@ async def detach_tag(
 )
 async def export_testcase(
     test_id: int,
+    request: Request,
     service: ExportService = Depends(get_export_service),
     _: User = Depends(get_current_user),
-) -> StreamingResponse:
-    buffer, filename = await service.export_test(test_id)
+) -> Response:
+    archive = await service.export_test(test_id)
+    if isinstance(archive, ArtifactLinkDomain):
+        return RedirectResponse(archive.url, status_code=status.HTTP_302_FOUND)
+    if isinstance(archive, ArtifactFileDomain):
+        return await file_response(request, archive.path, archive.filename, "application/zip")
     return StreamingResponse(
-        buffer,
+        archive.chunks,
         media_type="application/zip",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={"Content-Disposition": f'attachment; filename="{archive.filename}"'},
     )
 
 
@@ -242,8 +439,11 @@ async def export_testcase(
     summary="Download a single artifact",
     description=(
         "With an object storage backend the endpoint answers `302` with a presigned link; "
-        "with the local backend it streams the bytes itself. Follow redirects (`curl -L`); "
-        "the presigned link needs no application token and expires on its own."
+        "with the local backend it sends the file itself. Follow redirects (`curl -L`); "
+        "the presigned link needs no application token and expires on its own. "
+        "Local files come with a strong `ETag` and `Last-Modified`: `If-None-Match` and "
+        "`If-Modified-Since` answer `304`, and `Range` requests (e.g. to tail a log) "
+        "answer `206` with the requested bytes only."
     ),
     responses={
         200: {
@@ -253,9 +453,14 @@ async def export_testcase(
                 "Content-Disposition": {
                     "description": 'attachment; filename="<artifact name>"',
                     "schema": {"type": "string"},
-                }
+                },
+                "ETag": {"description": "Strong entity tag", "schema": {"type": "string"}},
             },
         },
+        206: {
+            "description": "Requested byte ranges of the artifact (local storage backend)",
+            "content": {"application/octet-stream": {}},
+        },
         302: {
             "description": "Redirect to a presigned storage link (object storage backend)",
             "headers": {
@@ -265,24 +470,31 @@ async def export_testcase(
                 }
             },
         },
+        304: {"description": "The cached copy of the client is still current"},
         404: error(
             "Artifact not found, belongs to another test case, "
             "or is missing from the storage"
         ),
+        416: {"description": "The requested range lies outside the artifact"},
         422: error("Request validation failed"),
     },
 )
 async def download_artifact(
     test_id: int,
     artifact_id: int,
+    request: Request,
     service: ExportService = Depends(get_export_service),
     _: User = Depends(get_current_user),
-) -> RedirectResponse | StreamingResponse:
+) -> Response:
     artifact = await service.artifact_download(test_id, artifact_id)
     if isinstance(artifact, ArtifactLinkDomain):
         return RedirectResponse(artifact.url, status_code=status.HTTP_302_FOUND)
+    if isinstance(artifact, ArtifactFileDomain):
+        return await file_response(
+            request, artifact.path, artifact.filename, "application/octet-stream"
+        )
     return StreamingResponse(
-        io.BytesIO(artifact.content),
+        artifact.chunks,
         media_type="application/octet-stream",
         headers={"Content-Disposition": f'attachment; filename="{artifact.filename}"'},
     )
@@ -1,10 +1,25 @@
 import uuid
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator
 
-from app.memory_allocator.enums import TestStatus, ValidationStatus
+from app.memory_allocator.enums import (
+    AddressSpace,
+    ColumnarFormat,
+    FacetSource,
+    LayoutExportStatus,
+    LayoutTable,
+    MemoryMetric,
+    TestStatus,
+    TotalMode,
+    ValidationStatus,
+)
+from app.memory_allocator.utils.cursor import decode_cursor
+
+MAX_ADDRESS = (1 << 63) - 1  # addresses are stored as bigint
 
 
 class PlatformDomain(BaseModel):
@@ -54,6 +69,25 @@ class TestReadBase(BaseModel):
     user_entry_count: int = Field(
         ..., description="Number of user mapping entries; zero until the archive is parsed"
     )
+    mapped_bytes: int = Field(..., description="Total size of all blocks")
+    readable_bytes: int = Field(..., description="Total size of the readable blocks")
+    writable_bytes: int = Field(..., description="Total size of the writable blocks")
+    executable_bytes: int = Field(..., description="Total size of the executable blocks")
+    uncached_bytes: int = Field(
+        ...,
+        description=(
+            "Total size of the blocks with a cache policy other than DEFAULT, "
+            "all such policies summed together"
+        ),
+    )
+    shadow_bytes: int = Field(..., description="Total size of the shadow blocks")
+    largest_contiguous_bytes: int = Field(
+        ...,
+        description=(
+            "Size of the largest single block flagged contiguous; "
+            "adjacent blocks are not merged into one span"
+        ),
+    )
 
 
 class TestDomain(TestReadBase):
@@ -129,12 +163,20 @@ class ArtifactLinkDomain(BaseModel):
     url: str = Field(..., description="Presigned url")
 
 
-class ArtifactContentDomain(BaseModel):
-    """Artifact handed over as bytes."""
+class ArtifactFileDomain(BaseModel):
+    """Artifact handed over as a file on the local disk."""
     model_config = ConfigDict(frozen=True)
 
     filename: str = Field(..., description="Name of the file")
-    content: bytes = Field(..., description="Artifact content")
+    path: Path = Field(..., description="Location of the file")
+
+
+class ArtifactContentDomain(BaseModel):
+    """Artifact handed over as a stream of byte chunks."""
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    filename: str = Field(..., description="Name of the file")
+    chunks: AsyncIterator[bytes] = Field(..., description="Artifact content")
 
 
 class TagCreate(BaseModel):
@@ -159,6 +201,44 @@ class TestFilter(BaseModel):
         None, description="Related tags", examples=[["regression", "mips"]]
     )
     mine: bool = Field(False, description="Test cases uploaded by me")
+    min_mapped_bytes: int | None = Field(None, ge=0, description="Least mapped bytes")
+    max_mapped_bytes: int | None = Field(None, ge=0, description="Most mapped bytes")
+    min_readable_bytes: int | None = Field(None, ge=0, description="Least readable bytes")
+    max_readable_bytes: int | None = Field(None, ge=0, description="Most readable bytes")
+    min_writable_bytes: int | None = Field(None, ge=0, description="Least writable bytes")
+    max_writable_bytes: int | None = Field(None, ge=0, description="Most writable bytes")
+    min_executable_bytes: int | None = Field(None, ge=0, description="Least executable bytes")
+    max_executable_bytes: int | None = Field(None, ge=0, description="Most executable bytes")
+    min_uncached_bytes: int | None = Field(
+        None, ge=0, description="Least uncached bytes (any non-DEFAULT cache policy)"
+    )
+    max_uncached_bytes: int | None = Field(
+        None, ge=0, description="Most uncached bytes (any non-DEFAULT cache policy)"
+    )
+    min_shadow_bytes: int | None = Field(None, ge=0, description="Least shadow bytes")
+    max_shadow_bytes: int | None = Field(None, ge=0, description="Most shadow bytes")
+    min_largest_contiguous_bytes: int | None = Field(
+        None, ge=0, description="Least size of the largest single contiguous block"
+    )
+    max_largest_contiguous_bytes: int | None = Field(
+        None, ge=0, description="Most size of the largest single contiguous block"
+    )
+
+    @model_validator(mode="after")
+    def _check_metric_bounds(self) -> "TestFilter":
+        for metric, (low, high) in self.metric_bounds.items():
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"min_{metric} must not exceed max_{metric}")
+        return self
+
+    @property
+    def metric_bounds(self) -> dict[MemoryMetric, tuple[int | None, int | None]]:
+        """Inclusive (min, max) bounds of the memory metrics filtered on."""
+        bounds = {
+            metric: (getattr(self, f"min_{metric}"), getattr(self, f"max_{metric}"))
+            for metric in MemoryMetric
+        }
+        return {metric: pair for metric, pair in bounds.items() if pair != (None, None)}
 
 
 class Pagination(BaseModel):
@@ -167,8 +247,45 @@ class Pagination(BaseModel):
     offset: int = Field(0, ge=0, description="Number of items to skip")
 
 
-class TestPagination(Pagination):
-    """Page window of a test case listing."""
+class CursorPagination(BaseModel):
+    """
+    Keyset page window over test cases, newest first. `after` seeks past the last test
+    case of the previous page, so deep pages cost as much as the first one.
+    """
+    limit: int = Field(100, ge=1, le=200, description="Maximum number of items to return")
+    after: str | None = Field(
+        None, description="Opaque cursor, the `next_cursor` of the previous page"
+    )
+
+    @field_validator("after")
+    @classmethod
+    def _check_cursor(cls, value: str | None) -> str | None:
+        if value is not None:
+            decode_cursor(value)
+        return value
+
+    @property
+    def after_id(self) -> int | None:
+        return decode_cursor(self.after) if self.after is not None else None
+
+
+class TestPagination(Pagination, CursorPagination):
+    """
+    Page window of a test case listing: either `after` or `offset`, which skips rows and
+    gets slower the deeper the page.
+    """
+    include_total: bool = Field(
+        True, description="Count every match of the filters; pass false to skip the count"
+    )
+    total_mode: TotalMode | None = Field(
+        None, description="How to produce `total`; the server default when omitted"
+    )
+
+    @model_validator(mode="after")
+    def _check_window(self) -> "TestPagination":
+        if self.after is not None and self.offset:
+            raise ValueError("offset cannot be combined with after")
+        return self
 
 
 class DeadLetterPagination(Pagination):
@@ -179,12 +296,179 @@ class TestListQuery(TestFilter, TestPagination):
     """Filters and page window of a test case listing."""
 
 
+class AddressRange(BaseModel):
+    """Half-open address range `[start, end)` in one address space."""
+    space: AddressSpace = Field(
+        AddressSpace.PHYSICAL, description="Match block and region `paddr` or `vaddr`"
+    )
+    start: int = Field(..., ge=0, le=MAX_ADDRESS, description="First address of the range")
+    end: int = Field(..., ge=1, le=MAX_ADDRESS, description="Address right after the range")
+
+    @model_validator(mode="after")
+    def _check_bounds(self) -> "AddressRange":
+        if self.end <= self.start:
+            raise ValueError("end must be greater than start")
+        return self
+
+
+class TestOverlapQuery(AddressRange, TestFilter, CursorPagination):
+    """Address range, filters and page window of an overlap search."""
+
+
+class TestPageDomain(BaseModel):
+    """Service-layer page of a test case listing."""
+    tests: list[TestDomain]
+    total: int | None
+    total_mode: TotalMode | None
+    next_cursor: str | None
+
+
 class PaginatedTestsResponse(BaseModel):
     """One page of test cases. `total` counts every match of the filters, ignoring the window."""
     tests: list[TestResponse] = Field(..., description="Tests matching filtering")
-    total: int = Field(..., description="Total amount of tests matching the filters")
+    total: int | None = Field(
+        ..., description="Total amount of tests matching the filters, null when not requested"
+    )
+    total_mode: TotalMode | None = Field(
+        None, description="How `total` was produced; an estimate is approximate"
+    )
     limit: int = Field(100, ge=1, le=200, description="Maximum number of items returned")
     offset: int = Field(0, ge=0, description="Number of items skipped")
+    next_cursor: str | None = Field(
+        None, description="Pass as `after` to get the next page, null on the last page"
+    )
+
+
+class StatusFacet(BaseModel):
+    status: TestStatus = Field(..., description="Status of the test cases")
+    count: int = Field(..., description="Matching test cases in this status")
+
+
+class PlatformFacet(BaseModel):
+    platform_id: int = Field(..., description="Platform unique identifier")
+    count: int = Field(..., description="Matching test cases on this platform")
+
+
+class TagFacet(BaseModel):
+    tag_id: int = Field(..., description="Tag unique identifier")
+    name: str = Field(..., description="Tag name")
+    count: int = Field(..., description="Matching test cases with this tag")
+
+
+class TestFacetsDomain(BaseModel):
+    """Service-layer facet counts of a test case listing."""
+    total: int
+    statuses: list[StatusFacet]
+    platforms: list[PlatformFacet]
+    tags: list[TagFacet]
+    source: FacetSource
+
+
+class TestFacetsResponse(BaseModel):
+    """
+    Counts of the test cases matching the filters, overall and per status, platform and
+    tag. A test case with several tags counts once under each of them.
+    """
+    total: int = Field(..., description="Amount of tests matching the filters")
+    statuses: list[StatusFacet] = Field(..., description="Non-empty statuses, most tests first")
+    platforms: list[PlatformFacet] = Field(
+        ..., description="Non-empty platforms, most tests first"
+    )
+    tags: list[TagFacet] = Field(..., description="Non-empty tags, most tests first")
+    source: FacetSource = Field(
+        ..., description="`query` when counted from the tests, `rollup` when read from totals"
+    )
+
+
+class RegionLayout(BaseModel):
+    id: int = Field(..., description="Region unique identifier")
+    vaddr: int = Field(..., description="Virtual address")
+    paddr: int = Field(..., description="Physical address")
+    size: int = Field(..., description="Size in bytes")
+
+
+class BlockLayout(BaseModel):
+    id: int = Field(..., description="Block unique identifier")
+    name: str = Field(..., description="Block name")
+    access: str
+    align: int
+    cache_policy: str
+    content_type: str | None
+    init_file: str | None
+    init_stage: str | None
+    init_type: str | None
+    is_contiguous: bool
+    is_shadow: bool
+    is_system: bool
+    no_shadow: bool
+    vaddr: int | None = Field(..., description="Virtual address, null when not placed")
+    paddr: int | None = Field(..., description="Physical address, null when not placed")
+    size: int | None = Field(..., description="Size in bytes")
+    shadow_offset: int | None
+    shadow_scale: int | None
+    shadow_type: str | None
+    safety_zone_before: int
+    safety_zone_after: int
+    safety_zone_before_unmapped: bool
+    safety_zone_after_unmapped: bool
+    regions: list[RegionLayout] = Field(..., description="Regions of the block by id")
+
+
+class PartitionLayout(BaseModel):
+    id: int = Field(..., description="Partition unique identifier")
+    name: str = Field(..., description="Partition name")
+    space_id: int = Field(..., description="Address space of the partition")
+    blocks: list[BlockLayout] = Field(..., description="Blocks of the partition by id")
+
+
+class ModuleLayout(BaseModel):
+    id: int = Field(..., description="Module unique identifier")
+    name: str = Field(..., description="Module name")
+    address_space_base: int | None
+    kernel_blocks: list[BlockLayout] = Field(..., description="Kernel blocks by id")
+    partitions: list[PartitionLayout] = Field(..., description="Partitions by id")
+
+
+class TestLayoutResponse(BaseModel):
+    """
+    Memory layout of a test case as parsed from its YAML. Empty until the test case is
+    PARSED; a duplicate upload shows the layout of the test case it duplicates.
+    """
+    test_id: int = Field(..., description="Test unique identifier")
+    modules: list[ModuleLayout] = Field(..., description="Modules by id")
+
+
+class LayoutExportRequest(TestFilter):
+    """Which layout rows of which test cases to export, and in what format."""
+    table: LayoutTable = Field(
+        LayoutTable.BLOCKS, description="`blocks` for a row per block, `regions` per region"
+    )
+    format: ColumnarFormat = Field(
+        ColumnarFormat.ARROW, description="`arrow` for an Arrow IPC stream, or `parquet`"
+    )
+
+
+class LayoutExportReadBase(BaseModel):
+    """Fields every representation of a layout export job exposes."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="Unique layout export identifier")
+    status: LayoutExportStatus = Field(..., description="Status of the export job")
+    table: LayoutTable = Field(..., description="Exported layout rows")
+    format: ColumnarFormat = Field(..., description="File format")
+    filters: TestFilter = Field(..., description="Filters selecting the exported test cases")
+    row_count: int | None = Field(None, description="Rows written, once completed")
+    size_bytes: int | None = Field(None, description="File size, once completed")
+    requested_at: datetime = Field(..., description="When the export was requested")
+    finished_at: datetime | None = Field(None, description="When the export job ended")
+
+
+class LayoutExportDomain(LayoutExportReadBase):
+    """Service-layer layout export model."""
+
+
+class LayoutExportResponse(LayoutExportDomain):
+    """One export job. The file can be downloaded once it is COMPLETED."""
 
 
 class TestStatusEvent(BaseModel):
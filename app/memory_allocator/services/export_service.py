@@ -1,7 +1,12 @@
-import io
+import asyncio
+import datetime
+import hashlib
 import logging
 import time
-import zipfile
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from contextlib import AsyncExitStack
+from typing import NamedTuple
 
 from app.core.config import get_settings
 from app.core.storage import StorageBackend
@@ -13,19 +18,58 @@ from app.memory_allocator.exceptions import (
     StorageKeyNotFoundError,
     TestNotFoundError,
 )
-from app.memory_allocator.schemas import ArtifactContentDomain, ArtifactLinkDomain
+from app.memory_allocator.models import ExportArchive, TestArtifact
+from app.memory_allocator.schemas import (
+    ArtifactContentDomain,
+    ArtifactFileDomain,
+    ArtifactLinkDomain,
+    TestFilter,
+)
+from app.memory_allocator.utils.zipstream import ZipStreamWriter
+from app.users.models import User
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+EXPORT_CURSOR_BATCH_SIZE = 500
+EXPORT_FORMAT_VERSION = "1"  # bump when the archive layout changes to invalidate the cache
+
+
+class _Fetched(NamedTuple):
+    content: bytes
+    precompressed: bool
+
+
+class _Pending(NamedTuple):
+    test_id: int
+    path: str
+    artifact: TestArtifact
+    fetch: asyncio.Task[_Fetched | None] | None  # None: streamed when its turn comes
+    reserved_bytes: int
+
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
 
 class ExportService:
-    def __init__(self, uow: UnitOfWork, storage: StorageBackend):
+    def __init__(self, uow: UnitOfWork, storage: StorageBackend, fetch_concurrency: int = 4,
+                 cache_max_bytes: int | None = None, prefetch_max_bytes: int = 64 * 1024 ** 2):
         self.uow = uow
         self.storage = storage
+        self.fetch_concurrency = fetch_concurrency
+        self.cache_max_bytes = cache_max_bytes
+        self.prefetch_max_bytes = prefetch_max_bytes
 
-    async def export_test(self, test_id: int) -> tuple[io.BytesIO, str]:
-        started_at = time.monotonic()
+    async def export_test(
+        self,
+        test_id: int
+    ) -> ArtifactLinkDomain | ArtifactFileDomain | ArtifactContentDomain:
+        """
+        Serve the cached archive of the current artifact set when there is one. Otherwise
+        build it lazily: each artifact is read and zipped only while the previous chunks are
+        sent, and with the cache enabled the same bytes are written to the storage.
+        """
         test = await self.uow.tests.find_by_id(test_id)
         if test is None:
             raise TestNotFoundError(test_id)
@@ -34,32 +78,265 @@ class ExportService:
             raise ExportNotAvailableError(test_id)
 
         artifacts = await self.uow.artifacts.list_by_test(test_id)
+        filename = f"{test.name}.zip"
+        if self.cache_max_bytes is None:
+            return ArtifactContentDomain(
+                filename=filename, chunks=self._stream_archive(test.id, artifacts)
+            )
+
+        storage_key = self._archive_key(test.id, artifacts)
+        cached = await self.uow.export_archives.find_by_key(storage_key)
+        if cached is not None and await self.storage.exists(storage_key):
+            cached.last_used_at = datetime.datetime.now(datetime.UTC)
+            await self.uow.commit()
+            logger.info("export.cache_hit", extra={"test_id": test.id, "storage_key": storage_key})
+            return await self._cached_archive(storage_key, filename)
+        return ArtifactContentDomain(
+            filename=filename, chunks=self._stream_and_cache(test.id, artifacts, storage_key)
+        )
+
+    @staticmethod
+    def _archive_key(test_id: int, artifacts: Sequence[TestArtifact]) -> str:
+        # Artifacts are immutable, so their ids and keys identify the archive content
+        digest = hashlib.sha256(EXPORT_FORMAT_VERSION.encode())
+        for a in sorted(artifacts, key=lambda a: a.id):
+            digest.update(f"\n{a.id}:{a.filename}:{a.storage_key}".encode())
+        return f"exports/{test_id}/{digest.hexdigest()}.zip"
+
+    async def _cached_archive(
+        self,
+        storage_key: str,
+        filename: str
+    ) -> ArtifactLinkDomain | ArtifactFileDomain | ArtifactContentDomain:
+        url = await self.storage.presigned_url(
+            storage_key, settings.S3_PRESIGN_TTL_SECONDS, filename=filename
+        )
+        if url is not None:
+            return ArtifactLinkDomain(filename=filename, url=url)
+        path = self.storage.local_path(storage_key)
+        if path is not None:
+            return ArtifactFileDomain(filename=filename, path=path)
+        return ArtifactContentDomain(filename=filename, chunks=self._stream(storage_key))
+
+    async def _stream_and_cache(
+        self,
+        test_id: int,
+        artifacts: Sequence[TestArtifact],
+        storage_key: str
+    ) -> AsyncIterator[bytes]:
+        missing: list[str] = []
+        size_bytes = 0
+        # A client that disconnects closes the generator, which aborts the cache write
+        async with self.storage.open_write(storage_key) as cache:
+            async for chunk in self._stream_archive(test_id, artifacts, missing):
+                await cache.write(chunk)
+                size_bytes += len(chunk)
+                yield chunk
+        if missing:
+            await self.storage.delete_many([storage_key])
+            return
+        try:
+            await self._register_archive(test_id, storage_key, size_bytes)
+        except Exception as exc:
+            # The client has every byte by now: cache bookkeeping, e.g. losing the insert
+            # race to a simultaneous export, must not cut the download short
+            await self.uow.rollback()
+            logger.warning("export.cache_register_failed", extra={
+                "test_id": test_id,
+                "storage_key": storage_key,
+                "error": str(exc),
+            })
+
+    async def _register_archive(self, test_id: int, storage_key: str, size_bytes: int) -> None:
+        """Record a stored archive, drop older archives of the test and evict down to the cap."""
+        now = datetime.datetime.now(datetime.UTC)
+        archive = await self.uow.export_archives.find_by_key(storage_key)
+        if archive is None:
+            archive = ExportArchive(test_id=test_id, storage_key=storage_key)
+            self.uow.export_archives.add(archive)
+        archive.size_bytes = size_bytes
+        archive.last_used_at = now
+
+        stale = [a for a in await self.uow.export_archives.list_by_test(test_id)
+                 if a.storage_key != storage_key]
+        await self.uow.flush()
+        excess = await self.uow.export_archives.total_size() - self.cache_max_bytes
+        evicted = await self.uow.export_archives.least_recently_used(excess) if excess > 0 else []
+        dropped = {a.id: a for a in [*stale, *evicted]}.values()
+        if dropped:
+            await self.storage.delete_many([a.storage_key for a in dropped])
+            await self.uow.export_archives.delete_many([a.id for a in dropped])
+        await self.uow.commit()
+        logger.info("export.cached", extra={
+            "test_id": test_id,
+            "storage_key": storage_key,
+            "size_bytes": size_bytes,
+            "evicted_count": len(dropped),
+        })
 
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            for a in artifacts:
+    async def _stream_archive(
+        self,
+        test_id: int,
+        artifacts: Sequence[TestArtifact],
+        missing: list[str] | None = None
+    ) -> AsyncIterator[bytes]:
+        started_at = time.monotonic()
+        writer = ZipStreamWriter()
+        for a in artifacts:
+            async for chunk in self._zip_artifact(writer, test_id, a.filename, a, missing):
+                yield chunk
+        yield writer.finish()
+        logger.info("test.exported", extra={
+            "test_id": test_id,
+            "artifact_count": len(artifacts),
+            "size_bytes": writer.bytes_written,
+            "duration_ms": round((time.monotonic() - started_at) * 1000)
+        })
+
+    async def _zip_artifact(
+        self,
+        writer: ZipStreamWriter,
+        test_id: int,
+        path: str,
+        artifact: TestArtifact,
+        missing: list[str] | None
+    ) -> AsyncIterator[bytes]:
+        """Splice the stored deflate stream when there is one, else compress the content."""
+        date_time = artifact.created_at.timetuple()
+        if artifact.deflate_storage_key is not None:
+            async with AsyncExitStack() as stack:
                 try:
-                    content = await self.storage.load(a.storage_key)
-                    zf.writestr(a.filename, content)
+                    reader = await stack.enter_async_context(
+                        self.storage.open_read(artifact.deflate_storage_key)
+                    )
                 except KeyError:
-                    logger.warning("export.artifact_missing", extra={
-                        "test_id": test.id,
-                        "storage_key": str(a.storage_key)
+                    logger.warning("export.precompressed_missing", extra={
+                        "test_id": test_id,
+                        "storage_key": str(artifact.deflate_storage_key)
                     })
-        buf.seek(0)
-        logger.info("test.exported", extra={
-            "test_id": test.id,
-            "artifact_count": len(artifacts),
-            "size_bytes": buf.getbuffer().nbytes,
+                else:
+                    async for chunk in writer.add_precompressed(
+                        path, reader, crc=artifact.crc32,
+                        size=artifact.size_bytes, compressed_size=artifact.deflated_size_bytes,
+                        date_time=date_time,
+                    ):
+                        yield chunk
+                    return
+        async with AsyncExitStack() as stack:
+            try:
+                reader = await stack.enter_async_context(
+                    self.storage.open_read(artifact.storage_key)
+                )
+            except KeyError:
+                logger.warning("export.artifact_missing", extra={
+                    "test_id": test_id,
+                    "storage_key": str(artifact.storage_key)
+                })
+                if missing is not None:
+                    missing.append(artifact.storage_key)
+                return
+            async for chunk in writer.add(path, reader, date_time=date_time):
+                yield chunk
+
+    async def export_many(self, filters: TestFilter, current_user: User) -> AsyncIterator[bytes]:
+        """
+        One archive with a `<test id>-<test name>/` directory per PARSED test matching the
+        filters. Tests are walked with a server-side cursor; up to fetch_concurrency
+        artifacts, and no more than prefetch_max_bytes of them, are fetched ahead while the
+        previous ones are zipped and sent. Larger artifacts, or ones of unknown size, are
+        streamed from the storage when their turn comes.
+        """
+        rows = self.uow.tests.stream_parsed_artifacts(
+            filters, current_user.id, batch_size=EXPORT_CURSOR_BATCH_SIZE
+        )
+        return self._stream_bulk_archive(rows)
+
+    async def _stream_bulk_archive(
+        self,
+        rows: AsyncIterator[tuple[int, str, TestArtifact]]
+    ) -> AsyncIterator[bytes]:
+        started_at = time.monotonic()
+        writer = ZipStreamWriter()
+        pending: deque[_Pending] = deque()
+        reserved_bytes = 0
+        test_ids: set[int] = set()
+        try:
+            async for test_id, test_name, artifact in rows:
+                test_ids.add(test_id)
+                path = f"{test_id}-{test_name.replace('/', '_')}/{artifact.filename}"
+                # size_bytes bounds the deflate stream too, which is kept only when smaller
+                size = artifact.size_bytes
+                prefetch = size is not None and size <= self.prefetch_max_bytes
+                reserve = size if prefetch else 0
+                while pending and (len(pending) >= self.fetch_concurrency
+                                   or reserved_bytes + reserve > self.prefetch_max_bytes):
+                    entry = pending.popleft()
+                    async for chunk in self._write_pending(writer, entry):
+                        yield chunk
+                    reserved_bytes -= entry.reserved_bytes
+                fetch = asyncio.create_task(self._fetch(artifact)) if prefetch else None
+                pending.append(_Pending(test_id, path, artifact, fetch, reserve))
+                reserved_bytes += reserve
+            while pending:
+                async for chunk in self._write_pending(writer, pending.popleft()):
+                    yield chunk
+            yield writer.finish()
+        finally:
+            fetches = [entry.fetch for entry in pending if entry.fetch is not None]
+            for task in fetches:
+                task.cancel()
+            await asyncio.gather(*fetches, return_exceptions=True)
+        logger.info("tests.exported", extra={
+            "test_count": len(test_ids),
+            "size_bytes": writer.bytes_written,
             "duration_ms": round((time.monotonic() - started_at) * 1000)
         })
-        return buf, f"{test.name}.zip"
+
+    async def _fetch(self, artifact: TestArtifact) -> _Fetched | None:
+        if artifact.deflate_storage_key is not None:
+            try:
+                return _Fetched(await self.storage.load(artifact.deflate_storage_key), True)
+            except KeyError:
+                pass
+        try:
+            return _Fetched(await self.storage.load(artifact.storage_key), False)
+        except KeyError:
+            return None
+
+    async def _write_pending(
+        self,
+        writer: ZipStreamWriter,
+        entry: _Pending
+    ) -> AsyncIterator[bytes]:
+        test_id, path, artifact, fetch, _ = entry
+        if fetch is None:
+            async for chunk in self._zip_artifact(writer, test_id, path, artifact, None):
+                yield chunk
+            return
+        fetched = await fetch
+        if fetched is None:
+            logger.warning("export.artifact_missing", extra={
+                "test_id": test_id,
+                "storage_key": str(artifact.storage_key)
+            })
+            return
+        date_time = artifact.created_at.timetuple()
+        if fetched.precompressed:
+            member = writer.add_precompressed(
+                path, _single_chunk(fetched.content), crc=artifact.crc32,
+                size=artifact.size_bytes, compressed_size=artifact.deflated_size_bytes,
+                date_time=date_time,
+            )
+        else:
+            member = writer.add(path, _single_chunk(fetched.content), date_time=date_time)
+        async for chunk in member:
+            yield chunk
 
     async def artifact_download(
         self,
         test_id: int,
         artifact_id: int
-    ) -> ArtifactLinkDomain | ArtifactContentDomain:
+    ) -> ArtifactLinkDomain | ArtifactFileDomain | ArtifactContentDomain:
         artifact = await self.uow.artifacts.find_by_id(artifact_id)
         if artifact is None or artifact.test_id != test_id:
             raise ArtifactNotFoundError(test_id, artifact_id)
@@ -76,5 +353,15 @@ class ExportService:
         })
         if url is not None:
             return ArtifactLinkDomain(filename=artifact.filename, url=url)
-        content = await self.storage.load(artifact.storage_key)
-        return ArtifactContentDomain(filename=artifact.filename, content=content)
+        path = self.storage.local_path(artifact.storage_key)
+        if path is not None:
+            return ArtifactFileDomain(filename=artifact.filename, path=path)
+        return ArtifactContentDomain(
+            filename=artifact.filename, chunks=self._stream(artifact.storage_key)
+        )
+
+    async def _stream(self, storage_key: str) -> AsyncIterator[bytes]:
+        async with self.storage.open_read(storage_key) as reader:
+            async for chunk in reader:
+                yield chunk
+
@@ -1,19 +1,19 @@
 import asyncio
+import hashlib
 import io
 import logging
 import re
-import tempfile
 import zipfile
 from collections.abc import AsyncIterator, Callable
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
 from pathlib import Path
+from typing import BinaryIO
 
-import aiofiles
 from fastapi import UploadFile
 
 from app.core.storage import StorageBackend
 from app.core.unit_of_work import UnitOfWork
-from app.memory_allocator.enums import ArtifactKind, TestStatus
+from app.memory_allocator.enums import ArtifactKind, MemoryMetric, TestStatus
 from app.memory_allocator.exceptions import (
     EmptyFileError,
     InvalidUploadError,
@@ -30,9 +30,18 @@ from app.memory_allocator.models import (
     TestCase,
 )
 from app.memory_allocator.notifications import StatusNotifier
+from app.memory_allocator.repositories.layout_repository import (
+    BlockRows,
+    ModuleRows,
+    PartitionRows,
+)
 from app.memory_allocator.schemas import TestDomain
-from app.memory_allocator.utils.parser import parse_yaml
-from app.memory_allocator.utils.thread_utils import run_in_thread
+from app.memory_allocator.utils.archive import ArchiveMember, iter_members
+from app.memory_allocator.utils.count_cache import CountCache
+from app.memory_allocator.utils.parse_cache import ParseCache
+from app.memory_allocator.utils.parser import count_output_entries, parse_yaml
+from app.memory_allocator.utils.thread_utils import OffloadMode, run_in_thread, run_offloaded
+from app.memory_allocator.utils.zipstream import Deflater
 from app.users.models import User
 
 logger = logging.getLogger(__name__)
@@ -46,23 +55,41 @@ PATTERNS = {
     r"memin\.log": ArtifactKind.LOG,
     r"status\.ya?ml": ArtifactKind.STATUS,
 }
+CONSTRAINTS_PATTERN = r"in_[a-zA-Z0-9_]+_constraints\.ya?ml$"
+OUTPUT_ARCH_PATTERN = r"out_[a-zA-Z0-9_]+_arch_early\.ya?ml$"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+DEFLATE_SUFFIX = ".deflate"
 
 
 class IngestionService:
     def __init__(self, uow: UnitOfWork,
                  storage: StorageBackend,
                  enqueue_processing: Callable[[int], object] | None = None,
-                 notifier: StatusNotifier | None = None):
+                 notifier: StatusNotifier | None = None,
+                 bulk_persist: bool = False,
+                 parse_mode: OffloadMode = OffloadMode.THREAD,
+                 dedup_uploads: bool = False,
+                 parse_cache: ParseCache | None = None,
+                 count_cache: CountCache | None = None,
+                 artifact_concurrency: int = 4,
+                 precompress_min_bytes: int | None = None):
         self.uow = uow
         self.storage = storage
         self.enqueue_processing = enqueue_processing
         self.notifier = notifier
+        self.bulk_persist = bulk_persist
+        self.parse_mode = parse_mode
+        self.dedup_uploads = dedup_uploads
+        self.parse_cache = parse_cache
+        self.count_cache = count_cache
+        self.artifact_concurrency = artifact_concurrency
+        self.precompress_min_bytes = precompress_min_bytes
 
     async def accept_upload(self, file: UploadFile, uploaded_by: User) -> TestDomain:
         test_name = self._validate_upload(file)
-        content = await file.read()
 
-        memin_bytes = self._read_memin_from_zip(content, test_name)
+        memin_bytes = await run_in_thread(self._read_memin_from_zip, file.file, test_name)
         platform = await self._process_memin(memin_bytes)
 
         test = TestCase(
@@ -74,8 +101,20 @@ class IngestionService:
         self.uow.tests.add(test)
         await self.uow.flush()
 
-        await self.storage.save(f"uploads/{test.id}.zip", content)
+        upload_key = f"uploads/{test.id}.zip"
+        digest = hashlib.sha256()
+        await self.storage.save_stream(upload_key, self._upload_chunks(file, digest))
+        test.content_sha256 = digest.hexdigest()
+
+        if self.dedup_uploads and await self._link_to_twin(test):
+            await self.uow.commit()
+            await self._invalidate_counts()
+            await self._discard_upload(upload_key)
+            if self.notifier is not None:
+                await self.notifier.test_status_changed(test)
+            return TestDomain.model_validate(test)
         await self.uow.commit()
+        await self._invalidate_counts()
 
         if self.enqueue_processing is None:
             raise RuntimeError("enqueue_processing is not configurated")
@@ -85,13 +124,59 @@ class IngestionService:
             "test_id": test.id,
             "platform": platform.mmu_family,
             "user_id": str(uploaded_by.id),
-            "size_bytes": len(content),
+            "size_bytes": file.size,
         })
         return TestDomain.model_validate(test)
 
-    def _read_memin_from_zip(self, content: bytes, test_name: str) -> bytes:
+    async def _upload_chunks(self, file: UploadFile, digest) -> AsyncIterator[bytes]:
+        await file.seek(0)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            yield chunk
+
+    async def _link_to_twin(self, test: TestCase) -> bool:
+        twin = await self.uow.tests.find_parsed_twin(test.content_sha256, exclude_id=test.id)
+        if twin is None:
+            return False
+        test.duplicate_of_id = twin.layout_owner_id
+        test.status = TestStatus.PARSED
+        test.module_count = twin.module_count
+        test.block_count = twin.block_count
+        test.kernel_entry_count = twin.kernel_entry_count
+        test.user_entry_count = twin.user_entry_count
+        for metric in MemoryMetric:
+            setattr(test, metric, getattr(twin, metric))
+        for artifact in await self.uow.artifacts.list_by_test(twin.id):
+            self.uow.artifacts.add(TestArtifact(
+                kind=artifact.kind,
+                filename=artifact.filename,
+                storage_key=artifact.storage_key,
+                deflate_storage_key=artifact.deflate_storage_key,
+                size_bytes=artifact.size_bytes,
+                deflated_size_bytes=artifact.deflated_size_bytes,
+                crc32=artifact.crc32,
+                test=test
+            ))
+        logger.info("test.deduplicated", extra={
+            "test_id": test.id,
+            "twin_id": twin.id,
+            "content_sha256": test.content_sha256,
+        })
+        return True
+
+    async def _invalidate_counts(self) -> None:
+        if self.count_cache is not None:
+            await self.count_cache.invalidate()
+
+    async def _discard_upload(self, key: str) -> None:
+        try:
+            await self.storage.delete(key)
+        except Exception as exc:
+            logger.warning("storage.delete_failed", extra={"storage_key": key, "error": str(exc)})
+
+    def _read_memin_from_zip(self, archive: BinaryIO, test_name: str) -> bytes:
         try:
-            with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            with zipfile.ZipFile(archive) as zf:
                 try:
                     return zf.read("memin.yaml")
                 except KeyError as exc:
@@ -99,65 +184,145 @@ class IngestionService:
         except zipfile.BadZipFile as exc:
             raise InvalidUploadError(test_name, "file is not a valid zip archive") from exc
 
-    async def process_upload(self, test: TestCase, content: bytes) -> None:
-        async with self._extracted_zip(content, test.name) as folder:
-            await self._parse_constraints(test, folder)
+    async def process_upload(self, test: TestCase, content: bytes | BinaryIO) -> None:
+        with await run_in_thread(self._open_archive, content, test.name) as archive:
+            members = list(iter_members(archive, PATTERNS))
+            # Only the files the parser reads are held in memory, the rest is streamed
+            parsed = await run_in_thread(self._read_parser_inputs, archive, members, test.name)
+            modules = await self._parse_constraints(members, parsed)
+            await self._persist_layout(test, modules)
             await self.uow.flush()
 
-            await self._apply_counters(test, folder)
+            await self._apply_counters(test, modules, members, parsed)
             test.status = TestStatus.PARSED
 
-            await self._persist_with_artifacts(test, folder)
-            logger.info("test.parsed", extra={
-                "test_id": test.id,
-                "module_count": test.module_count,
-                "block_count": test.block_count,
-                "kernel_entry_count": test.kernel_entry_count,
-                "user_entry_count": test.user_entry_count,
-            })
-            if self.notifier is not None:
-                await self.notifier.test_status_changed(test)
+            await self._persist_with_artifacts(test, archive, members, parsed)
+        logger.info("test.parsed", extra={
+            "test_id": test.id,
+            "module_count": test.module_count,
+            "block_count": test.block_count,
+            "kernel_entry_count": test.kernel_entry_count,
+            "user_entry_count": test.user_entry_count,
+            "mapped_bytes": test.mapped_bytes,
+            "parse_cache": self.parse_cache.stats if self.parse_cache is not None else None,
+        })
+        if self.notifier is not None:
+            await self.notifier.test_status_changed(test)
 
     def _validate_upload(self, file: UploadFile) -> str:
         if not (file.filename and file.filename.endswith(".zip")):
             raise InvalidUploadError(str(file.filename), "only zip files could be attached")
         return Path(file.filename).stem
 
-    @asynccontextmanager
-    async def _extracted_zip(self, content: bytes, test_name: str) -> AsyncIterator[Path]:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            extract_dir = Path(tmpdir, "extracted")
-            extract_dir.mkdir()
-            try:
-                with zipfile.ZipFile(io.BytesIO(content)) as zip_ref:
-                    zip_ref.extractall(extract_dir)
-            except zipfile.BadZipFile as exc:
-                raise InvalidUploadError(test_name, "file is not a valid zip archive") from exc
-            yield extract_dir
-
-    async def _parse_constraints(self, test: TestCase, folder: Path) -> None:
-        pattern = r"^.*/in_[a-zA-Z0-9_]+_constraints\.ya?ml$"
-        constraint_files = [
-            path for path in folder.rglob("*")
-            if path.is_file() and re.match(pattern, str(path))
-        ]
+    def _open_archive(self, content: bytes | BinaryIO, test_name: str) -> zipfile.ZipFile:
+        archive = io.BytesIO(content) if isinstance(content, bytes) else content
+        try:
+            return zipfile.ZipFile(archive)
+        except zipfile.BadZipFile as exc:
+            raise InvalidUploadError(test_name, "file is not a valid zip archive") from exc
+
+    def _read_parser_inputs(
+            self,
+            archive: zipfile.ZipFile,
+            members: list[ArchiveMember],
+            test_name: str
+    ) -> dict[str, bytes]:
+        """Decompress the constraints and the output the parser needs, keyed by member path."""
+        inputs = self._constraint_members(members)
+        output = self._output_arch_member(members)
+        if output is not None:
+            inputs.append(output)
+        try:
+            return {member.path: archive.read(member.info) for member in inputs}
+        except zipfile.BadZipFile as exc:
+            raise InvalidUploadError(test_name, "file is not a valid zip archive") from exc
+
+    @staticmethod
+    def _constraint_members(members: list[ArchiveMember]) -> list[ArchiveMember]:
+        return [m for m in members if re.match(CONSTRAINTS_PATTERN, m.name)]
+
+    @staticmethod
+    def _output_arch_member(members: list[ArchiveMember]) -> ArchiveMember | None:
+        return next((m for m in members
+                     if m.is_top_level and re.match(OUTPUT_ARCH_PATTERN, m.name)), None)
+
+    async def _parse_constraints(
+            self,
+            members: list[ArchiveMember],
+            parsed: dict[str, bytes]
+    ) -> list[ModuleRows]:
+        constraint_files = self._constraint_members(members)
         try:
-            await asyncio.gather(*(self._process_constraints(file=f, test=test)
-                                   for f in constraint_files))
+            modules = await asyncio.gather(*(self._process_constraints(m.path, parsed[m.path])
+                                             for m in constraint_files))
         except (KeyError, TypeError, AttributeError) as exc:
             raise ParsingError(repr(exc)) from exc
+        return list(modules)
+
+    async def _persist_layout(self, test: TestCase, modules: list[ModuleRows]) -> None:
+        if self.bulk_persist:
+            await self.uow.layouts.bulk_insert(test.id, modules)
+            return
+        for rows in modules:
+            module = Module(**rows.values, test=test)
+            module.kernel_blocks = [self._build_block(b) for b in rows.kernel_blocks]
+            module.partitions = [
+                Partition(**p.values, blocks=[self._build_block(b) for b in p.blocks])
+                for p in rows.partitions
+            ]
+            self.uow.session.add(module)
 
-    async def _apply_counters(self, test: TestCase, folder: Path) -> None:
-        test.module_count = len(test.modules)
-        kernel_blocks = sum(len(m.kernel_blocks) for m in test.modules)
-        partition_blocks = sum(len(p.blocks) for m in test.modules for p in m.partitions)
-        test.block_count = kernel_blocks + partition_blocks
+    def _build_block(self, rows: BlockRows) -> Block:
+        return Block(**rows.values, regions=[Region(**r) for r in rows.regions])
+
+    async def _apply_counters(
+            self,
+            test: TestCase,
+            modules: list[ModuleRows],
+            members: list[ArchiveMember],
+            parsed: dict[str, bytes]
+    ) -> None:
+        test.module_count = len(modules)
+        test.block_count = sum(m.block_count for m in modules)
+        for metric, value in self._memory_metrics(modules).items():
+            setattr(test, metric, value)
         (test.kernel_entry_count,
-         test.user_entry_count) = await self._count_output_entries(folder)
+         test.user_entry_count) = await self._count_output_entries(members, parsed)
+
+    @staticmethod
+    def _memory_metrics(modules: list[ModuleRows]) -> dict[MemoryMetric, int]:
+        """All the MemoryMetric values of the parsed blocks, in a single pass over them."""
+        metrics = dict.fromkeys(MemoryMetric, 0)
+        for module in modules:
+            for rows in module.blocks:
+                block = rows.values
+                size = block["size"] or 0
+                metrics[MemoryMetric.MAPPED_BYTES] += size
+                if "R" in block["access"]:
+                    metrics[MemoryMetric.READABLE_BYTES] += size
+                if "W" in block["access"]:
+                    metrics[MemoryMetric.WRITABLE_BYTES] += size
+                if "X" in block["access"]:
+                    metrics[MemoryMetric.EXECUTABLE_BYTES] += size
+                if block["cache_policy"] != "DEFAULT":
+                    metrics[MemoryMetric.UNCACHED_BYTES] += size
+                if block["is_shadow"]:
+                    metrics[MemoryMetric.SHADOW_BYTES] += size
+                if block["is_contiguous"]:
+                    metrics[MemoryMetric.LARGEST_CONTIGUOUS_BYTES] = max(
+                        metrics[MemoryMetric.LARGEST_CONTIGUOUS_BYTES], size
+                    )
+        return metrics
 
-    async def _persist_with_artifacts(self, test: TestCase, folder: Path) -> None:
+    async def _persist_with_artifacts(
+            self,
+            test: TestCase,
+            archive: zipfile.ZipFile,
+            members: list[ArchiveMember],
+            parsed: dict[str, bytes]
+    ) -> None:
         try:
-            await self._save_artifacts(test=test, folder_path=folder)
+            await self._save_artifacts(test, archive, members, parsed)
             await self.uow.commit()
         except Exception:
             await self.uow.rollback()
@@ -177,50 +342,52 @@ class IngestionService:
         )
         return platform
 
-    async def _process_constraints(self, file: Path, test: TestCase) -> None:
-        async with aiofiles.open(file, "rb") as f:
-            content = await f.read()
-            if not content:
-                raise EmptyFileError(str(file.absolute()))
-        data = await run_in_thread(parse_yaml, content)
+    async def _process_constraints(self, path: str, content: bytes) -> ModuleRows:
+        if not content:
+            raise EmptyFileError(path)
+        data = await self._parse_cached(content)
         if "module_name" not in data:
-            raise InvalidUploadError(str(file.absolute()), "No module_name param")
-        address_space_base = data.get("address_space_base")
-        module = Module(
-            name=data["module_name"],
-            address_space_base=address_space_base,
-            test=test
-        )
-        self.uow.session.add(module)
-        await self._process_module(module=module, data=data)
+            raise InvalidUploadError(path, "No module_name param")
+        return self._module_rows(data)
+
+    async def _parse_cached(self, content: bytes) -> dict:
+        if self.parse_cache is None:
+            return await run_offloaded(self.parse_mode, parse_yaml, content)
+        digest = hashlib.sha256(content).hexdigest()
+        data = await self.parse_cache.get(digest)
+        if data is None:
+            data = await run_offloaded(self.parse_mode, parse_yaml, content)
+            await self.parse_cache.set(digest, data)
+        return data
 
-    async def _process_module(self, module: Module, data: dict) -> None:
+    def _module_rows(self, data: dict) -> ModuleRows:
         # Kernel memory blocks
-        for block_name, block_data in data.get("kernel_memory_blocks", {}).items():
-            await self._create_block(
-                name=block_name, data=block_data, module=module, partition=None
-            )
+        kernel_blocks = [
+            self._block_rows(name=block_name, data=block_data)
+            for block_name, block_data in data.get("kernel_memory_blocks", {}).items()
+        ]
         # Partitions
-        for part in data.get("partitions", []):
-            partition = Partition(
-                name=part["part_name"],
-                space_id=part["space_id"],
-                module=module
+        partitions = [
+            PartitionRows(
+                values={"name": part["part_name"], "space_id": part["space_id"]},
+                blocks=[
+                    self._block_rows(name=block_name, data=block_data)
+                    for block_name, block_data in part.get("memory_blocks", {}).items()
+                ],
             )
-            self.uow.session.add(partition)
-            for block_name, block_data in part.get("memory_blocks", {}).items():
-                await self._create_block(
-                    name=block_name, data=block_data, module=None, partition=partition
-                )
+            for part in data.get("partitions", [])
+        ]
+        return ModuleRows(
+            values={
+                "name": data["module_name"],
+                "address_space_base": data.get("address_space_base"),
+            },
+            kernel_blocks=kernel_blocks,
+            partitions=partitions,
+        )
 
-    async def _create_block(
-            self,
-            name: str,
-            data: dict,
-            module: Module | None,
-            partition: Partition | None
-    ) -> None:
-        block = Block(
+    def _block_rows(self, name: str, data: dict) -> BlockRows:
+        values = dict(
             name=name,
             access=data["access"],
             align=data["align"],
@@ -243,66 +410,147 @@ class IngestionService:
             safety_zone_before_unmapped=data["safety_zone_before_unmapped"],
             safety_zone_after=data["safety_zone_after"],
             safety_zone_after_unmapped=data["safety_zone_after_unmapped"],
-            module=module,
-            partition=partition
         )
-        self.uow.session.add(block)
-        for region_data in data.get("regions", []):
-            region = Region(
+        regions = [
+            dict(
                 paddr=region_data["paddr"],
                 size=region_data["size"],
                 vaddr=region_data["vaddr"],
-                block=block
             )
-            self.uow.session.add(region)
-
-    async def _count_output_entries(self, folder_path: Path) -> tuple[int, int]:
-        out_files = [
-            f for f in folder_path.iterdir()
-            if f.is_file() and re.match(r"out_[a-zA-Z0-9_]+_arch_early\.ya?ml$", f.name)
+            for region_data in data.get("regions", [])
         ]
-        if not out_files:
+        return BlockRows(values=values, regions=regions)
+
+    async def _count_output_entries(
+            self,
+            members: list[ArchiveMember],
+            parsed: dict[str, bytes]
+    ) -> tuple[int, int]:
+        out_file = self._output_arch_member(members)
+        if out_file is None:
             return 0, 0
-        out_file = out_files[0]
         try:
-            async with aiofiles.open(out_files[0], "rb") as f:
-                content = await f.read()
-            data = await run_in_thread(parse_yaml, content)
-            if not data:
-                return 0, 0
-            kernel_count = len(data.get("kernel_entries", []))
-            map_entries = data.get("user_entries", {}).get("map_entries", [])
-            user_count = sum(len(space) for space in map_entries)
+            return await run_offloaded(
+                self.parse_mode, count_output_entries, parsed[out_file.path]
+            )
         except Exception as exc:
-            raise ParsingError(str(out_file)) from exc
-        return kernel_count, user_count
+            raise ParsingError(out_file.path) from exc
 
-    def _match_kind(self, filename: Path) -> ArtifactKind | None:
+    def _match_kind(self, filename: str) -> ArtifactKind | None:
         for pattern, artifact_kind in PATTERNS.items():
-            if re.match(pattern, str(filename.name)):
+            if re.match(pattern, filename):
                 return artifact_kind
         return None
 
-    async def _save_artifacts(self, test: TestCase, folder_path: Path) -> None:
-        saved_keys: list[str] = []
+    async def _save_artifacts(
+            self,
+            test: TestCase,
+            archive: zipfile.ZipFile,
+            members: list[ArchiveMember],
+            parsed: dict[str, bytes]
+    ) -> None:
+        """
+        Upload the top-level artifacts concurrently, at most artifact_concurrency at a time.
+        Artifacts of at least precompress_min_bytes also get their raw deflate stream stored
+        next to them, so exports can splice it instead of compressing on every download.
+        On failure every key whose upload was started is removed with a single batch delete.
+        """
+        artifacts = [(member, kind) for member in members
+                     if member.is_top_level and (kind := self._match_kind(member.name))]
+        semaphore = asyncio.Semaphore(self.artifact_concurrency)
+        started_keys: list[str] = []
+        sizes: dict[str, int] = {}
+        precompressed: dict[str, tuple[str, int, int]] = {}
+
+        async def save(member: ArchiveMember) -> None:
+            storage_key = f"artifacts/{test.id}/{member.name}"
+            deflate_key = None
+            if self.precompress_min_bytes is not None and member.size >= self.precompress_min_bytes:
+                deflate_key = f"{storage_key}{DEFLATE_SUFFIX}"
+            async with semaphore:
+                started_keys.append(storage_key)
+                if deflate_key is not None:
+                    started_keys.append(deflate_key)
+                try:
+                    sizes[member.name], deflater = await self._copy_member(
+                        archive, member, parsed.get(member.path), storage_key, deflate_key
+                    )
+                except zipfile.BadZipFile as exc:
+                    raise InvalidUploadError(test.name, "file is not a valid zip archive") from exc
+                if deflater is None:
+                    return
+                if deflater.compressed_size >= deflater.size:
+                    await self.storage.delete(deflate_key)
+                    return
+                precompressed[member.name] = (deflate_key, deflater.compressed_size, deflater.crc)
+
         try:
-            for filename in folder_path.iterdir():
-                kind = self._match_kind(filename)
-                if not kind:
-                    continue
-                storage_key = f"artifacts/{test.id}/{filename.name}"
-                async with aiofiles.open(filename, "rb") as f:
-                    content = await f.read()
-                await self.storage.save(storage_key, content)
-                saved_keys.append(storage_key)
-                artifact = TestArtifact(
-                    kind=kind,
-                    filename=filename.name,
-                    storage_key=storage_key,
-                    test=test
-                )
-                self.uow.artifacts.add(artifact)
-        except Exception:
-            for key in saved_keys:
-                await self.storage.delete(key)
-            raise
+            async with asyncio.TaskGroup() as tg:
+                for member, _ in artifacts:
+                    tg.create_task(save(member))
+        except BaseExceptionGroup as group:
+            if started_keys:
+                await self.storage.delete_many(started_keys)
+            # Callers handle single errors (DomainError above all), so the first one is
+            # raised; the others would be lost without their tracebacks in the log
+            for exc in group.exceptions:
+                logger.error("artifact.save_failed", exc_info=exc, extra={
+                    "test_id": test.id, "error": str(exc)
+                })
+            raise group.exceptions[0] from None
+
+        for member, kind in artifacts:
+            artifact = TestArtifact(
+                kind=kind,
+                filename=member.name,
+                storage_key=f"artifacts/{test.id}/{member.name}",
+                size_bytes=sizes[member.name],
+                test=test
+            )
+            if member.name in precompressed:
+                (artifact.deflate_storage_key,
+                 artifact.deflated_size_bytes,
+                 artifact.crc32) = precompressed[member.name]
+            self.uow.artifacts.add(artifact)
+
+    async def _copy_member(
+            self,
+            archive: zipfile.ZipFile,
+            member: ArchiveMember,
+            content: bytes | None,
+            storage_key: str,
+            deflate_key: str | None
+    ) -> tuple[int, Deflater | None]:
+        """
+        Write a member to the storage chunk by chunk, decompressing it from the archive
+        unless its content is already in memory. With a deflate_key its raw deflate stream
+        is written in the same pass. Returns the member size and the deflater, if any.
+        """
+        deflater = Deflater() if deflate_key is not None else None
+        size = 0
+        async with AsyncExitStack() as stack:
+            source = stack.enter_context(
+                io.BytesIO(content) if content is not None
+                else await run_in_thread(archive.open, member.info)
+            )
+            writer = await stack.enter_async_context(self.storage.open_write(storage_key))
+            packed = None
+            if deflate_key is not None:
+                packed = await stack.enter_async_context(self.storage.open_write(deflate_key))
+            while True:
+                chunk, compressed = await run_in_thread(_read_chunk, source, deflater)
+                if not chunk:
+                    break
+                size += len(chunk)
+                await writer.write(chunk)
+                if compressed:
+                    await packed.write(compressed)
+            if deflater is not None:
+                await packed.write(deflater.flush())
+        return size, deflater
+
+
+def _read_chunk(source: BinaryIO, deflater: Deflater | None) -> tuple[bytes, bytes]:
+    """Next chunk of a member and, with a deflater, what it compresses to."""
+    chunk = source.read(ARTIFACT_CHUNK_SIZE)
+    return chunk, (deflater.compress(chunk) if deflater is not None and chunk else b"")
@@ -0,0 +1,181 @@
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import UTC, datetime
+
+from sqlalchemy import Row
+
+from app.core.config import get_settings
+from app.core.storage import StorageBackend
+from app.core.unit_of_work import UnitOfWork
+from app.memory_allocator.enums import ColumnarFormat, LayoutExportStatus, LayoutTable
+from app.memory_allocator.exceptions import LayoutExportNotFoundError, LayoutExportNotReadyError
+from app.memory_allocator.models import LayoutExport
+from app.memory_allocator.schemas import (
+    ArtifactContentDomain,
+    ArtifactFileDomain,
+    ArtifactLinkDomain,
+    LayoutExportDomain,
+    LayoutExportRequest,
+    TestFilter,
+)
+from app.memory_allocator.utils.columnar import EXTENSIONS, SCHEMAS, ColumnarWriter
+from app.memory_allocator.utils.thread_utils import run_in_thread
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+LAYOUT_EXPORT_BATCH_SIZE = 50_000  # rows per cursor fetch, record batch and row group
+
+
+def _filename(table: LayoutTable, fmt: ColumnarFormat) -> str:
+    return f"{table}.{EXTENSIONS[fmt]}"
+
+
+class LayoutExportService:
+    def __init__(self, uow: UnitOfWork, storage: StorageBackend,
+                 enqueue_export: Callable[[int], object] | None = None,
+                 batch_size: int = LAYOUT_EXPORT_BATCH_SIZE):
+        self.uow = uow
+        self.storage = storage
+        self.enqueue_export = enqueue_export
+        self.batch_size = batch_size
+
+    async def stream(
+        self,
+        request: LayoutExportRequest,
+        current_user: User
+    ) -> ArtifactContentDomain:
+        """
+        The block or region rows of the PARSED test cases matching the filters, encoded
+        while they are read: every cursor batch becomes one record batch.
+        """
+        rows = self._rows(request.table, request, current_user.id)
+        writer = ColumnarWriter(SCHEMAS[request.table], request.format)
+        return ArtifactContentDomain(
+            filename=_filename(request.table, request.format),
+            chunks=self._logged(self._encode(writer, rows), writer),
+        )
+
+    async def request_export(
+        self,
+        request: LayoutExportRequest,
+        current_user: User
+    ) -> LayoutExportDomain:
+        export = LayoutExport(
+            status=LayoutExportStatus.PENDING,
+            table=request.table,
+            format=request.format,
+            filters=request.model_dump(mode="json", include=set(TestFilter.model_fields)),
+            requested_by_id=current_user.id,
+        )
+        self.uow.layout_exports.add(export)
+        await self.uow.commit()
+
+        if self.enqueue_export is None:
+            raise RuntimeError("enqueue_export is not configurated")
+        self.enqueue_export(export.id)
+        logger.info("layout_export.requested", extra={
+            "export_id": export.id,
+            "table": export.table,
+            "format": export.format,
+        })
+        return LayoutExportDomain.model_validate(export)
+
+    async def perform_export(self, export_id: int) -> None:
+        export = await self.uow.layout_exports.find_by_id(export_id)
+        if export is None:
+            logger.error("layout_export.not_found", extra={"export_id": export_id})
+            return
+        if export.status == LayoutExportStatus.COMPLETED:
+            return
+        export.status = LayoutExportStatus.RUNNING
+        await self.uow.commit()
+
+        started_at = time.monotonic()
+        storage_key = f"layout-exports/{export.id}/{_filename(export.table, export.format)}"
+        rows = self._rows(
+            export.table, TestFilter.model_validate(export.filters), export.requested_by_id
+        )
+        writer = ColumnarWriter(SCHEMAS[export.table], export.format)
+        async with self.storage.open_write(storage_key) as file:
+            async for chunk in self._encode(writer, rows):
+                await file.write(chunk)
+
+        export.storage_key = storage_key
+        export.row_count = writer.rows_written
+        export.size_bytes = writer.bytes_written
+        export.status = LayoutExportStatus.COMPLETED
+        export.finished_at = datetime.now(UTC)
+        await self.uow.commit()
+        logger.info("layout_export.completed", extra={
+            "export_id": export.id,
+            "row_count": export.row_count,
+            "size_bytes": export.size_bytes,
+            "duration_ms": round((time.monotonic() - started_at) * 1000),
+        })
+
+    async def get(self, export_id: int, current_user: User) -> LayoutExportDomain:
+        return LayoutExportDomain.model_validate(await self._find(export_id, current_user))
+
+    async def download(
+        self,
+        export_id: int,
+        current_user: User
+    ) -> ArtifactLinkDomain | ArtifactFileDomain | ArtifactContentDomain:
+        export = await self._find(export_id, current_user)
+        if export.status != LayoutExportStatus.COMPLETED:
+            raise LayoutExportNotReadyError(export.id, export.status)
+        filename = _filename(export.table, export.format)
+        url = await self.storage.presigned_url(
+            export.storage_key, settings.S3_PRESIGN_TTL_SECONDS, filename=filename
+        )
+        if url is not None:
+            return ArtifactLinkDomain(filename=filename, url=url)
+        path = self.storage.local_path(export.storage_key)
+        if path is not None:
+            return ArtifactFileDomain(filename=filename, path=path)
+        return ArtifactContentDomain(filename=filename, chunks=self._stream(export.storage_key))
+
+    async def _find(self, export_id: int, current_user: User) -> LayoutExport:
+        # Exports of other users are hidden: their filters may hold "mine"
+        export = await self.uow.layout_exports.find_by_id(export_id)
+        if export is None or export.requested_by_id != current_user.id:
+            raise LayoutExportNotFoundError(export_id)
+        return export
+
+    def _rows(self, table: LayoutTable, filters: TestFilter,
+              user_id: uuid.UUID) -> AsyncIterator[Sequence[Row]]:
+        return self.uow.tests.stream_layout_rows(
+            table, filters, user_id, batch_size=self.batch_size
+        )
+
+    @staticmethod
+    async def _encode(
+        writer: ColumnarWriter,
+        rows: AsyncIterator[Sequence[Row]]
+    ) -> AsyncIterator[bytes]:
+        async for batch in rows:
+            # Building the arrays and compressing them is CPU work, kept off the loop
+            chunk = await run_in_thread(writer.write, batch)
+            if chunk:
+                yield chunk
+        yield writer.finish()
+
+    @staticmethod
+    async def _logged(chunks: AsyncIterator[bytes], writer: ColumnarWriter) -> AsyncIterator[bytes]:
+        started_at = time.monotonic()
+        async for chunk in chunks:
+            yield chunk
+        logger.info("layout_export.streamed", extra={
+            "row_count": writer.rows_written,
+            "size_bytes": writer.bytes_written,
+            "duration_ms": round((time.monotonic() - started_at) * 1000),
+        })
+
+    async def _stream(self, storage_key: str) -> AsyncIterator[bytes]:
+        async with self.storage.open_read(storage_key) as reader:
+            async for chunk in reader:
+                yield chunk
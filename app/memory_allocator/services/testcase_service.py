@@ -1,17 +1,46 @@
+import json
 import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
 
 from app.core.unit_of_work import UnitOfWork
+from app.memory_allocator.enums import FacetSource, TotalMode
 from app.memory_allocator.exceptions import TagNotFoundError, TestNotFoundError
 from app.memory_allocator.models import TestCase
-from app.memory_allocator.schemas import TestDomain, TestFilter, TestPagination
+from app.memory_allocator.repositories.layout_repository import (
+    BlockDocument,
+    ModuleHead,
+    PartitionHead,
+)
+from app.memory_allocator.schemas import (
+    AddressRange,
+    CursorPagination,
+    PlatformFacet,
+    StatusFacet,
+    TagFacet,
+    TestDomain,
+    TestFacetsDomain,
+    TestFilter,
+    TestPageDomain,
+    TestPagination,
+)
+from app.memory_allocator.utils.count_cache import CountCache, filter_digest
+from app.memory_allocator.utils.cursor import encode_cursor
 from app.users.models import User
 
 logger = logging.getLogger(__name__)
 
+LAYOUT_CURSOR_BATCH_SIZE = 1000
+LAYOUT_CHUNK_SIZE = 64 * 1024
+
 
 class TestcaseService:
-    def __init__(self, uow: UnitOfWork):
+    def __init__(self, uow: UnitOfWork, count_cache: CountCache | None = None,
+                 count_mode: TotalMode = TotalMode.EXACT, facets_rollup: bool = False):
         self.uow = uow
+        self.count_cache = count_cache
+        self.count_mode = count_mode
+        self.facets_rollup = facets_rollup
 
     async def find_by_id(self, test_id: int) -> TestCase | None:
         return await self.uow.tests.find_by_id(test_id)
@@ -22,6 +51,24 @@ class TestcaseService:
             raise TestNotFoundError(test_id=test_id)
         return TestDomain.model_validate(test)
 
+    async def layout(self, test_id: int) -> AsyncIterator[bytes]:
+        """
+        The layout tree of a test as JSON shaped like TestLayoutResponse. Past the test
+        itself it takes three queries whatever its size: modules, partitions, and a cursor
+        over the blocks, which Postgres renders as JSON with their regions. Block
+        documents are spliced into the tree as they are, without being parsed.
+        """
+        test = await self.find_by_id(test_id)
+        if test is None:
+            raise TestNotFoundError(test_id)
+        owner_id = test.layout_owner_id
+        modules = await self.uow.layouts.list_modules(owner_id)
+        partitions = await self.uow.layouts.list_partitions(owner_id)
+        blocks = self.uow.layouts.stream_block_documents(
+            owner_id, batch_size=LAYOUT_CURSOR_BATCH_SIZE
+        )
+        return _chunked(_layout_parts(test.id, modules, partitions, blocks), LAYOUT_CHUNK_SIZE)
+
     async def attach_tag(self, test_id: int, tag_id: int) -> None:
         test = await self.uow.tests.find_with_tags(test_id)
         if test is None:
@@ -34,6 +81,7 @@ class TestcaseService:
             return
         test.tags.append(tag)
         await self.uow.commit()
+        await self._invalidate_counts()
         logger.info("test.tag_attached", extra={"test_id": test.id, "tag_id": tag.id})
 
     async def detach_tag(self, test_id: int, tag_id: int) -> None:
@@ -48,16 +96,162 @@ class TestcaseService:
             return
         test.tags.remove(tag)
         await self.uow.commit()
+        await self._invalidate_counts()
         logger.info("test.tag_detached", extra={"test_id": test.id, "tag_id": tag.id})
 
+    async def _invalidate_counts(self) -> None:
+        if self.count_cache is not None:
+            await self.count_cache.invalidate()
+
     async def list_tests(
         self,
         filters: TestFilter,
         pagination: TestPagination,
         current_user: User
-    ) -> tuple[list[TestDomain], int]:
-        result, total = await self.uow.tests.list_filtered(
+    ) -> TestPageDomain:
+        result, has_more = await self.uow.tests.list_filtered(
             filters=filters, pagination=pagination, user_id=current_user.id
         )
         tests = [TestDomain.model_validate(t) for t in result]
-        return tests, total
+        total = total_mode = None
+        if pagination.include_total:
+            total, total_mode = await self._count(
+                filters, current_user, pagination.total_mode or self.count_mode
+            )
+        return TestPageDomain(
+            tests=tests,
+            total=total,
+            total_mode=total_mode,
+            next_cursor=encode_cursor(tests[-1].id) if has_more else None,
+        )
+
+    async def list_overlapping(
+        self,
+        address_range: AddressRange,
+        filters: TestFilter,
+        pagination: CursorPagination,
+        current_user: User
+    ) -> TestPageDomain:
+        result, has_more = await self.uow.tests.list_overlapping(
+            address_range=address_range,
+            filters=filters,
+            pagination=pagination,
+            user_id=current_user.id,
+        )
+        tests = [TestDomain.model_validate(t) for t in result]
+        return TestPageDomain(
+            tests=tests,
+            total=None,
+            total_mode=None,
+            next_cursor=encode_cursor(tests[-1].id) if has_more else None,
+        )
+
+    async def _count(
+        self,
+        filters: TestFilter,
+        current_user: User,
+        mode: TotalMode
+    ) -> tuple[int, TotalMode]:
+        """The total in the requested mode and the mode that actually produced it."""
+        if mode == TotalMode.ESTIMATED:
+            return await self.uow.tests.estimate_filtered(filters, current_user.id), mode
+        if mode == TotalMode.CACHED and self.count_cache is not None:
+            cached = await self.count_cache.get(filter_digest(filters, current_user.id))
+            if cached.total is not None:
+                return cached.total, TotalMode.CACHED
+            total = await self.uow.tests.count_filtered(filters, current_user.id)
+            await self.count_cache.set(cached.key, total)
+            return total, TotalMode.EXACT
+        return await self.uow.tests.count_filtered(filters, current_user.id), TotalMode.EXACT
+
+    async def facets(self, filters: TestFilter, current_user: User) -> TestFacetsDomain:
+        """
+        Facet counts of the filtered listing. Filters on statuses and platforms alone are
+        served from the rollup table when it is enabled; any other filter needs the tests.
+        """
+        if self.facets_rollup and not (filters.name or filters.tags or filters.mine
+                                       or filters.metric_bounds):
+            counts = await self.uow.tests.rollup_facet_counts(filters, current_user.id)
+            source = FacetSource.ROLLUP
+        else:
+            counts = await self.uow.tests.facet_counts(filters, current_user.id)
+            source = FacetSource.QUERY
+        return TestFacetsDomain(
+            total=counts.total,
+            statuses=[StatusFacet(status=s, count=c) for s, c in _by_count(counts.statuses)],
+            platforms=[PlatformFacet(platform_id=p, count=c)
+                       for p, c in _by_count(counts.platforms)],
+            tags=[TagFacet(tag_id=tag_id, name=name, count=count)
+                  for tag_id, name, count in sorted(counts.tags, key=lambda t: (-t[2], t[1]))],
+            source=source,
+        )
+
+    async def compact_facet_rollup(self) -> int:
+        """Fold the rollup deltas appended by the tests trigger into test_facet_rollup."""
+        compacted = await self.uow.tests.compact_facet_rollup()
+        await self.uow.commit()
+        logger.log(logging.INFO if compacted else logging.DEBUG, "facets.rollup_compacted",
+                   extra={"rows": compacted})
+        return compacted
+
+
+def _by_count(counts: dict) -> list[tuple]:
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _open_object(values: dict, list_key: str) -> str:
+    """An unterminated JSON object with the values and an open list under list_key."""
+    return f'{json.dumps(values)[:-1]},"{list_key}":['
+
+
+async def _layout_parts(
+    test_id: int,
+    modules: Sequence[ModuleHead],
+    partitions: Sequence[PartitionHead],
+    blocks: AsyncIterator[BlockDocument],
+) -> AsyncIterator[str]:
+    """
+    Writes the modules and partitions, in the order the blocks come in, and fills each
+    with its run of blocks, so the blocks are consumed in one pass.
+    """
+    partitions_of: defaultdict[int, list[PartitionHead]] = defaultdict(list)
+    for partition in partitions:
+        partitions_of[partition.module_id].append(partition)
+    rows = aiter(blocks)
+    row = await anext(rows, None)
+
+    async def owned_by(module_id: int, partition_id: int | None) -> AsyncIterator[str]:
+        nonlocal row
+        separator = ""
+        while row is not None and (row.module_id, row.partition_id) == (module_id, partition_id):
+            yield separator + row.document
+            separator = ","
+            row = await anext(rows, None)
+
+    yield f'{{"test_id":{test_id},"modules":['
+    for i, module in enumerate(modules):
+        yield ("," if i else "") + _open_object(module._asdict(), "kernel_blocks")
+        async for part in owned_by(module.id, None):
+            yield part
+        yield '],"partitions":['
+        for j, partition in enumerate(partitions_of[module.id]):
+            values = {"id": partition.id, "name": partition.name, "space_id": partition.space_id}
+            yield ("," if j else "") + _open_object(values, "blocks")
+            async for part in owned_by(module.id, partition.id):
+                yield part
+            yield "]}"
+        yield "]}"
+    yield "]}"
+
+
+async def _chunked(parts: AsyncIterator[str], chunk_size: int) -> AsyncIterator[bytes]:
+    buffer: list[str] = []
+    size = 0
+    async for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
@@ -1,4 +1,5 @@
 import logging
+import time
 from collections.abc import Callable
 from datetime import UTC, datetime
 
@@ -6,9 +7,10 @@ from app.core.unit_of_work import UnitOfWork
 from app.memory_allocator.checker import Checker
 from app.memory_allocator.enums import TestStatus, ValidationStatus
 from app.memory_allocator.exceptions import TestNotFoundError, TestNotValidatableError
-from app.memory_allocator.models import ValidationResult
+from app.memory_allocator.models import TestCase, ValidationResult
 from app.memory_allocator.notifications import StatusNotifier
 from app.memory_allocator.schemas import ValidationDomain
+from app.memory_allocator.utils.layout_analyzer import ANALYZER_VERSION, analyze_layout
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +19,13 @@ class ValidationService:
     def __init__(self, uow: UnitOfWork,
                  checker: Checker,
                  enqueue_validation: Callable[[int], object] | None = None,
-                 notifier: StatusNotifier | None = None):
+                 notifier: StatusNotifier | None = None,
+                 precheck: bool = False):
         self.uow = uow
         self.checker = checker
         self.enqueue_validation = enqueue_validation
         self.notifier = notifier
+        self.precheck = precheck
 
     async def request_validation(self, test_id: int) -> ValidationDomain:
         test = await self.uow.tests.find_by_id(test_id)
@@ -62,12 +66,20 @@ class ValidationService:
         if self.notifier is not None:
             await self.notifier.validation_status_changed(vr)
 
-        outcome = await self.checker.check(vr.test)
-        vr.valid = outcome.valid
+        issues = await self._precheck(vr.test) if self.precheck else []
+        if issues:
+            # The layout is broken whatever the checker says about the rest
+            vr.valid = False
+            vr.schema_valid = None
+            vr.errors = issues
+            vr.checker_version = ANALYZER_VERSION
+        else:
+            outcome = await self.checker.check(vr.test)
+            vr.valid = outcome.valid
+            vr.schema_valid = outcome.schema_valid
+            vr.errors = outcome.errors
+            vr.checker_version = self.checker.version
         vr.status = ValidationStatus.COMPLETED
-        vr.schema_valid = outcome.schema_valid
-        vr.errors = outcome.errors
-        vr.checker_version = self.checker.version
         vr.checked_at = datetime.now(UTC)
 
         await self.uow.commit()
@@ -81,6 +93,20 @@ class ValidationService:
         if self.notifier is not None:
             await self.notifier.validation_status_changed(vr)
 
+    async def _precheck(self, test: TestCase) -> list[dict]:
+        started_at = time.perf_counter()
+        blocks = await self.uow.layouts.block_geometry(test.layout_owner_id)
+        regions = await self.uow.layouts.region_geometry(test.layout_owner_id)
+        issues = analyze_layout(blocks, regions)
+        logger.info("validation.prechecked", extra={
+            "test_id": test.id,
+            "blocks": len(blocks),
+            "regions": len(regions),
+            "issues": len(issues),
+            "duration_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        })
+        return issues
+
     async def list_for_test(self, test_id: int) -> list[ValidationDomain]:
         if await self.uow.tests.find_by_id(test_id) is None:
             raise TestNotFoundError(test_id)
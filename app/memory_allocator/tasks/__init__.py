@@ -1,6 +1,13 @@
 from app.memory_allocator.tasks.tasks_dlq import drain_dlq
+from app.memory_allocator.tasks.tasks_facet_rollup import compact_facet_rollup
 from app.memory_allocator.tasks.tasks_sweeper import sweep_stale_jobs
 from app.memory_allocator.tasks.tasks_testcase import process_test
 from app.memory_allocator.tasks.tasks_validation import process_validation
 
-__all__ = ["process_test", "process_validation", "sweep_stale_jobs", "drain_dlq"]
+__all__ = [
+    "process_test",
+    "process_validation",
+    "sweep_stale_jobs",
+    "drain_dlq",
+    "compact_facet_rollup",
+]
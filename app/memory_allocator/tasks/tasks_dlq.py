@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import time
 
@@ -8,9 +7,11 @@ from app.core.celery_app import DEAD_LETTER_QUEUE, celery_app
 from app.core.config import get_settings
 from app.core.events import build_event_bus
 from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
 from app.memory_allocator.notifications import StatusNotifier
 from app.memory_allocator.schemas import DeadLetterMessage
 from app.memory_allocator.services.deadletter_service import DeadLetterService
+from app.memory_allocator.utils.count_cache import build_count_cache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -20,7 +21,7 @@ settings = get_settings()
 def drain_dlq() -> int:
     started_at = time.monotonic()
     logger.debug("task.started", extra={"task": "drain_dlq"})
-    drained = asyncio.run(_drain())
+    drained = run_async(_drain())
     logger.log(logging.INFO if drained > 0 else logging.DEBUG,
                "task.finished", extra={
                    "task": "drain_dlq",
@@ -30,8 +31,8 @@ def drain_dlq() -> int:
 
 
 async def _drain() -> int:
-    async with build_uow() as uow, build_event_bus() as bus:
-        notifier = StatusNotifier(bus)
+    async with build_uow() as uow, build_event_bus() as bus, build_count_cache() as count_cache:
+        notifier = StatusNotifier(bus, count_cache)
         service = DeadLetterService(uow, notifier)
         drained = 0
         with celery_app.connection_for_write() as conn:
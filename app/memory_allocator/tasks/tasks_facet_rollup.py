@@ -0,0 +1,26 @@
+import logging
+import time
+
+from app.core.celery_app import celery_app
+from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
+from app.memory_allocator.services.testcase_service import TestcaseService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="memory_allocator.compact_facet_rollup", max_retries=0)
+def compact_facet_rollup() -> int:
+    started_at = time.monotonic()
+    logger.debug("task.started", extra={"task": "compact_facet_rollup"})
+    compacted = run_async(_compact())
+    logger.debug("task.finished", extra={
+        "task": "compact_facet_rollup",
+        "duration_ms": round((time.monotonic() - started_at) * 1000),
+        "compacted": compacted})
+    return compacted
+
+
+async def _compact() -> int:
+    async with build_uow() as uow:
+        return await TestcaseService(uow).compact_facet_rollup()
@@ -0,0 +1,59 @@
+import logging
+import time
+from datetime import UTC, datetime
+
+from app.core.celery_app import celery_app
+from app.core.dependencies import get_storage
+from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
+from app.memory_allocator.enums import LayoutExportStatus
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    bind=True,
+    name="memory_allocator.export_layout",
+    max_retries=3,
+    acks_late=True
+)
+def export_layout(self, export_id: int) -> None:
+    started_at = time.monotonic()
+    logger.info("task.started", extra={
+        "task": "export_layout",
+        "export_id": export_id,
+        "retry": self.request.retries,
+    })
+    try:
+        run_async(_export_layout(export_id))
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            run_async(_mark_failed(export_id))
+            logger.error("layout_export.retries_exhausted", extra={
+                "export_id": export_id, "max_retries": self.max_retries
+            })
+            return
+        raise self.retry(exc=exc, countdown=min(2 ** self.request.retries, 60)) from exc
+    else:
+        logger.info("task.finished", extra={
+            "task": "export_layout",
+            "export_id": export_id,
+            "duration_ms": round((time.monotonic() - started_at) * 1000),
+        })
+
+
+async def _export_layout(export_id: int) -> None:
+    async with build_uow() as uow:
+        service = LayoutExportService(uow, get_storage())
+        await service.perform_export(export_id)
+
+
+async def _mark_failed(export_id: int) -> None:
+    async with build_uow() as uow:
+        export = await uow.layout_exports.find_by_id(export_id)
+        if export is None:
+            return
+        export.status = LayoutExportStatus.FAILED
+        export.finished_at = datetime.now(UTC)
+        await uow.commit()
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import time
 from datetime import timedelta
@@ -6,6 +5,7 @@ from datetime import timedelta
 from app.core.celery_app import celery_app
 from app.core.config import get_settings
 from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
 from app.memory_allocator.services.sweeper_service import SweeperService
 from app.memory_allocator.tasks.tasks_testcase import process_test
 from app.memory_allocator.tasks.tasks_validation import process_validation
@@ -21,7 +21,7 @@ settings = get_settings()
 def sweep_stale_jobs() -> dict[str, int]:
     started_at = time.monotonic()
     logger.debug("task.started", extra={"task": "sweep_stale_jobs"})
-    requeued = asyncio.run(_sweep())
+    requeued = run_async(_sweep())
     logger.log(logging.INFO if any(requeued.values()) else logging.DEBUG,
                "task.finished", extra={
                    "task": "sweep_stale_jobs",
@@ -1,17 +1,23 @@
-import asyncio
 import logging
+import tempfile
 import time
 
 from app.core.celery_app import celery_app
+from app.core.config import get_settings
 from app.core.dependencies import get_storage
 from app.core.events import build_event_bus
 from app.core.exceptions import DomainError
 from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
 from app.memory_allocator.enums import TestStatus
 from app.memory_allocator.notifications import StatusNotifier
 from app.memory_allocator.services import IngestionService
+from app.memory_allocator.utils.count_cache import build_count_cache
+from app.memory_allocator.utils.parse_cache import build_parse_cache
+from app.memory_allocator.utils.thread_utils import OffloadMode
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @celery_app.task(
@@ -28,10 +34,10 @@ def process_test(self, test_id: int) -> None:
         "retry": self.request.retries,
     })
     try:
-        asyncio.run(_process_test(test_id))
+        run_async(_process_test(test_id))
     except Exception as exc:
         if self.request.retries >= self.max_retries:
-            asyncio.run(_mark_error(test_id, "Internal processing error after retries"))
+            run_async(_mark_error(test_id, "Internal processing error after retries"))
             logger.error("test.retries_exhausted", extra={
                 "test_id": test_id,
                 "max_retries": self.max_retries
@@ -47,8 +53,9 @@ def process_test(self, test_id: int) -> None:
 
 
 async def _process_test(test_id: int) -> None:
-    async with build_uow() as uow, build_event_bus() as bus:
-        notifier = StatusNotifier(bus)
+    async with (build_uow() as uow, build_event_bus() as bus,
+                build_parse_cache() as parse_cache, build_count_cache() as count_cache):
+        notifier = StatusNotifier(bus, count_cache)
         test = await uow.tests.find_for_processing(test_id)
         if test is None:
             logger.error("test.not_found", extra={"test_id": test_id})
@@ -64,10 +71,19 @@ async def _process_test(test_id: int) -> None:
         storage_key = f"uploads/{test_id}.zip"
         storage = get_storage()
         try:
-            content = await storage.load(storage_key)
+            archive = await _spool(storage, storage_key)
 
-            service = IngestionService(uow, storage, notifier=notifier)
-            await service.process_upload(test, content)
+            service = IngestionService(
+                uow, storage, notifier=notifier,
+                bulk_persist=settings.INGESTION_BULK_PERSIST,
+                parse_mode=OffloadMode(settings.PARSE_EXECUTOR),
+                parse_cache=parse_cache,
+                artifact_concurrency=settings.ARTIFACT_UPLOAD_CONCURRENCY,
+                precompress_min_bytes=(settings.ARTIFACT_PRECOMPRESS_MIN_BYTES
+                                       if settings.ARTIFACT_PRECOMPRESS_ENABLED else None),
+            )
+            with archive:
+                await service.process_upload(test, archive)
         except DomainError as exc:
             await uow.rollback()
             test.status = TestStatus.ERROR
@@ -83,8 +99,8 @@ async def _process_test(test_id: int) -> None:
 
 
 async def _mark_error(test_id: int, message: str) -> None:
-    async with build_uow() as uow, build_event_bus() as bus:
-        notifier = StatusNotifier(bus)
+    async with build_uow() as uow, build_event_bus() as bus, build_count_cache() as count_cache:
+        notifier = StatusNotifier(bus, count_cache)
         test = await uow.tests.find_by_id(test_id)
         if test is None:
             return
@@ -94,6 +110,20 @@ async def _mark_error(test_id: int, message: str) -> None:
         await notifier.test_status_changed(test)
 
 
+async def _spool(storage, key: str) -> tempfile.SpooledTemporaryFile:
+    """Copy an object into a temp file that stays in memory up to STORAGE_SPOOL_MAX_BYTES."""
+    archive = tempfile.SpooledTemporaryFile(max_size=settings.STORAGE_SPOOL_MAX_BYTES)
+    try:
+        async with storage.open_read(key) as reader:
+            async for chunk in reader:
+                archive.write(chunk)
+    except BaseException:
+        archive.close()
+        raise
+    archive.seek(0)
+    return archive
+
+
 async def _safe_delete(storage, key: str) -> None:
     try:
         await storage.delete(key)
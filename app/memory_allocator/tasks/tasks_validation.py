@@ -1,16 +1,18 @@
-import asyncio
 import logging
 import time
 
 from app.core.celery_app import celery_app
+from app.core.config import get_settings
 from app.core.events import build_event_bus
 from app.core.unit_of_work import build_uow
+from app.core.worker_runtime import run_async
 from app.memory_allocator.checker import get_checker
 from app.memory_allocator.enums import ValidationStatus
 from app.memory_allocator.notifications import StatusNotifier
 from app.memory_allocator.services import ValidationService
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @celery_app.task(
@@ -27,10 +29,10 @@ def process_validation(self, validation_id: int) -> None:
         "retry": self.request.retries,
     })
     try:
-        asyncio.run(_process_validation(validation_id))
+        run_async(_process_validation(validation_id))
     except Exception as exc:
         if self.request.retries >= self.max_retries:
-            asyncio.run(_mark_failed(validation_id))
+            run_async(_mark_failed(validation_id))
             logger.error("validation.retries_exhausted", extra={
                 "validation_id": validation_id, "max_retries": self.max_retries
             })
@@ -47,7 +49,10 @@ def process_validation(self, validation_id: int) -> None:
 async def _process_validation(validation_id: int) -> None:
     async with build_uow() as uow, build_event_bus() as bus:
         notifier = StatusNotifier(bus)
-        service = ValidationService(uow, get_checker(), notifier=notifier)
+        service = ValidationService(
+            uow, get_checker(), notifier=notifier,
+            precheck=settings.VALIDATION_PRECHECK_ENABLED,
+        )
         await service.perform_validation(validation_id)
 
 
@@ -0,0 +1,43 @@
+import re
+import zipfile
+from collections.abc import Iterable, Iterator
+from pathlib import PurePosixPath
+from typing import NamedTuple
+
+
+class ArchiveMember(NamedTuple):
+    """
+    File of an uploaded archive, not decompressed: read it with ZipFile.read or stream it
+    with ZipFile.open. `path` is relative to the archive root.
+    """
+    info: zipfile.ZipInfo
+
+    @property
+    def path(self) -> str:
+        return self.info.filename
+
+    @property
+    def size(self) -> int:
+        return self.info.file_size
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.path).name
+
+    @property
+    def is_top_level(self) -> bool:
+        return "/" not in self.path.strip("/")
+
+
+def iter_members(archive: zipfile.ZipFile, patterns: Iterable[str]) -> Iterator[ArchiveMember]:
+    """
+    Members whose file name matches one of the patterns, one at a time. Only the central
+    directory is read: nothing is decompressed until the caller reads a member.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        name = PurePosixPath(info.filename).name
+        if any(pattern.match(name) for pattern in compiled):
+            yield ArchiveMember(info)
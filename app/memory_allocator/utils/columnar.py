@@ -0,0 +1,119 @@
+from collections.abc import Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.memory_allocator.enums import ColumnarFormat, LayoutTable
+
+# Columns of the export, in the order the queries of TestRepository._layout_block_rows
+# and _layout_region_rows select them. Ids are int4 in the database, addresses and sizes int8
+BLOCK_SCHEMA = pa.schema([
+    ("test_id", pa.int32()),
+    ("module_id", pa.int32()),
+    ("module", pa.string()),
+    ("partition_id", pa.int32()),
+    ("partition", pa.string()),
+    ("space_id", pa.int32()),
+    ("block_id", pa.int32()),
+    ("name", pa.string()),
+    ("access", pa.string()),
+    ("align", pa.int64()),
+    ("cache_policy", pa.string()),
+    ("content_type", pa.string()),
+    ("init_file", pa.string()),
+    ("init_stage", pa.string()),
+    ("init_type", pa.string()),
+    ("is_contiguous", pa.bool_()),
+    ("is_shadow", pa.bool_()),
+    ("is_system", pa.bool_()),
+    ("no_shadow", pa.bool_()),
+    ("vaddr", pa.int64()),
+    ("paddr", pa.int64()),
+    ("size", pa.int64()),
+    ("shadow_offset", pa.int64()),
+    ("shadow_scale", pa.int64()),
+    ("shadow_type", pa.string()),
+    ("safety_zone_before", pa.int64()),
+    ("safety_zone_after", pa.int64()),
+    ("safety_zone_before_unmapped", pa.bool_()),
+    ("safety_zone_after_unmapped", pa.bool_()),
+])
+
+REGION_SCHEMA = pa.schema([
+    ("test_id", pa.int32()),
+    ("block_id", pa.int32()),
+    ("region_id", pa.int32()),
+    ("vaddr", pa.int64()),
+    ("paddr", pa.int64()),
+    ("size", pa.int64()),
+])
+
+SCHEMAS = {LayoutTable.BLOCKS: BLOCK_SCHEMA, LayoutTable.REGIONS: REGION_SCHEMA}
+MEDIA_TYPES = {
+    ColumnarFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ColumnarFormat.PARQUET: "application/vnd.apache.parquet",
+}
+EXTENSIONS = {ColumnarFormat.ARROW: "arrows", ColumnarFormat.PARQUET: "parquet"}
+
+
+class _ChunkSink:
+    """Write-only file object keeping what pyarrow writes until it is taken."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def record_batch(rows: Sequence[Sequence], schema: pa.Schema) -> pa.RecordBatch:
+    """Row tuples with the columns of the schema, in its order, as one record batch."""
+    columns = list(zip(*rows, strict=True)) if rows else [()] * len(schema)
+    arrays = [pa.array(column, type=field.type)
+              for column, field in zip(columns, schema, strict=True)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ColumnarWriter:
+    """
+    Produces an Arrow IPC stream or a Parquet file as a sequence of byte chunks, one
+    record batch at a time. Neither format needs to seek: Arrow frames every batch on
+    its own and Parquet writes each batch as a row group with the footer in finish(),
+    so memory stays bounded by one batch whatever the export size.
+    """
+
+    def __init__(self, schema: pa.Schema, fmt: ColumnarFormat):
+        self.schema = schema
+        self.rows_written = 0
+        self.bytes_written = 0
+        self._sink = _ChunkSink()
+        if fmt == ColumnarFormat.PARQUET:
+            self._writer = pq.ParquetWriter(self._sink, schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, schema)
+
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        if rows:
+            self._writer.write_batch(record_batch(rows, self.schema))
+            self.rows_written += len(rows)
+        return self._take()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._take()
+
+    def _take(self) -> bytes:
+        data = self._sink.take()
+        self.bytes_written += len(data)
+        return data
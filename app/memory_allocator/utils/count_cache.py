@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.memory_allocator.schemas import TestFilter
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def filter_digest(filters: TestFilter, user_id: uuid.UUID) -> str:
+    """
+    Hash of the rows a filter selects: list order, duplicates, empty lists and the case of
+    `name` (matched case-insensitively) do not change it; the user only counts with `mine`.
+    """
+    normalized = {
+        "statuses": sorted({str(s) for s in filters.statuses or ()}),
+        "name": filters.name.lower() if filters.name else None,
+        "platform_ids": sorted(set(filters.platform_ids or ())),
+        "tags": sorted(set(filters.tags or ())),
+        "user_id": str(user_id) if filters.mine else None,
+        "metrics": {str(metric): list(bounds) for metric, bounds in filters.metric_bounds.items()},
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CountLookup(NamedTuple):
+    """
+    Cached total, None on a miss, and the key a total counted after the lookup goes under;
+    no key when the cache could not be reached.
+    """
+    key: str | None
+    total: int | None
+
+
+class CountCache(ABC):
+    """
+    Totals of filtered test listings keyed by filter_digest. invalidate() drops every entry
+    at once. A total counted after a miss is stored with set() under the key of the lookup,
+    so an invalidation while counting is never hidden. Cache failures are logged and
+    treated as misses.
+    """
+    async def get(self, digest: str) -> CountLookup:
+        key = None
+        try:
+            key = await self._key(digest)
+            return CountLookup(key, await self._get(key))
+        except Exception as exc:
+            logger.warning("count_cache.get_failed", extra={"digest": digest, "error": str(exc)})
+            return CountLookup(key, None)
+
+    async def set(self, key: str | None, total: int) -> None:
+        if key is None:
+            return
+        try:
+            await self._set(key, total)
+        except Exception as exc:
+            logger.warning("count_cache.set_failed", extra={"key": key, "error": str(exc)})
+
+    async def invalidate(self) -> None:
+        try:
+            await self._invalidate()
+        except Exception as exc:
+            logger.warning("count_cache.invalidate_failed", extra={"error": str(exc)})
+
+    @abstractmethod
+    async def _key(self, digest: str) -> str: ...
+
+    @abstractmethod
+    async def _get(self, key: str) -> int | None: ...
+
+    @abstractmethod
+    async def _set(self, key: str, total: int) -> None: ...
+
+    @abstractmethod
+    async def _invalidate(self) -> None: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+class RedisCountCache(CountCache):
+    """
+    Entries live under the current generation; invalidating bumps it, so stale totals are
+    never read again and simply expire after ttl_seconds.
+    """
+    GENERATION_KEY = "test_count:generation"
+
+    def __init__(self, client: Redis, ttl_seconds: int):
+        self._client = client
+        self._ttl_seconds = ttl_seconds
+
+    async def _key(self, digest: str) -> str:
+        generation = await self._client.get(self.GENERATION_KEY)
+        return f"test_count:{int(generation or 0)}:{digest}"
+
+    async def _get(self, key: str) -> int | None:
+        raw = await self._client.get(key)
+        return None if raw is None else int(raw)
+
+    async def _set(self, key: str, total: int) -> None:
+        await self._client.set(key, total, ex=self._ttl_seconds)
+
+    async def _invalidate(self) -> None:
+        await self._client.incr(self.GENERATION_KEY)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class _CountCacheHolder:
+    cache: CountCache | None = None
+
+
+_holder = _CountCacheHolder()
+
+
+def create_count_cache() -> CountCache:
+    client = Redis.from_url(settings.REDIS_CACHE_URL, health_check_interval=30)
+    return RedisCountCache(client, ttl_seconds=settings.TEST_COUNT_CACHE_TTL_SECONDS)
+
+
+def init_count_cache(cache: CountCache) -> None:
+    _holder.cache = cache
+
+
+async def close_count_cache() -> None:
+    if _holder.cache is not None:
+        await _holder.cache.close()
+        _holder.cache = None
+
+
+def current_count_cache() -> CountCache | None:
+    return _holder.cache
+
+
+@asynccontextmanager
+async def build_count_cache() -> AsyncIterator[CountCache]:
+    cache = create_count_cache()
+    try:
+        yield cache
+    finally:
+        await cache.close()
@@ -0,0 +1,23 @@
+import base64
+import binascii
+import json
+
+MAX_TEST_ID = (1 << 31) - 1  # tests.id is int4
+
+
+def encode_cursor(test_id: int) -> str:
+    """Opaque cursor pointing right after the test case `test_id` of a listing."""
+    payload = json.dumps({"id": test_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Test case id of a cursor made by encode_cursor; ValueError if it is malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        test_id = payload["id"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as exc:
+        raise ValueError("malformed cursor") from exc
+    if not isinstance(test_id, int) or isinstance(test_id, bool) or not 1 <= test_id <= MAX_TEST_ID:
+        raise ValueError("malformed cursor")
+    return test_id
@@ -0,0 +1,170 @@
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from app.memory_allocator.enums import LayoutIssueKind
+
+# Bump whenever analyze_layout starts reporting different issues: it is stored as the
+# checker version of the validations it decides
+ANALYZER_VERSION = "layout-precheck-1"
+MAX_ISSUES = 100
+
+
+class BlockGeometry(NamedTuple):
+    """Placement of one block. `space` identifies its virtual address space."""
+    id: int
+    name: str
+    space: int
+    vaddr: int | None
+    paddr: int | None
+    size: int | None
+    align: int
+    safety_zone_before: int
+    safety_zone_after: int
+
+
+class RegionGeometry(NamedTuple):
+    block_id: int
+    vaddr: int
+    paddr: int
+    size: int
+
+
+def _int_column(values: Sequence[int | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Values as int64 with nulls zeroed, and the mask of the non-null ones."""
+    raw = np.array(values, dtype=object)
+    present = np.not_equal(raw, None)
+    raw[~present] = 0
+    return raw.astype(np.int64), present.astype(bool)
+
+
+def _conflicts(
+    space: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    before: np.ndarray | None = None,
+    after: np.ndarray | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Pairs of indices whose extents `[start, end)` overlap within one space, each extent
+    guarded by `before`/`after` addresses no other extent may enter (the guards of two
+    extents may overlap each other). Sorts by (space, start) and sweeps every space
+    keeping the furthest end seen so far, so it costs O(n log n) and reports for each
+    extent one earlier extent it collides with.
+    """
+    order = np.lexsort((start, space))
+    space, start, end = space[order], start[order], end[order]
+    before = np.zeros_like(start) if before is None else before[order]
+    guarded_end = end if after is None else end + after[order]
+
+    pairs = []
+    for first, last in _runs(space):
+        if last - first < 2:
+            continue
+        s, e, g = start[first:last], end[first:last], guarded_end[first:last]
+        core_reach, core_from = _running_max(e)
+        guard_reach, guard_from = _running_max(g)
+        # Compare each extent with every earlier one, i.e. with the prefix before it
+        hits_core = core_reach[:-1] > s[1:] - before[first + 1:last]
+        hits_guard = guard_reach[:-1] > s[1:]
+        for i in np.flatnonzero(hits_core | hits_guard):
+            partner = core_from[i] if hits_core[i] else guard_from[i]
+            pairs.append((int(order[first + partner]), int(order[first + i + 1])))
+    return pairs
+
+
+def _runs(keys: np.ndarray) -> list[tuple[int, int]]:
+    """[first, last) bounds of the runs of equal values of a sorted array."""
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist(), strict=True))
+
+
+def _running_max(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Prefix maxima and, for each prefix, the index of an element holding the maximum."""
+    reach = np.maximum.accumulate(values)
+    positions = np.arange(len(values))
+    holder = np.maximum.accumulate(np.where(values == reach, positions, 0))
+    return reach, holder
+
+
+def analyze_layout(
+    blocks: Sequence[BlockGeometry],
+    regions: Sequence[RegionGeometry],
+    max_issues: int = MAX_ISSUES,
+) -> list[dict]:
+    """
+    Find layout errors no valid test case can have, without the external checker:
+    blocks overlapping in their virtual address space (safety zones included), regions
+    overlapping in physical memory within one address space, `align` values that are not
+    a power of two, block addresses that are not a multiple of `align`, and regions
+    reaching outside their block. Blocks with no size or address are not placed and are
+    skipped by the checks needing it; empty extents never overlap.
+
+    Physical overlaps across address spaces are left to the checker: memory shared
+    between partitions is not stored, so it cannot be told from a collision.
+    """
+    if not blocks:
+        return []
+    ids = np.array([b.id for b in blocks], dtype=np.int64)
+    space = np.array([b.space for b in blocks], dtype=np.int64)
+    vaddr, has_vaddr = _int_column([b.vaddr for b in blocks])
+    paddr, has_paddr = _int_column([b.paddr for b in blocks])
+    size, has_size = _int_column([b.size for b in blocks])
+    align = np.array([b.align for b in blocks], dtype=np.int64)
+    before = np.array([b.safety_zone_before for b in blocks], dtype=np.int64)
+    after = np.array([b.safety_zone_after for b in blocks], dtype=np.int64)
+
+    issues: list[dict] = []
+
+    def report(kind: LayoutIssueKind, indices, message: str) -> None:
+        issues.append({
+            "check": str(kind),
+            "blocks": [blocks[i].name for i in indices],
+            "message": message,
+        })
+
+    valid_align = (align > 0) & ((align & (align - 1)) == 0)
+    for i in np.flatnonzero(~valid_align):
+        report(LayoutIssueKind.BAD_ALIGN, [i], f"align {align[i]} is not a power of two")
+    for name, address, present in (("vaddr", vaddr, has_vaddr), ("paddr", paddr, has_paddr)):
+        misaligned = valid_align & present & (address % np.where(valid_align, align, 1) != 0)
+        for i in np.flatnonzero(misaligned):
+            report(LayoutIssueKind.MISALIGNED, [i],
+                   f"{name} {address[i]:#x} is not aligned to {align[i]}")
+
+    placed = np.flatnonzero(has_vaddr & has_size & (size > 0))
+    for a, b in _conflicts(space[placed], vaddr[placed], vaddr[placed] + size[placed],
+                           before[placed], after[placed]):
+        report(LayoutIssueKind.VIRTUAL_OVERLAP, [placed[a], placed[b]],
+               "blocks overlap in virtual memory, safety zones included")
+
+    if regions:
+        region_block = np.array([r.block_id for r in regions], dtype=np.int64)
+        region_vaddr = np.array([r.vaddr for r in regions], dtype=np.int64)
+        region_paddr = np.array([r.paddr for r in regions], dtype=np.int64)
+        region_size = np.array([r.size for r in regions], dtype=np.int64)
+        by_id = np.argsort(ids)
+        owner = by_id[np.searchsorted(ids, region_block, sorter=by_id)]
+
+        block_end = vaddr[owner] + size[owner]
+        outside = has_vaddr[owner] & has_size[owner] & (
+            (region_vaddr < vaddr[owner]) | (region_vaddr + region_size > block_end)
+        )
+        block_pend = paddr[owner] + size[owner]
+        outside |= has_paddr[owner] & has_size[owner] & (
+            (region_paddr < paddr[owner]) | (region_paddr + region_size > block_pend)
+        )
+        for r in np.flatnonzero(outside):
+            report(LayoutIssueKind.REGION_OUTSIDE_BLOCK, [owner[r]],
+                   f"region {region_vaddr[r]:#x} (paddr {region_paddr[r]:#x}, size "
+                   f"{region_size[r]:#x}) lies outside its block")
+
+        nonempty = np.flatnonzero(region_size > 0)
+        for a, b in _conflicts(space[owner[nonempty]], region_paddr[nonempty],
+                               region_paddr[nonempty] + region_size[nonempty]):
+            report(LayoutIssueKind.PHYSICAL_OVERLAP,
+                   [owner[nonempty[a]], owner[nonempty[b]]],
+                   "regions overlap in physical memory")
+
+    return issues[:max_issues]
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import shutil
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.memory_allocator.utils.parser import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _dumps(data: dict) -> bytes:
+    # JSON, never pickle: whoever can write a cache entry must not get code execution
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class ParseCache(ABC):
+    """
+    Parsed YAML documents keyed by the SHA-256 of the raw file. Entries written by another
+    PARSER_VERSION are never returned. Entries are stored as JSON; documents JSON cannot
+    give back unchanged (e.g. with integer keys or timestamps) are not cached, so a hit is
+    always equal to a fresh parse. Cache failures are logged and treated as misses.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def get(self, digest: str) -> dict | None:
+        try:
+            data = await self._get(digest)
+        except Exception as exc:
+            logger.warning("parse_cache.get_failed", extra={"digest": digest, "error": str(exc)})
+            data = None
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        await self._record(hit=data is not None)
+        return data
+
+    async def set(self, digest: str, data: dict) -> None:
+        try:
+            payload = _dumps(data)
+            if json.loads(payload) != data:
+                logger.info("parse_cache.not_cacheable", extra={"digest": digest})
+                return
+            await self._set(digest, payload)
+        except Exception as exc:
+            logger.warning("parse_cache.set_failed", extra={"digest": digest, "error": str(exc)})
+
+    async def _record(self, hit: bool) -> None:
+        return None
+
+    @abstractmethod
+    async def _get(self, digest: str) -> dict | None: ...
+
+    @abstractmethod
+    async def _set(self, digest: str, payload: bytes) -> None: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+class RedisParseCache(ParseCache):
+    """
+    Entries expire after ttl_seconds without a hit: every hit slides the expiry, so under
+    memory pressure a volatile-lru Redis evicts the least recently used parses first.
+    """
+    STATS_KEY = "parse_cache:stats"
+
+    def __init__(self, client: Redis, ttl_seconds: int):
+        super().__init__()
+        self._client = client
+        self._ttl_seconds = ttl_seconds
+
+    def _key(self, digest: str) -> str:
+        return f"parse_cache:{PARSER_VERSION}:{digest}"
+
+    async def _get(self, digest: str) -> dict | None:
+        raw = await self._client.getex(self._key(digest), ex=self._ttl_seconds)
+        return None if raw is None else json.loads(raw)
+
+    async def _set(self, digest: str, payload: bytes) -> None:
+        await self._client.set(self._key(digest), payload, ex=self._ttl_seconds)
+
+    async def _record(self, hit: bool) -> None:
+        try:
+            await self._client.hincrby(self.STATS_KEY, "hits" if hit else "misses", 1)
+        except Exception as exc:
+            logger.debug("parse_cache.stats_failed", extra={"error": str(exc)})
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class DiskParseCache(ParseCache):
+    """
+    One JSON file per entry under base_path/PARSER_VERSION. Hits refresh the file mtime;
+    entries older than ttl_seconds are dropped and the least recently used ones are
+    evicted once there are more than max_entries.
+    """
+    def __init__(self, base_path: Path, ttl_seconds: int, max_entries: int):
+        super().__init__()
+        self._root = base_path
+        self._dir = base_path / PARSER_VERSION
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+
+    def _path(self, digest: str) -> Path:
+        return self._dir / f"{digest}.json"
+
+    async def _get(self, digest: str) -> dict | None:
+        return await asyncio.to_thread(self._read, self._path(digest))
+
+    async def _set(self, digest: str, payload: bytes) -> None:
+        await asyncio.to_thread(self._write, self._path(digest), payload)
+
+    def _read(self, path: Path) -> dict | None:
+        try:
+            if time.time() - path.stat().st_mtime > self._ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            data = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        path.touch()
+        return data
+
+    def _write(self, path: Path, payload: bytes) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(payload)
+        tmp_path.replace(path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self._dir.glob("*.json"):
+            try:
+                entries.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        expired_before = time.time() - self._ttl_seconds
+        overflow = len(entries) - self._max_entries
+        for index, (mtime, entry) in enumerate(entries):
+            if index < overflow or mtime < expired_before:
+                entry.unlink(missing_ok=True)
+
+    def purge_stale_versions(self) -> None:
+        if not self._root.is_dir():
+            return
+        for child in self._root.iterdir():
+            if child.is_dir() and child.name != PARSER_VERSION:
+                shutil.rmtree(child, ignore_errors=True)
+        # Entries of the former pickle format
+        for entry in self._dir.glob("*.pickle"):
+            entry.unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        return None
+
+
+def create_parse_cache() -> ParseCache | None:
+    if settings.PARSE_CACHE_BACKEND == "redis":
+        client = Redis.from_url(settings.REDIS_CACHE_URL, health_check_interval=30)
+        return RedisParseCache(client, ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS)
+    if settings.PARSE_CACHE_BACKEND == "disk":
+        cache = DiskParseCache(
+            Path(settings.PARSE_CACHE_PATH),
+            ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+            max_entries=settings.PARSE_CACHE_MAX_ENTRIES,
+        )
+        cache.purge_stale_versions()
+        return cache
+    return None
+
+
+@asynccontextmanager
+async def build_parse_cache() -> AsyncIterator[ParseCache | None]:
+    cache = create_parse_cache()
+    try:
+        yield cache
+    finally:
+        if cache is not None:
+            await cache.close()
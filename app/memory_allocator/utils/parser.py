@@ -1,18 +1,154 @@
 import yaml
 
+# Bump whenever parse_yaml starts producing different data: cached parses are keyed by it
+PARSER_VERSION = "1"
+
+JET_MAPPING_TAGS = (
+    '!JetMemoryBlock',
+    '!PartitionMemoryBlocks',
+    '!JetMemoryBlockSharing',
+    '!JetMemoryBlockRef',
+    '!AMP_PhysMemoryBlockGroupRef',
+)
+JET_FLOAT_TAGS = ('!float', '!double')
+
 
 class YAMLLoader(yaml.SafeLoader):
     pass
 
 
-YAMLLoader.add_constructor('!JetMemoryBlock', yaml.SafeLoader.construct_mapping)
-YAMLLoader.add_constructor('!PartitionMemoryBlocks', yaml.SafeLoader.construct_mapping)
-YAMLLoader.add_constructor('!JetMemoryBlockSharing', yaml.SafeLoader.construct_mapping)
-YAMLLoader.add_constructor('!JetMemoryBlockRef', yaml.SafeLoader.construct_mapping)
-YAMLLoader.add_constructor('!AMP_PhysMemoryBlockGroupRef', yaml.SafeLoader.construct_mapping)
-YAMLLoader.add_constructor('!float', yaml.SafeLoader.construct_yaml_float)
-YAMLLoader.add_constructor('!double', yaml.SafeLoader.construct_yaml_float)
+def _register_jet_tags(loader: type[yaml.SafeLoader]) -> None:
+    for tag in JET_MAPPING_TAGS:
+        loader.add_constructor(tag, yaml.SafeLoader.construct_mapping)
+    for tag in JET_FLOAT_TAGS:
+        loader.add_constructor(tag, yaml.SafeLoader.construct_yaml_float)
+
+
+_register_jet_tags(YAMLLoader)
+
+if yaml.__with_libyaml__:
+    class CYAMLLoader(yaml.CSafeLoader):
+        pass
+
+    _register_jet_tags(CYAMLLoader)
+    FastestLoader: type = CYAMLLoader
+else:
+    FastestLoader = YAMLLoader
+
+
+def parse_yaml(content: str | bytes) -> dict:
+    return yaml.load(content, Loader=FastestLoader)
+
+
+class _IrregularDocumentError(Exception):
+    """The document uses YAML features the event counter does not model."""
+
+
+_COLLECTION_START = (yaml.SequenceStartEvent, yaml.MappingStartEvent)
+_COLLECTION_END = (yaml.SequenceEndEvent, yaml.MappingEndEvent)
+
+
+def count_output_entries(content: str | bytes) -> tuple[int, int]:
+    """
+    Count `kernel_entries` and the items of every `user_entries.map_entries` space.
+    Walks the parser event stream so no node tree is built. Documents with explicit tags,
+    or with aliases, merge keys or duplicate keys along the counted paths fall back to a
+    full parse so the result always matches parse_yaml.
+    """
+    try:
+        return _count_output_entries_streaming(content)
+    except _IrregularDocumentError:
+        return _count_output_entries_parsed(content)
+
+
+def _count_output_entries_parsed(content: str | bytes) -> tuple[int, int]:
+    data = parse_yaml(content)
+    if not data:
+        return 0, 0
+    kernel_count = len(data.get("kernel_entries", []))
+    map_entries = data.get("user_entries", {}).get("map_entries", [])
+    user_count = sum(len(space) for space in map_entries)
+    return kernel_count, user_count
+
+
+def _count_output_entries_streaming(content: str | bytes) -> tuple[int, int]:
+    events = yaml.parse(content, Loader=FastestLoader)
+    next(events)  # StreamStartEvent
+    if isinstance(next(events), yaml.StreamEndEvent):
+        return 0, 0
+    kernel_count = user_count = 0
+    for key in _mapping_keys(events, _node_start(events)):
+        if key == "kernel_entries":
+            kernel_count = _count_items(events, _node_start(events, yaml.SequenceStartEvent))
+        elif key == "user_entries":
+            for user_key in _mapping_keys(events, _node_start(events)):
+                if user_key == "map_entries":
+                    _node_start(events, yaml.SequenceStartEvent)
+                    while not isinstance(space := next(events), yaml.SequenceEndEvent):
+                        user_count += _count_items(events, _structural(space))
+                else:
+                    _skip_node(events, _node_start(events, None))
+        else:
+            _skip_node(events, _node_start(events, None))
+    next(events)  # DocumentEndEvent
+    if not isinstance(next(events), yaml.StreamEndEvent):
+        raise _IrregularDocumentError("multiple documents")
+    return kernel_count, user_count
+
+
+def _node_start(events, expected: type | None = yaml.MappingStartEvent) -> yaml.Event:
+    event = next(events)
+    if expected is None:
+        return _untagged(event)
+    event = _structural(event)
+    if not isinstance(event, expected):
+        raise _IrregularDocumentError(f"unexpected {type(event).__name__}")
+    return event
+
+
+def _untagged(event: yaml.Event) -> yaml.Event:
+    # Explicit tags may fail to construct under parse_yaml, so they are left to it
+    if getattr(event, "tag", None) is not None:
+        raise _IrregularDocumentError(f"explicit tag {event.tag}")
+    return event
+
+
+def _structural(event: yaml.Event) -> yaml.Event:
+    # An alias would have to be resolved to know what it counts as
+    if isinstance(event, yaml.AliasEvent):
+        raise _IrregularDocumentError(f"alias *{event.anchor}")
+    return _untagged(event)
+
+
+def _mapping_keys(events, start: yaml.Event):
+    """Yield the plain scalar keys of a mapping; the caller must consume each value."""
+    if not isinstance(start, yaml.MappingStartEvent):
+        raise _IrregularDocumentError("expected a mapping")
+    seen = set()
+    while not isinstance(event := next(events), yaml.MappingEndEvent):
+        if not isinstance(_untagged(event), yaml.ScalarEvent) or event.value == "<<":
+            raise _IrregularDocumentError("complex or merge key")
+        if event.value in seen:
+            raise _IrregularDocumentError(f"duplicate key {event.value!r}")
+        seen.add(event.value)
+        yield event.value
+
+
+def _count_items(events, start: yaml.Event) -> int:
+    if not isinstance(start, yaml.SequenceStartEvent):
+        raise _IrregularDocumentError("expected a sequence")
+    count = 0
+    while not isinstance(event := next(events), yaml.SequenceEndEvent):
+        _skip_node(events, _untagged(event))
+        count += 1
+    return count
 
 
-def parse_yaml(content: str) -> dict:
-    return yaml.load(content, Loader=YAMLLoader)
+def _skip_node(events, start: yaml.Event) -> None:
+    depth = 1 if isinstance(start, _COLLECTION_START) else 0
+    while depth:
+        event = _untagged(next(events))
+        if isinstance(event, _COLLECTION_START):
+            depth += 1
+        elif isinstance(event, _COLLECTION_END):
+            depth -= 1
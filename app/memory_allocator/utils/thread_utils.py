@@ -1,8 +1,13 @@
 import asyncio
 import functools
 import logging
+import multiprocessing
 import time
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+from enum import StrEnum
+
+import billiard
 
 logger = logging.getLogger(__name__)
 
@@ -62,3 +67,94 @@ async def run_in_thread(func, *args, **kwargs):
         except Exception:
             logger.exception("thread.failed", extra={"func_name": func.__name__})
             raise
+
+
+class OffloadMode(StrEnum):
+    """
+    Where blocking work runs: THREAD for I/O and short calls, PROCESS for CPU-bound work.
+    """
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class _ProcessPoolHolder:
+    pool: ProcessPoolExecutor | None = None
+    fallback_logged: bool = False
+
+
+_process_holder = _ProcessPoolHolder()
+
+
+def _warm_up() -> None:
+    """
+    Load the YAML machinery in every pool process before the first real call.
+    """
+    from app.memory_allocator.utils.parser import parse_yaml
+    parse_yaml("{}")
+
+
+def init_process_pool(max_workers: int) -> None:
+    """
+    Start a warm pool of worker processes. Call it before the event loop and any threads start:
+    the pool forks, so the children inherit the already imported modules. multiprocessing
+    refuses children to daemonic processes, which Celery prefork children are, so those fork
+    through billiard's context instead.
+    """
+    if _process_holder.pool is not None:
+        return
+    if multiprocessing.current_process().daemon:
+        mp_context = billiard.get_context("fork")
+    else:
+        mp_context = multiprocessing.get_context("fork")
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp_context,
+        initializer=_warm_up,
+    )
+    for future in [pool.submit(_warm_up) for _ in range(max_workers)]:
+        future.result()
+    _process_holder.pool = pool
+    logger.info("process_pool.started", extra={"limit": max_workers})
+
+
+def shutdown_process_pool() -> None:
+    if _process_holder.pool is not None:
+        _process_holder.pool.shutdown(cancel_futures=True)
+        _process_holder.pool = None
+        logger.info("process_pool.stopped")
+
+
+async def run_in_process(func, *args, **kwargs):
+    """
+    Run func in the warm process pool, log its duration. func and its arguments must pickle.
+    """
+    if _process_holder.pool is None:
+        raise RuntimeError("Process pool is not initialized")
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            _process_holder.pool, functools.partial(func, *args, **kwargs)
+        )
+        duration = (time.perf_counter() - start) * 1000
+        logger.debug("process.finished", extra={
+            "func_name": func.__name__, "duration_ms": duration
+        })
+        return result
+    except Exception:
+        logger.exception("process.failed", extra={"func_name": func.__name__})
+        raise
+
+
+async def run_offloaded(mode: OffloadMode, func, *args, **kwargs):
+    """
+    Run func in a thread or in the process pool, as the call site chooses. Without a pool
+    (solo or threads pools, eager tasks, direct calls) PROCESS work runs in a thread.
+    """
+    if mode == OffloadMode.PROCESS:
+        if _process_holder.pool is not None:
+            return await run_in_process(func, *args, **kwargs)
+        if not _process_holder.fallback_logged:
+            _process_holder.fallback_logged = True
+            logger.warning("process_pool.fallback_to_thread", extra={"func_name": func.__name__})
+    return await run_in_thread(func, *args, **kwargs)
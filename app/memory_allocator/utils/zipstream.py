@@ -0,0 +1,261 @@
+import struct
+import time
+import zipfile
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import NamedTuple
+
+ZIP64_LIMIT = (1 << 32) - 1
+ZIP_FILECOUNT_LIMIT = 0xFFFF
+MASK_32 = 0xFFFFFFFF  # value of a 32-bit field whose real value is in the ZIP64 extra
+MASK_16 = 0xFFFF
+
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+UNIX_FILE_ATTRIBUTES = (0o100644 << 16)
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+DATA_DESCRIPTOR = struct.Struct("<IIII")
+DATA_DESCRIPTOR_ZIP64 = struct.Struct("<IIQQ")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+ZIP64_END_LOCATOR = struct.Struct("<IIQI")
+END_RECORD = struct.Struct("<IHHHHIIH")
+
+
+class _Entry(NamedTuple):
+    name: bytes
+    flags: int
+    method: int
+    dostime: int
+    dosdate: int
+    crc: int
+    compressed_size: int
+    size: int
+    offset: int
+    zip64: bool
+
+
+class Deflater:
+    """
+    Raw deflate stream and CRC-32 of data fed chunk by chunk, as add_precompressed()
+    expects them; `size` and `compressed_size` count what went in and came out so far.
+    """
+    def __init__(self, compresslevel: int = 6):
+        self._compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+        self.crc = 0
+        self.size = 0
+        self.compressed_size = 0
+
+    def compress(self, data: bytes) -> bytes:
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        return self._counted(self._compressor.compress(data))
+
+    def flush(self) -> bytes:
+        return self._counted(self._compressor.flush())
+
+    def _counted(self, data: bytes) -> bytes:
+        self.compressed_size += len(data)
+        return data
+
+
+def deflate(data: bytes, compresslevel: int = 6) -> tuple[bytes, int]:
+    """Raw deflate stream and CRC-32 of `data`, as add_precompressed() expects them."""
+    deflater = Deflater(compresslevel)
+    return deflater.compress(data) + deflater.flush(), deflater.crc
+
+
+def _dos_datetime(date_time: tuple[int, ...]) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time[:6]
+    dosdate = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dostime = hour << 11 | minute << 5 | second // 2
+    return dostime, dosdate
+
+
+class ZipStreamWriter:
+    """
+    Produces a zip archive as a sequence of byte chunks without seeking: each entry is
+    a local header with zeroed sizes, the (deflated) data as it arrives and a data
+    descriptor; the central directory follows in finish(). Only the per-entry metadata
+    is kept, so memory stays bounded by one chunk whatever the archive size.
+
+    Entries are written with 32-bit sizes unless `zip64=True` is passed to add(), in
+    which case they carry ZIP64 sizes from the local header on. The central directory
+    switches to ZIP64 records on its own once offsets or the entry count require it.
+
+    Data that is already a raw deflate stream goes through add_precompressed(), which
+    copies it as is: the sizes and CRC are known upfront, so no descriptor is needed.
+    """
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED, compresslevel: int = 6):
+        if compression not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ValueError(f"Unsupported compression method: {compression}")
+        self._compression = compression
+        self._compresslevel = compresslevel
+        self._entries: list[_Entry] = []
+        self._offset = 0
+        self._finished = False
+
+    @property
+    def bytes_written(self) -> int:
+        return self._offset
+
+    async def add(
+        self,
+        name: str,
+        chunks: AsyncIterable[bytes],
+        date_time: tuple[int, ...] | None = None,
+        zip64: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """Stream one entry; the archive stays consistent only if it is consumed to the end."""
+        if self._finished:
+            raise ValueError("Archive is already finished")
+        encoded_name, flags = self._encode_name(name)
+        flags |= FLAG_DATA_DESCRIPTOR
+        dostime, dosdate = _dos_datetime(date_time or time.localtime())
+        offset = self._offset
+
+        yield self._emit(self._local_header(
+            encoded_name, flags, self._compression, dostime, dosdate, 0, 0, 0, zip64
+        ))
+
+        compressor = (zlib.compressobj(self._compresslevel, zlib.DEFLATED, -15)
+                      if self._compression == zipfile.ZIP_DEFLATED else None)
+        crc = size = compressed_size = 0
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            data = compressor.compress(chunk) if compressor else chunk
+            if data:
+                compressed_size += len(data)
+                yield self._emit(data)
+        if compressor:
+            tail = compressor.flush()
+            compressed_size += len(tail)
+            yield self._emit(tail)
+
+        if not zip64 and max(size, compressed_size) > ZIP64_LIMIT:
+            raise zipfile.LargeZipFile(f"{name} exceeds the ZIP64 limit, add it with zip64=True")
+        descriptor = DATA_DESCRIPTOR_ZIP64 if zip64 else DATA_DESCRIPTOR
+        yield self._emit(descriptor.pack(0x08074B50, crc, compressed_size, size))
+
+        self._entries.append(_Entry(
+            encoded_name, flags, self._compression, dostime, dosdate,
+            crc, compressed_size, size, offset, zip64,
+        ))
+
+    async def add_precompressed(
+        self,
+        name: str,
+        chunks: AsyncIterable[bytes],
+        crc: int,
+        size: int,
+        compressed_size: int,
+        date_time: tuple[int, ...] | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream one entry from a raw deflate stream of `size` bytes with the given CRC-32."""
+        if self._finished:
+            raise ValueError("Archive is already finished")
+        encoded_name, flags = self._encode_name(name)
+        dostime, dosdate = _dos_datetime(date_time or time.localtime())
+        zip64 = max(size, compressed_size) > ZIP64_LIMIT
+        offset = self._offset
+
+        yield self._emit(self._local_header(
+            encoded_name, flags, zipfile.ZIP_DEFLATED, dostime, dosdate,
+            crc, compressed_size, size, zip64,
+        ))
+        copied = 0
+        async for chunk in chunks:
+            copied += len(chunk)
+            yield self._emit(chunk)
+        if copied != compressed_size:
+            raise ValueError(f"{name}: expected {compressed_size} deflated bytes, got {copied}")
+
+        self._entries.append(_Entry(
+            encoded_name, flags, zipfile.ZIP_DEFLATED, dostime, dosdate,
+            crc, compressed_size, size, offset, zip64,
+        ))
+
+    def finish(self) -> bytes:
+        """Central directory and end records; nothing can be added afterwards."""
+        if self._finished:
+            raise ValueError("Archive is already finished")
+        self._finished = True
+        directory = bytearray()
+        for entry in self._entries:
+            directory += self._central_header(entry)
+        directory_offset = self._offset
+        directory_size = len(directory)
+        count = len(self._entries)
+
+        if (count > ZIP_FILECOUNT_LIMIT or directory_offset > ZIP64_LIMIT
+                or directory_size > ZIP64_LIMIT):
+            zip64_end_offset = directory_offset + directory_size
+            directory += ZIP64_END_RECORD.pack(
+                0x06064B50, ZIP64_END_RECORD.size - 12, VERSION_ZIP64, VERSION_ZIP64,
+                0, 0, count, count, directory_size, directory_offset,
+            )
+            directory += ZIP64_END_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+            directory += END_RECORD.pack(
+                0x06054B50, 0, 0, MASK_16, MASK_16, MASK_32, MASK_32, 0,
+            )
+        else:
+            directory += END_RECORD.pack(
+                0x06054B50, 0, 0, count, count, directory_size, directory_offset, 0
+            )
+        return self._emit(bytes(directory))
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    @staticmethod
+    def _encode_name(name: str) -> tuple[bytes, int]:
+        try:
+            return name.encode("ascii"), 0
+        except UnicodeEncodeError:
+            return name.encode("utf-8"), FLAG_UTF8
+
+    @staticmethod
+    def _local_header(name: bytes, flags: int, method: int, dostime: int, dosdate: int,
+                      crc: int, compressed_size: int, size: int, zip64: bool) -> bytes:
+        # Zero sizes are completed by the data descriptor; ZIP64 entries carry them in
+        # the extra field and mask the 32-bit ones
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, size, compressed_size)
+            compressed_size = size = MASK_32
+        else:
+            extra = b""
+        return LOCAL_HEADER.pack(
+            0x04034B50, VERSION_ZIP64 if zip64 else VERSION_DEFAULT, flags,
+            method, dostime, dosdate, crc, compressed_size, size, len(name), len(extra),
+        ) + name + extra
+
+    @staticmethod
+    def _central_header(entry: _Entry) -> bytes:
+        zip64_fields = []
+        size = entry.size
+        compressed_size = entry.compressed_size
+        offset = entry.offset
+        if entry.zip64 or size > ZIP64_LIMIT:
+            zip64_fields.append(size)
+            size = MASK_32
+        if entry.zip64 or compressed_size > ZIP64_LIMIT:
+            zip64_fields.append(compressed_size)
+            compressed_size = MASK_32
+        if offset > ZIP64_LIMIT:
+            zip64_fields.append(offset)
+            offset = MASK_32
+        extra = (struct.pack(f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields),
+                             *zip64_fields) if zip64_fields else b"")
+        version = VERSION_ZIP64 if zip64_fields else VERSION_DEFAULT
+        return CENTRAL_HEADER.pack(
+            0x02014B50, 3 << 8 | version, version, entry.flags, entry.method,
+            entry.dostime, entry.dosdate, entry.crc, compressed_size, size,
+            len(entry.name), len(extra), 0, 0, 0, UNIX_FILE_ATTRIBUTES, offset,
+        ) + entry.name + extra
@@ -0,0 +1,102 @@
+"""
+Latency of the test name search (`GET /tests?name=...`) on a seeded table.
+
+Seeds a temporary `tests` table that shadows the real one for this connection only
+(pg_temp comes first in search_path, nothing persistent is touched), then times the
+count and page queries of the listing, with the filter built by TestRepository,
+first with the plain b-tree on name only and then with the trigram index.
+
+    python -m scripts.bench_name_search --rows 1000000 --repeat 20
+
+Needs a PostgreSQL at DB_URL where pg_trgm is installed or may be created.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import get_settings
+from app.memory_allocator.models import TestCase
+from app.memory_allocator.repositories.test_repository import TestRepository
+from app.memory_allocator.schemas import TestFilter
+
+settings = get_settings()
+
+# A selective random fragment, a ~2% platform slice, a substring of every name and a
+# literal underscore that must not act as a wildcard
+TERMS = ["3fa9c", "MIPS_R6000_7-", "regression", "_case_"]
+PAGE_SIZE = 100
+
+
+async def _seed(conn: AsyncConnection, rows: int) -> None:
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.execute(text(
+        "CREATE TEMP TABLE tests (id integer PRIMARY KEY, name varchar NOT NULL)"
+    ))
+    await conn.execute(text(
+        "INSERT INTO tests (id, name) "
+        "SELECT g, 'mips_r6000_' || (g % 50) || '-regression_case_' || md5(g::text) "
+        "FROM generate_series(1, :rows) AS g"
+    ), {"rows": rows})
+    await conn.execute(text("CREATE INDEX ON tests (name)"))
+    await conn.execute(text("ANALYZE tests"))
+
+
+async def _median_ms(conn: AsyncConnection, query, repeat: int) -> float:
+    await conn.execute(query)  # warm the cache
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        await conn.execute(query)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+async def _measure(conn: AsyncConnection, repeat: int) -> dict[str, tuple[int, float, float]]:
+    results = {}
+    for term in TERMS:
+        conditions = TestRepository._filter_conditions(TestFilter(name=term), uuid.uuid4())
+        count_query = select(func.count()).select_from(TestCase).where(*conditions)
+        page_query = (select(TestCase.id).where(*conditions)
+                      .order_by(TestCase.id.desc()).limit(PAGE_SIZE))
+        results[term] = (
+            await conn.scalar(count_query),
+            await _median_ms(conn, count_query, repeat),
+            await _median_ms(conn, page_query, repeat),
+        )
+    return results
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine(settings.DB_URL)
+    try:
+        async with engine.connect() as conn:
+            print(f"seeding {rows} rows...")
+            await _seed(conn, rows)
+            before = await _measure(conn, repeat)
+            await conn.execute(text("CREATE INDEX ON tests USING gin (name gin_trgm_ops)"))
+            await conn.execute(text("ANALYZE tests"))
+            after = await _measure(conn, repeat)
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+
+    print(f"\nmedian of {repeat} runs, ms        b-tree only       with trigram")
+    print(f"{'name':<16}{'matches':>10}{'count':>10}{'page':>10}{'count':>10}{'page':>10}")
+    for term in TERMS:
+        matches, count_before, page_before = before[term]
+        _, count_after, page_after = after[term]
+        print(f"{term:<16}{matches:>10}{count_before:>10.1f}{page_before:>10.1f}"
+              f"{count_after:>10.1f}{page_after:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -27,11 +27,16 @@ from app.core.unit_of_work import UnitOfWork
 from app.db.database import Base, get_db
 from app.main import app
 from app.memory_allocator.checker import Checker, get_checker
-from app.memory_allocator.dependencies import get_ingestion_service, get_validation_service
+from app.memory_allocator.dependencies import (
+    get_ingestion_service,
+    get_layout_export_service,
+    get_validation_service,
+)
 from app.memory_allocator.enums import TestStatus
 from app.memory_allocator.models import Block, Module, Partition, Region, TestCase  # noqa: F401
 from app.memory_allocator.routers import tests_ws_routes
 from app.memory_allocator.services import IngestionService, ValidationService
+from app.memory_allocator.services.layout_export_service import LayoutExportService
 from app.users.enums import UserJobTitle
 from app.users.models import User
 from tests.factories import (
@@ -76,6 +81,7 @@ async def engine():
     )
 
     async with async_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
     yield async_engine
@@ -249,7 +255,7 @@ class _PresigningStorage(LocalStorage):
 
     url = "http://localhost:9011/autorunning/artifacts/1/memin.yaml?X-Amz-Signature=test"
 
-    async def presigned_url(self, key: str, ttl_seconds: int) -> str:
+    async def presigned_url(self, key: str, ttl_seconds: int, filename: str | None = None) -> str:
         return self.url
 
 
@@ -290,6 +296,18 @@ def override_dispatch():
     app.dependency_overrides.pop(get_ingestion_service, None)
 
 
+@pytest.fixture
+def override_layout_export_dispatch(tmp_path):
+    dispatch = Mock()
+
+    def _factory(uow: UnitOfWork = Depends(get_uow)) -> LayoutExportService:
+        return LayoutExportService(uow, LocalStorage(tmp_path), enqueue_export=dispatch)
+
+    app.dependency_overrides[get_layout_export_service] = _factory
+    yield dispatch
+    app.dependency_overrides.pop(get_layout_export_service, None)
+
+
 def assert_error_response(response, status_code):
     assert response.status_code == status_code
     assert "message" in response.json()["error"]
@@ -2,8 +2,21 @@ import datetime
 import uuid
 
 from app.auth.hash_utils import get_password_hash
-from app.memory_allocator.enums import TestStatus, ValidationStatus
-from app.memory_allocator.models import Platform, Tag, TestCase, ValidationResult
+from app.memory_allocator.enums import (
+    ColumnarFormat,
+    LayoutExportStatus,
+    LayoutTable,
+    TestStatus,
+    ValidationStatus,
+)
+from app.memory_allocator.models import (
+    Block,
+    LayoutExport,
+    Platform,
+    Tag,
+    TestCase,
+    ValidationResult,
+)
 from app.memory_allocator.schemas import DeadLetterMessage
 from app.users.enums import UserJobTitle
 from app.users.models import User, UserPermission
@@ -66,12 +79,40 @@ def make_test(**overrides):
         block_count=0,
         kernel_entry_count=0,
         user_entry_count=0,
+        mapped_bytes=0,
+        readable_bytes=0,
+        writable_bytes=0,
+        executable_bytes=0,
+        uncached_bytes=0,
+        shadow_bytes=0,
+        largest_contiguous_bytes=0,
         platform=make_platform(),
         uploaded_by=make_user()
     )
     return TestCase(**{**defaults, **overrides})
 
 
+def make_block(**overrides):
+    defaults = dict(
+        name="default_block",
+        access="rw",
+        align=4096,
+        cache_policy="cached",
+        is_contiguous=True,
+        is_shadow=False,
+        is_system=False,
+        no_shadow=False,
+        paddr=None,
+        size=4096,
+        vaddr=None,
+        safety_zone_before=0,
+        safety_zone_after=0,
+        safety_zone_before_unmapped=False,
+        safety_zone_after_unmapped=False,
+    )
+    return Block(**{**defaults, **overrides})
+
+
 def make_validation_result(**overrides):
     defaults = dict(
         id=1,
@@ -88,6 +129,20 @@ def make_validation_result(**overrides):
     return ValidationResult(**{**defaults, **overrides})
 
 
+def make_layout_export(**overrides):
+    defaults = dict(
+        id=1,
+        status=LayoutExportStatus.PENDING,
+        table=LayoutTable.BLOCKS,
+        format=ColumnarFormat.ARROW,
+        filters={"statuses": None, "name": None, "platform_ids": None, "tags": None,
+                 "mine": False},
+        requested_at=datetime.datetime.now(datetime.UTC),
+        requested_by_id=uuid.uuid4(),
+    )
+    return LayoutExport(**{**defaults, **overrides})
+
+
 def make_tag(**overrides):
     defaults = dict(
         id=1,
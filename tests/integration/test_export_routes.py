@@ -110,6 +110,41 @@ async def test_download_artifact_streams_from_local_storage(
     assert response.content == b"memin-content"
 
 
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("override_storage")
+async def test_download_artifact_supports_range_and_conditional_get(
+    client,
+    db_session,
+    create_test_user,
+    auth_headers,
+    tmp_path,
+):
+    user = await create_test_user()
+    test = make_test(status=TestStatus.PARSED, uploaded_by=user, name="mips")
+    log = TestArtifact(
+        kind=ArtifactKind.LOG, filename="memin.log",
+        storage_key="artifacts/1/memin.log", test=test,
+    )
+    db_session.add_all([test, log])
+    await db_session.commit()
+    await LocalStorage(tmp_path).save("artifacts/1/memin.log", b"0123456789")
+    url = f"/tests/{test.id}/artifacts/{log.id}/download"
+
+    full = await client.get(url, headers=auth_headers(user))
+    tail = await client.get(url, headers={**auth_headers(user), "Range": "bytes=-4"})
+    cached = await client.get(
+        url, headers={**auth_headers(user), "If-None-Match": full.headers["etag"]}
+    )
+
+    assert full.status_code == status.HTTP_200_OK
+    assert full.headers["accept-ranges"] == "bytes"
+    assert tail.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert tail.content == b"6789"
+    assert tail.headers["content-range"] == "bytes 6-9/10"
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not cached.content
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_download_artifact_redirects_when_storage_signs_links(
     client,
@@ -191,3 +226,48 @@ async def test_download_artifact_no_user(client):
     response = await client.get("/tests/1/artifacts/1/download")
 
     assert_error_response(response, status.HTTP_401_UNAUTHORIZED)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("override_storage")
+async def test_bulk_export_one_directory_per_parsed_test(
+    client,
+    db_session,
+    create_test_user,
+    auth_headers,
+    tmp_path,
+):
+    user = await create_test_user()
+    first = make_test(status=TestStatus.PARSED, uploaded_by=user, name="bulk-a")
+    second = make_test(status=TestStatus.PARSED, uploaded_by=user, name="bulk-b")
+    pending = make_test(status=TestStatus.PENDING, uploaded_by=user, name="bulk-c")
+    db_session.add_all([first, second, pending])
+    await db_session.flush()
+    storage = LocalStorage(tmp_path)
+    for test in (first, second, pending):
+        key = f"artifacts/{test.id}/memin.yaml"
+        db_session.add(TestArtifact(
+            kind=ArtifactKind.CONFIG, filename="memin.yaml", storage_key=key, test=test,
+        ))
+        await storage.save(key, f"memin-{test.name}".encode())
+    await db_session.commit()
+
+    response = await client.get(
+        "/tests/export", params={"name": "bulk-", "mine": True}, headers=auth_headers(user)
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert sorted(zf.namelist()) == [
+            f"{first.id}-bulk-a/memin.yaml",
+            f"{second.id}-bulk-b/memin.yaml",
+        ]
+        assert zf.read(f"{second.id}-bulk-b/memin.yaml") == b"memin-bulk-b"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_export_no_user(client):
+    response = await client.get("/tests/export")
+
+    assert_error_response(response, status.HTTP_401_UNAUTHORIZED)
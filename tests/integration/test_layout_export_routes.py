@@ -0,0 +1,138 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi import status
+
+from app.core.storage import LocalStorage
+from app.core.unit_of_work import UnitOfWork
+from app.memory_allocator.enums import TestStatus
+from app.memory_allocator.models import Module, Partition, Region
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from tests.conftest import assert_error_response
+from tests.factories import make_block, make_platform, make_test
+
+
+async def _seed_layouts(db_session, user) -> None:
+    """A parsed test with a kernel and a partition block, its twin and a failed upload."""
+    platform = make_platform()
+    db_session.add_all([
+        make_test(uploaded_by=user, platform=platform),
+        make_test(id=2, uploaded_by=user, platform=platform, duplicate_of_id=1),
+        make_test(id=3, uploaded_by=user, platform=platform, status=TestStatus.ERROR),
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        Module(name="kernel", test_id=1, kernel_blocks=[
+            make_block(name="k0", vaddr=0x8000_0000, paddr=0x10_0000_0000),
+        ], partitions=[
+            Partition(name="p0", space_id=4, blocks=[
+                make_block(name="b0", vaddr=0, paddr=8192, regions=[
+                    Region(vaddr=0, paddr=8192, size=16), Region(vaddr=16, paddr=8208, size=16)
+                ]),
+            ]),
+        ]),
+        Module(name="partial", test_id=3, kernel_blocks=[make_block(name="e0")]),
+    ])
+    await db_session.commit()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_blocks_as_parquet(client, create_test_user, auth_headers, db_session):
+    user = await create_test_user()
+    await _seed_layouts(db_session, user)
+
+    response = await client.get(
+        "/tests/layout/export", params={"format": "parquet"}, headers=auth_headers(user)
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert 'filename="blocks.parquet"' in response.headers["content-disposition"]
+    rows = pq.read_table(io.BytesIO(response.content)).to_pylist()
+    assert sorted((r["test_id"], r["name"], r["partition"], r["space_id"]) for r in rows) == [
+        (1, "b0", "p0", 4), (1, "k0", None, None), (2, "b0", "p0", 4), (2, "k0", None, None),
+    ]
+    kernel = next(r for r in rows if r["name"] == "k0")
+    assert (kernel["module"], kernel["paddr"]) == ("kernel", 0x10_0000_0000)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_regions_as_arrow(client, create_test_user, auth_headers, db_session):
+    user = await create_test_user()
+    await _seed_layouts(db_session, user)
+
+    response = await client.get(
+        "/tests/layout/export", params={"table": "regions", "name": "default"},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    rows = pa.ipc.open_stream(response.content).read_all().to_pylist()
+    assert sorted((r["test_id"], r["paddr"]) for r in rows) == [
+        (1, 8192), (1, 8208), (2, 8192), (2, 8208),
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_rejects_unknown_format(client, create_test_user, auth_headers):
+    user = await create_test_user()
+
+    response = await client.get(
+        "/tests/layout/export", params={"format": "csv"}, headers=auth_headers(user)
+    )
+
+    assert_error_response(response, status.HTTP_422_UNPROCESSABLE_CONTENT)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_job_lifecycle(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+    override_layout_export_dispatch,
+    tmp_path,
+):
+    user = await create_test_user()
+    await _seed_layouts(db_session, user)
+
+    response = await client.post(
+        "/layout-exports", json={"table": "regions", "format": "parquet", "platform_ids": [1]},
+        headers=auth_headers(user),
+    )
+    body = response.json()
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert body["status"] == "pending"
+    assert body["filters"]["platform_ids"] == [1]
+    export_id = body["id"]
+    override_layout_export_dispatch.assert_called_once_with(export_id)
+
+    pending = await client.get(f"/layout-exports/{export_id}/file", headers=auth_headers(user))
+    assert_error_response(pending, status.HTTP_409_CONFLICT)
+
+    service = LayoutExportService(UnitOfWork(db_session), LocalStorage(tmp_path))
+    await service.perform_export(export_id)
+
+    body = (await client.get(f"/layout-exports/{export_id}", headers=auth_headers(user))).json()
+    assert (body["status"], body["row_count"]) == ("completed", 4)
+    response = await client.get(f"/layout-exports/{export_id}/file", headers=auth_headers(user))
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.content) == body["size_bytes"]
+    assert pq.read_table(io.BytesIO(response.content)).num_rows == 4
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("override_layout_export_dispatch")
+async def test_export_job_of_another_user(client, create_test_user, auth_headers):
+    owner = await create_test_user()
+    other = await create_test_user(email="other@ispras.ru")
+    export_id = (await client.post(
+        "/layout-exports", json={}, headers=auth_headers(owner)
+    )).json()["id"]
+
+    response = await client.get(f"/layout-exports/{export_id}", headers=auth_headers(other))
+
+    assert_error_response(response, status.HTTP_404_NOT_FOUND)
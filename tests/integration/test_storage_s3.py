@@ -13,19 +13,27 @@ from tests.storage_contract import (
     KEY,
     check_binary_content,
     check_delete,
+    check_delete_many,
     check_delete_missing_raises_key_error,
     check_exists,
     check_load_missing_raises_key_error,
     check_nested_key,
+    check_open_read_in_steps,
+    check_open_read_missing_raises_key_error,
+    check_open_write_and_read,
+    check_open_write_failure_keeps_previous_object,
     check_overwrite,
     check_presigned_url,
     check_save_and_load,
+    check_save_stream,
+    check_save_stream_failure_leaves_no_object,
 )
 
 ACCESS_KEY = "testaccess"
 SECRET_KEY = "testsecret123"
 BUCKET = "contract"
 TTL = 60
+PART_SIZE = 5 * 1024 * 1024
 
 
 @pytest.fixture(scope="session")
@@ -67,6 +75,7 @@ async def s3_storage(minio_endpoint) -> AsyncGenerator[S3Storage, None]:
         region="us-east-1",
         endpoint_url=minio_endpoint,
         public_endpoint_url=minio_endpoint,
+        part_size=PART_SIZE,
     )
 
 
@@ -75,6 +84,43 @@ async def test_save_and_load(s3_storage):
     await check_save_and_load(s3_storage)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_save_stream_single_part(s3_storage):
+    await check_save_stream(s3_storage, b"small" * 100, chunk_size=64)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_save_stream_multipart(s3_storage):
+    data = bytes(range(256)) * (PART_SIZE * 2 // 256 + 1000)
+    await check_save_stream(s3_storage, data, chunk_size=1024 * 1024)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_save_stream_failure_leaves_no_object(s3_storage):
+    await check_save_stream_failure_leaves_no_object(s3_storage)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_open_write_and_read(s3_storage):
+    data = bytes(range(256)) * (PART_SIZE * 2 // 256 + 1000)
+    await check_open_write_and_read(s3_storage, data, chunk_size=1024 * 1024)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_open_read_in_steps(s3_storage):
+    await check_open_read_in_steps(s3_storage)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_open_write_failure_keeps_previous_object(s3_storage):
+    await check_open_write_failure_keeps_previous_object(s3_storage)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_open_read_missing_raises_key_error(s3_storage):
+    await check_open_read_missing_raises_key_error(s3_storage)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_binary_content(s3_storage):
     await check_binary_content(s3_storage)
@@ -100,6 +146,11 @@ async def test_delete(s3_storage):
     await check_delete(s3_storage)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_many(s3_storage):
+    await check_delete_many(s3_storage)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_load_missing_raises_key_error(s3_storage):
     await check_load_missing_raises_key_error(s3_storage)
@@ -136,3 +187,16 @@ async def test_presigned_url_downloads_without_credentials(s3_storage):
         response = await client.get(url)
     assert response.status_code == 200
     assert response.content == b"payload-for-link"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_opened_storage_reuses_pooled_client(s3_storage):
+    await s3_storage.open()
+    try:
+        await check_save_and_load(s3_storage)
+        await check_delete_many(s3_storage)
+        await check_presigned_url(s3_storage, expect_url=True)
+    finally:
+        await s3_storage.close()
+
+    await check_exists(s3_storage)
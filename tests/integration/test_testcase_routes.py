@@ -1,9 +1,17 @@
 import pytest
-from fastapi import status
+from fastapi import Depends, status
+from sqlalchemy import select
 
+from app.core.dependencies import get_uow
+from app.core.unit_of_work import UnitOfWork
+from app.main import app
+from app.memory_allocator.dependencies import get_test_service
 from app.memory_allocator.enums import TestStatus
+from app.memory_allocator.models import Module, Partition, Region, TestFacetRollupDelta
+from app.memory_allocator.repositories.test_repository import TestRepository
+from app.memory_allocator.services import TestcaseService
 from tests.conftest import assert_error_response, make_zip
-from tests.factories import make_platform, make_tag, make_test
+from tests.factories import make_block, make_platform, make_tag, make_test
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -294,6 +302,34 @@ async def test_list_tests_filters_by_name(
     assert tests[0]["status"] == "parsed"
 
 
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(("search", "expected"), [
+    ("mips_r6", ["mips_r6000"]),
+    ("100%", ["load_100%"]),
+    ("%", ["load_100%"]),
+])
+async def test_list_tests_name_wildcards_are_literal(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+    search,
+    expected,
+):
+    user = await create_test_user()
+    platform = make_platform()
+    db_session.add_all([
+        make_test(uploaded_by=user, platform=platform, name="mips_r6000"),
+        make_test(id=2, uploaded_by=user, platform=platform, name="mipsXr6000"),
+        make_test(id=3, uploaded_by=user, platform=platform, name="load_100%"),
+    ])
+    await db_session.commit()
+
+    response = await client.get("/tests", params={"name": search}, headers=auth_headers(user))
+
+    assert [t["name"] for t in response.json()["tests"]] == expected
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_tests_filters_combination(
     client,
@@ -345,6 +381,53 @@ async def test_list_tests_filters_mismatch(
     assert body["total"] == 0
 
 
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(("query", "expected"), [
+    ("min_mapped_bytes=16384", ["medium", "large"]),
+    ("max_mapped_bytes=16384", ["small", "medium"]),
+    ("min_mapped_bytes=4097&max_mapped_bytes=65535", ["medium"]),
+    ("min_executable_bytes=1", ["large"]),
+    ("min_mapped_bytes=4096&max_largest_contiguous_bytes=4096", ["small", "medium"]),
+])
+async def test_list_tests_filters_memory_metrics(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+    query,
+    expected,
+):
+    user = await create_test_user()
+    platform = make_platform()
+    db_session.add_all([
+        make_test(uploaded_by=user, platform=platform, name="small",
+                  mapped_bytes=0x1000, largest_contiguous_bytes=0x1000),
+        make_test(id=2, uploaded_by=user, platform=platform, name="medium",
+                  mapped_bytes=0x4000, largest_contiguous_bytes=0x1000),
+        make_test(id=3, uploaded_by=user, platform=platform, name="large",
+                  mapped_bytes=0x10000, executable_bytes=0x8000,
+                  largest_contiguous_bytes=0x8000),
+    ])
+    await db_session.commit()
+
+    response = await client.get(f"/tests?{query}", headers=auth_headers(user))
+
+    body = response.json()
+    assert sorted(t["name"] for t in body["tests"]) == sorted(expected)
+    assert body["total"] == len(expected)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_tests_rejects_inverted_metric_range(client, create_test_user, auth_headers):
+    user = await create_test_user()
+
+    response = await client.get(
+        "/tests?min_mapped_bytes=8192&max_mapped_bytes=4096", headers=auth_headers(user)
+    )
+
+    assert_error_response(response, status.HTTP_422_UNPROCESSABLE_CONTENT)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_tests_filters_limit_first(
     client,
@@ -395,6 +478,323 @@ async def test_list_tests_filters_limit_second(
     assert body["tests"][0]["status"] == "error"
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_tests_walks_pages_with_cursor(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+):
+    user = await create_test_user()
+    headers = auth_headers(user)
+    platform = make_platform()
+    tests = [
+        make_test(id=i, status=TestStatus.PARSED if i % 2 else TestStatus.ERROR,
+                  uploaded_by=user, platform=platform)
+        for i in range(1, 8)
+    ]
+    db_session.add_all(tests)
+    await db_session.commit()
+
+    seen = []
+    url = "/tests?statuses=parsed&limit=2&include_total=false"
+    while url:
+        body = (await client.get(url, headers=headers)).json()
+        assert body["total"] is None
+        seen.extend(t["id"] for t in body["tests"])
+        cursor = body["next_cursor"]
+        url = (f"/tests?statuses=parsed&limit=2&include_total=false&after={cursor}"
+               if cursor else None)
+
+    assert seen == [7, 5, 3, 1]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("mode", ["exact", "estimated"])
+async def test_list_tests_reports_total_mode(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+    mode,
+):
+    user = await create_test_user()
+    platform = make_platform()
+    db_session.add_all([
+        make_test(status=TestStatus.PARSED, uploaded_by=user, platform=platform),
+        make_test(id=2, status=TestStatus.ERROR, uploaded_by=user, platform=platform),
+    ])
+    await db_session.commit()
+
+    response = await client.get(
+        f"/tests?statuses=parsed&total_mode={mode}", headers=auth_headers(user)
+    )
+
+    body = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert body["total_mode"] == mode
+    assert isinstance(body["total"], int)
+    if mode == "exact":
+        assert body["total"] == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_tests_rejects_malformed_cursor(client, create_test_user, auth_headers):
+    user = await create_test_user()
+
+    response = await client.get("/tests?after=garbage", headers=auth_headers(user))
+
+    assert_error_response(response, status.HTTP_422_UNPROCESSABLE_CONTENT)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_facets_counts_every_facet(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+):
+    user = await create_test_user()
+    platform_1 = make_platform(mmu_family="abc")
+    platform_2 = make_platform(id=2, mmu_family="def")
+    tag_1 = make_tag(name="low_ram")
+    tag_2 = make_tag(id=2, name="many_blocks")
+    db_session.add_all([
+        make_test(status=TestStatus.PARSED, uploaded_by=user, platform=platform_1,
+                  tags=[tag_1, tag_2]),
+        make_test(id=2, status=TestStatus.PARSED, uploaded_by=user, platform=platform_2,
+                  tags=[tag_1]),
+        make_test(id=3, status=TestStatus.ERROR, uploaded_by=user, platform=platform_2),
+        make_test(id=4, status=TestStatus.PENDING, uploaded_by=user, platform=platform_1,
+                  name="other"),
+    ])
+    await db_session.commit()
+
+    response = await client.get(
+        "/tests/facets?statuses=parsed&statuses=error&platform_ids=1&platform_ids=2",
+        headers=auth_headers(user),
+    )
+
+    body = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert body["total"] == 3
+    assert body["source"] == "query"
+    assert body["statuses"] == [
+        {"status": "parsed", "count": 2}, {"status": "error", "count": 1}
+    ]
+    assert body["platforms"] == [
+        {"platform_id": 2, "count": 2}, {"platform_id": 1, "count": 1}
+    ]
+    assert body["tags"] == [
+        {"tag_id": 1, "name": "low_ram", "count": 2},
+        {"tag_id": 2, "name": "many_blocks", "count": 1},
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_facets_rollup_follows_status_changes(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+):
+    def _rollup_service(uow: UnitOfWork = Depends(get_uow)) -> TestcaseService:
+        return TestcaseService(uow, facets_rollup=True)
+    app.dependency_overrides[get_test_service] = _rollup_service
+    user = await create_test_user()
+    platform = make_platform()
+    test_1 = make_test(status=TestStatus.PENDING, uploaded_by=user, platform=platform)
+    test_2 = make_test(id=2, status=TestStatus.PENDING, uploaded_by=user, platform=platform)
+    db_session.add_all([test_1, test_2])
+    await db_session.commit()
+    test_1.status = TestStatus.PARSED
+    await db_session.commit()
+
+    response = await client.get("/tests/facets", headers=auth_headers(user))
+
+    body = response.json()
+    assert body["source"] == "rollup"
+    assert body["total"] == 2
+    assert body["statuses"] == [
+        {"status": "parsed", "count": 1}, {"status": "pending", "count": 1}
+    ]
+    assert body["platforms"] == [{"platform_id": platform.id, "count": 2}]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_facets_rollup_survives_compaction(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+):
+    def _rollup_service(uow: UnitOfWork = Depends(get_uow)) -> TestcaseService:
+        return TestcaseService(uow, facets_rollup=True)
+    app.dependency_overrides[get_test_service] = _rollup_service
+    user = await create_test_user()
+    platform = make_platform()
+    test_1 = make_test(status=TestStatus.PENDING, uploaded_by=user, platform=platform)
+    test_2 = make_test(id=2, status=TestStatus.PENDING, uploaded_by=user, platform=platform)
+    db_session.add_all([test_1, test_2])
+    await db_session.commit()
+    await TestRepository(db_session).compact_facet_rollup()
+    await db_session.commit()
+    test_1.status = TestStatus.ERROR
+    await db_session.commit()
+
+    response = await client.get("/tests/facets", headers=auth_headers(user))
+
+    body = response.json()
+    assert body["total"] == 2
+    assert body["statuses"] == [
+        {"status": "error", "count": 1}, {"status": "pending", "count": 1}
+    ]
+    deltas = await db_session.scalars(select(TestFacetRollupDelta.delta))
+    assert sorted(deltas) == [-1, 1]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(("query", "expected"), [
+    ("space=physical&start=8192&end=12288", [3, 1]),  # kernel block, shared by the twin
+    ("space=physical&start=12288&end=16384", []),  # ranges are half-open
+    ("space=physical&start=65536&end=65537", [2]),  # only a region is placed there
+    ("space=virtual&start=0&end=4096", [2]),  # user block
+    ("space=virtual&start=0&end=4096&platform_ids=2", []),
+])
+async def test_list_overlapping(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+    query,
+    expected,
+):
+    user = await create_test_user()
+    platform = make_platform()
+    test_1 = make_test(uploaded_by=user, platform=platform)
+    test_2 = make_test(id=2, uploaded_by=user, platform=platform)
+    twin = make_test(id=3, uploaded_by=user, platform=platform, duplicate_of_id=1)
+    db_session.add_all([test_1, test_2, twin])
+    await db_session.flush()
+    db_session.add_all([
+        Module(name="kernel", test_id=1, kernel_blocks=[
+            make_block(paddr=8192, size=4096, vaddr=0x8000_0000),
+            make_block(name="unplaced", paddr=None, size=None),
+        ]),
+        Module(name="user", test_id=2, partitions=[
+            Partition(name="p0", space_id=0, blocks=[
+                make_block(vaddr=0, paddr=None, size=4096,
+                           regions=[Region(vaddr=0, paddr=0x10000, size=16)]),
+            ]),
+        ]),
+    ])
+    await db_session.commit()
+
+    response = await client.get(f"/tests/overlaps?{query}", headers=auth_headers(user))
+
+    body = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert [t["id"] for t in body["tests"]] == expected
+    assert body["total"] is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_overlapping_walks_pages_with_cursor(
+    client,
+    create_test_user,
+    auth_headers,
+    db_session,
+):
+    user = await create_test_user()
+    platform = make_platform()
+    db_session.add_all([
+        make_test(id=i, uploaded_by=user, platform=platform) for i in range(1, 4)
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        Module(name=f"m{i}", test_id=i, kernel_blocks=[make_block(paddr=0, size=4096)])
+        for i in range(1, 4)
+    ])
+    await db_session.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {"start": 0, "end": 1, "limit": 2, **({"after": cursor} if cursor else {})}
+        body = (await client.get(
+            "/tests/overlaps", params=params, headers=auth_headers(user)
+        )).json()
+        ids += [t["id"] for t in body["tests"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == [3, 2, 1]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_overlapping_rejects_empty_range(client, create_test_user, auth_headers):
+    user = await create_test_user()
+
+    response = await client.get("/tests/overlaps?start=10&end=10", headers=auth_headers(user))
+
+    assert_error_response(response, status.HTTP_422_UNPROCESSABLE_CONTENT)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("test_id", [1, 2])  # the twin reads the layout of the original
+async def test_get_layout(client, create_test_user, auth_headers, db_session, test_id):
+    user = await create_test_user()
+    platform = make_platform()
+    db_session.add_all([
+        make_test(uploaded_by=user, platform=platform),
+        make_test(id=2, uploaded_by=user, platform=platform, duplicate_of_id=1),
+    ])
+    await db_session.flush()
+    db_session.add_all([
+        Module(name="kernel", test_id=1, address_space_base=0x8000_0000, kernel_blocks=[
+            make_block(name="k0", vaddr=0x8000_0000, paddr=0x10_0000_0000, size=4096),
+            make_block(name="k1", size=None),
+        ], partitions=[
+            Partition(name="p0", space_id=0, blocks=[
+                make_block(name="b0", vaddr=0, paddr=8192, regions=[
+                    Region(vaddr=0, paddr=8192, size=16), Region(vaddr=16, paddr=8208, size=16)
+                ]),
+            ]),
+            Partition(name="p1", space_id=1),
+        ]),
+        Module(name="empty", test_id=1),
+    ])
+    await db_session.commit()
+
+    response = await client.get(f"/tests/{test_id}/layout", headers=auth_headers(user))
+
+    body = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+    assert body["test_id"] == test_id
+    kernel, empty = body["modules"]
+    assert kernel["address_space_base"] == 0x8000_0000
+    assert [b["name"] for b in kernel["kernel_blocks"]] == ["k0", "k1"]
+    assert kernel["kernel_blocks"][0]["paddr"] == 0x10_0000_0000
+    assert kernel["kernel_blocks"][1]["size"] is None
+    assert [(p["name"], [b["name"] for b in p["blocks"]]) for p in kernel["partitions"]] == [
+        ("p0", ["b0"]), ("p1", [])
+    ]
+    regions = kernel["partitions"][0]["blocks"][0]["regions"]
+    assert [(r["vaddr"], r["paddr"], r["size"]) for r in regions] == [(0, 8192, 16), (16, 8208, 16)]
+    assert kernel["kernel_blocks"][0]["regions"] == []
+    assert (empty["kernel_blocks"], empty["partitions"]) == ([], [])
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_layout_not_found(client, create_test_user, auth_headers):
+    user = await create_test_user()
+
+    response = await client.get("/tests/999/layout", headers=auth_headers(user))
+
+    assert_error_response(response, status.HTTP_404_NOT_FOUND)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_tests_no_user(
     client,
@@ -8,9 +8,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.storage import LocalStorage
 from app.core.unit_of_work import UnitOfWork
 from app.memory_allocator.enums import TestStatus
-from app.memory_allocator.models import Block, Module, Partition
+from app.memory_allocator.models import Block, Module, Partition, Region
 from app.memory_allocator.services import IngestionService
 from app.memory_allocator.tasks import tasks_testcase
+from app.memory_allocator.utils.parser import parse_yaml
 from app.users.enums import UserJobTitle
 from app.users.models import User
 from tests.conftest import fake_uow, make_zip
@@ -60,3 +61,58 @@ async def test_worker_parses_real_zip(
         assert modules == 1
         assert partitions == 2
         assert blocks == 72
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_persist_links_children_to_parents(
+    alembic_uow,
+    example_correct_folder,
+    tmp_path,
+):
+    uow = alembic_uow
+    user = User(
+        username="bulk-user",
+        email="bulk@ispras.ru",
+        password="x",
+        first_name="Bulk",
+        last_name="User",
+        job_title=UserJobTitle.DEVELOPER,
+    )
+    uow.users.add(user)
+    await uow.commit()
+    await uow.refresh(user)
+
+    zip_bytes = make_zip(example_correct_folder)
+    upload = UploadFile(filename="testcase.zip", file=io.BytesIO(zip_bytes))
+    storage = LocalStorage(tmp_path)
+    ingestion = IngestionService(uow, storage, enqueue_processing=lambda _: None,
+                                 bulk_persist=True)
+    request = await ingestion.accept_upload(upload, user)
+    test = await uow.tests.find_for_processing(request.id)
+
+    await ingestion.process_upload(test, zip_bytes)
+
+    constraints = parse_yaml((example_correct_folder / "in_single_constraints.yaml").read_bytes())
+    expected_regions = sum(
+        len(block.get("regions", []))
+        for blocks in [constraints["kernel_memory_blocks"]]
+        + [p["memory_blocks"] for p in constraints["partitions"]]
+        for block in blocks.values()
+    )
+    session = uow.session
+    kernel_blocks = (await session.execute(
+        select(func.count()).select_from(Block)
+        .join(Module, Block.module_id == Module.id)
+        .where(Module.test_id == test.id)
+    )).scalar()
+    partition_blocks = (await session.execute(
+        select(func.count()).select_from(Block)
+        .join(Partition, Block.partition_id == Partition.id)
+        .join(Module, Partition.module_id == Module.id)
+        .where(Module.test_id == test.id)
+    )).scalar()
+    regions = (await session.execute(select(func.count()).select_from(Region))).scalar()
+    assert kernel_blocks + partition_blocks == test.block_count == 72
+    assert regions == expected_regions
+    assert len(await uow.layouts.block_geometry(test.id)) == 72
+    assert len(await uow.layouts.region_geometry(test.id)) == expected_regions
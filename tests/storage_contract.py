@@ -14,6 +14,66 @@ async def check_save_and_load(storage: StorageBackend) -> None:
     assert await storage.load(KEY) == b"data"
 
 
+async def _chunked(data: bytes, chunk_size: int):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def check_save_stream(storage: StorageBackend, data: bytes, chunk_size: int) -> None:
+    await storage.save_stream(NESTED_KEY, _chunked(data, chunk_size))
+
+    assert await storage.load(NESTED_KEY) == data
+
+
+async def check_save_stream_failure_leaves_no_object(storage: StorageBackend) -> None:
+    async def _broken():
+        yield b"partial"
+        raise RuntimeError("client disconnected")
+
+    with pytest.raises(RuntimeError):
+        await storage.save_stream(KEY, _broken())
+
+    assert not await storage.exists(KEY)
+
+
+async def check_open_write_and_read(storage: StorageBackend, data: bytes, chunk_size: int) -> None:
+    async with storage.open_write(NESTED_KEY) as writer:
+        async for chunk in _chunked(data, chunk_size):
+            await writer.write(chunk)
+
+    async with storage.open_read(NESTED_KEY) as reader:
+        chunks = [chunk async for chunk in reader.iter_chunks(chunk_size)]
+
+    assert b"".join(chunks) == data
+    assert max(len(chunk) for chunk in chunks) <= chunk_size
+
+
+async def check_open_read_in_steps(storage: StorageBackend) -> None:
+    await storage.save(KEY, b"0123456789")
+
+    async with storage.open_read(KEY) as reader:
+        assert await reader.read(4) == b"0123"
+        assert await reader.read() == b"456789"
+        assert await reader.read(4) == b""
+
+
+async def check_open_write_failure_keeps_previous_object(storage: StorageBackend) -> None:
+    await storage.save(KEY, b"previous")
+
+    with pytest.raises(RuntimeError):
+        async with storage.open_write(KEY) as writer:
+            await writer.write(b"partial")
+            raise RuntimeError("client disconnected")
+
+    assert await storage.load(KEY) == b"previous"
+
+
+async def check_open_read_missing_raises_key_error(storage: StorageBackend) -> None:
+    with pytest.raises(KeyError):
+        async with storage.open_read(MISSING_KEY):
+            pass
+
+
 async def check_binary_content(storage: StorageBackend) -> None:
     await storage.save(KEY, BINARY)
 
@@ -48,6 +108,15 @@ async def check_delete(storage: StorageBackend) -> None:
     assert not await storage.exists(KEY)
 
 
+async def check_delete_many(storage: StorageBackend) -> None:
+    await storage.save(KEY, b"data")
+    await storage.save(NESTED_KEY, b"data")
+    await storage.delete_many([KEY, NESTED_KEY, MISSING_KEY])
+
+    assert not await storage.exists(KEY)
+    assert not await storage.exists(NESTED_KEY)
+
+
 async def check_load_missing_raises_key_error(storage: StorageBackend) -> None:
     with pytest.raises(KeyError):
         await storage.load(MISSING_KEY)
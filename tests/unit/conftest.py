@@ -1,8 +1,11 @@
+import io
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 
 from app.core.events import EventBus
+from app.core.storage import StorageReader, StorageWriter
 from app.memory_allocator.checker import MockChecker
 from app.memory_allocator.notifications import StatusNotifier
 
@@ -16,6 +19,9 @@ def mock_uow():
     uow.validations = Mock()
     uow.tags = Mock()
     uow.dead_letters = Mock()
+    uow.layouts = Mock()
+    uow.export_archives = Mock()
+    uow.layout_exports = Mock()
     uow.commit = AsyncMock()
     uow.rollback = AsyncMock()
     uow.refresh = AsyncMock()
@@ -44,7 +50,15 @@ def mock_uow():
     uow.tests.add = Mock()
     uow.tests.delete = AsyncMock()
     uow.tests.list_filtered = AsyncMock()
+    uow.tests.list_overlapping = AsyncMock()
+    uow.tests.count_filtered = AsyncMock()
+    uow.tests.estimate_filtered = AsyncMock()
+    uow.tests.facet_counts = AsyncMock()
+    uow.tests.rollup_facet_counts = AsyncMock()
+    uow.tests.compact_facet_rollup = AsyncMock()
     uow.tests.find_stale_pending = AsyncMock()
+    uow.tests.find_parsed_twin = AsyncMock(return_value=None)
+    uow.tests.stream_layout_rows = Mock()
 
     # validations
     uow.validations.add = Mock()
@@ -64,6 +78,25 @@ def mock_uow():
     uow.artifacts.find_by_id = AsyncMock()
     uow.artifacts.list_by_test = AsyncMock()
 
+    # layouts
+    uow.layouts.bulk_insert = AsyncMock()
+    uow.layouts.block_geometry = AsyncMock(return_value=[])
+    uow.layouts.region_geometry = AsyncMock(return_value=[])
+    uow.layouts.list_modules = AsyncMock(return_value=[])
+    uow.layouts.list_partitions = AsyncMock(return_value=[])
+
+    # layout exports
+    uow.layout_exports.add = Mock()
+    uow.layout_exports.find_by_id = AsyncMock()
+
+    # export archives
+    uow.export_archives.add = Mock()
+    uow.export_archives.find_by_key = AsyncMock(return_value=None)
+    uow.export_archives.list_by_test = AsyncMock(return_value=[])
+    uow.export_archives.total_size = AsyncMock(return_value=0)
+    uow.export_archives.least_recently_used = AsyncMock(return_value=[])
+    uow.export_archives.delete_many = AsyncMock()
+
     # dead letters
     uow.dead_letters.add = Mock()
     uow.dead_letters.list_all = AsyncMock()
@@ -78,14 +111,47 @@ def mock_user_service():
     return service
 
 
+class BytesReader(StorageReader):
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+
+class BytesWriter(StorageWriter):
+    def __init__(self):
+        self.buffer = bytearray()
+
+    async def write(self, data: bytes) -> None:
+        self.buffer += data
+
+
 @pytest.fixture
 def mock_storage():
+    """Streaming reads and writes go through `load` and `save`, so tests configure those."""
     storage = Mock()
     storage.save = AsyncMock()
+    storage.save_stream = AsyncMock()
     storage.load = AsyncMock()
     storage.delete = AsyncMock()
+    storage.delete_many = AsyncMock()
     storage.exists = AsyncMock()
     storage.presigned_url = AsyncMock(return_value=None)
+    storage.local_path = Mock(return_value=None)
+
+    @asynccontextmanager
+    async def open_read(key):
+        yield BytesReader(await storage.load(key))
+
+    @asynccontextmanager
+    async def open_write(key):
+        writer = BytesWriter()
+        yield writer
+        await storage.save(key, bytes(writer.buffer))
+
+    storage.open_read = Mock(side_effect=open_read)
+    storage.open_write = Mock(side_effect=open_write)
     return storage
 
 
@@ -8,6 +8,7 @@ from app.core.config import get_settings
 
 SWEEPER_ENTRY = "sweep-stale-jobs"
 DLQ_ENTRY = "drain-dlq"
+ROLLUP_ENTRY = "compact-facet-rollup"
 WORK_QUEUE = "celery"
 DEAD_LETTER_QUEUE = "dlq"
 
@@ -48,12 +49,22 @@ def test_beat_schedule_has_dlq_entry():
     assert entry["options"]["expires"] == settings.DLQ_DRAIN_INTERVAL_SECONDS
 
 
+def test_beat_schedule_has_rollup_compaction_entry():
+    settings = get_settings()
+    entry = celery_app.conf.beat_schedule[ROLLUP_ENTRY]
+
+    assert entry["schedule"] == float(settings.TEST_FACETS_ROLLUP_COMPACT_INTERVAL_SECONDS)
+    assert entry["options"]["expires"] == settings.TEST_FACETS_ROLLUP_COMPACT_INTERVAL_SECONDS
+
+
 def test_scheduled_task_name_is_registered(registered_tasks):
     scheduled_name_sweeper = celery_app.conf.beat_schedule[SWEEPER_ENTRY]["task"]
     scheduled_name_dlq = celery_app.conf.beat_schedule[DLQ_ENTRY]["task"]
+    scheduled_name_rollup = celery_app.conf.beat_schedule[ROLLUP_ENTRY]["task"]
 
     assert scheduled_name_sweeper in registered_tasks
     assert scheduled_name_dlq in registered_tasks
+    assert scheduled_name_rollup in registered_tasks
 
 
 def test_worker_tasks_are_registered(registered_tasks):
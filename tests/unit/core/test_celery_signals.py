@@ -6,8 +6,11 @@ from app.core.celery_signals import (
     _adopt_request_id,
     _clear_request_id,
     _inject_request_id,
+    _start_process_pool,
 )
+from app.core.config import get_settings
 from app.core.context import NO_REQUEST_ID, request_id_var
+from app.memory_allocator.utils import thread_utils
 
 
 class FakeTask:
@@ -69,3 +72,23 @@ def test_postrun_clears_request_id():
     _clear_request_id()
 
     assert request_id_var.get() == NO_REQUEST_ID
+
+
+def test_worker_process_init_starts_pool_in_process_mode(monkeypatch):
+    started = []
+    monkeypatch.setattr(get_settings(), "PARSE_EXECUTOR", "process")
+    monkeypatch.setattr(thread_utils, "init_process_pool", started.append)
+
+    _start_process_pool()
+
+    assert started == [get_settings().PARSE_PROCESS_WORKERS]
+
+
+def test_worker_process_init_skips_pool_in_thread_mode(monkeypatch):
+    started = []
+    monkeypatch.setattr(get_settings(), "PARSE_EXECUTOR", "thread")
+    monkeypatch.setattr(thread_utils, "init_process_pool", started.append)
+
+    _start_process_pool()
+
+    assert started == []
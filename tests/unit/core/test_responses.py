@@ -0,0 +1,97 @@
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, Request, status
+from httpx import ASGITransport, AsyncClient
+
+from app.core.responses import file_response
+
+CONTENT = b"".join(f"line {i}\n".encode() for i in range(1000))
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path):
+    path = tmp_path / "memin.log"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def send(request: Request):
+        return await file_response(request, path, "memin.log", "application/octet-stream")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_sends_the_file_with_validators(client):
+    response = await client.get("/file")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == CONTENT
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" in response.headers
+    assert response.headers["accept-ranges"] == "bytes"
+    assert 'filename="memin.log"' in response.headers["content-disposition"]
+
+
+@pytest.mark.asyncio
+async def test_range_returns_the_tail(client):
+    response = await client.get("/file", headers={"Range": "bytes=-100"})
+
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == CONTENT[-100:]
+    size = len(CONTENT)
+    assert response.headers["content-range"] == f"bytes {size - 100}-{size - 1}/{size}"
+
+
+@pytest.mark.asyncio
+async def test_range_outside_the_file_is_not_satisfiable(client):
+    response = await client.get("/file", headers={"Range": f"bytes={len(CONTENT)}-"})
+
+    assert response.status_code == status.HTTP_416_RANGE_NOT_SATISFIABLE
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("header", ["{etag}", 'W/{etag}', '"other", {etag}', "*"])
+async def test_matching_if_none_match_is_not_modified(client, header):
+    etag = (await client.get("/file")).headers["etag"]
+
+    response = await client.get("/file", headers={"If-None-Match": header.format(etag=etag)})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_other_etag_sends_the_file(client):
+    response = await client.get("/file", headers={"If-None-Match": '"other"'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_if_modified_since(client):
+    last_modified = (await client.get("/file")).headers["last-modified"]
+
+    unchanged = await client.get("/file", headers={"If-Modified-Since": last_modified})
+    stale = await client.get(
+        "/file", headers={"If-Modified-Since": "Thu, 01 Jan 1998 00:00:00 GMT"}
+    )
+    malformed = await client.get("/file", headers={"If-Modified-Since": "yesterday"})
+
+    assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+    assert stale.status_code == status.HTTP_200_OK
+    assert malformed.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_if_none_match_takes_precedence(client):
+    last_modified = (await client.get("/file")).headers["last-modified"]
+
+    response = await client.get(
+        "/file", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
@@ -1,16 +1,27 @@
+from contextlib import asynccontextmanager
+
 import pytest
 
-from app.core.storage import LocalStorage
+from app.core.storage import LocalStorage, S3Storage
 from tests.storage_contract import (
+    BINARY,
+    KEY,
     check_binary_content,
     check_delete,
+    check_delete_many,
     check_delete_missing_raises_key_error,
     check_exists,
     check_load_missing_raises_key_error,
     check_nested_key,
+    check_open_read_in_steps,
+    check_open_read_missing_raises_key_error,
+    check_open_write_and_read,
+    check_open_write_failure_keeps_previous_object,
     check_overwrite,
     check_presigned_url,
     check_save_and_load,
+    check_save_stream,
+    check_save_stream_failure_leaves_no_object,
 )
 
 
@@ -19,6 +30,36 @@ async def test_save_and_load(tmp_path):
     await check_save_and_load(LocalStorage(tmp_path))
 
 
+@pytest.mark.asyncio
+async def test_save_stream(tmp_path):
+    await check_save_stream(LocalStorage(tmp_path), BINARY * 1000, chunk_size=64)
+
+
+@pytest.mark.asyncio
+async def test_save_stream_failure_leaves_no_object(tmp_path):
+    await check_save_stream_failure_leaves_no_object(LocalStorage(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_open_write_and_read(tmp_path):
+    await check_open_write_and_read(LocalStorage(tmp_path), BINARY * 1000, chunk_size=64)
+
+
+@pytest.mark.asyncio
+async def test_open_read_in_steps(tmp_path):
+    await check_open_read_in_steps(LocalStorage(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_open_write_failure_keeps_previous_object(tmp_path):
+    await check_open_write_failure_keeps_previous_object(LocalStorage(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_open_read_missing_raises_key_error(tmp_path):
+    await check_open_read_missing_raises_key_error(LocalStorage(tmp_path))
+
+
 @pytest.mark.asyncio
 async def test_binary_content(tmp_path):
     await check_binary_content(LocalStorage(tmp_path))
@@ -44,6 +85,11 @@ async def test_delete(tmp_path):
     await check_delete(LocalStorage(tmp_path))
 
 
+@pytest.mark.asyncio
+async def test_delete_many(tmp_path):
+    await check_delete_many(LocalStorage(tmp_path))
+
+
 @pytest.mark.asyncio
 async def test_load_missing_raises_key_error(tmp_path):
     await check_load_missing_raises_key_error(LocalStorage(tmp_path))
@@ -70,3 +116,63 @@ async def test_key_escapes_base(tmp_path, malicious_key):
 
     with pytest.raises(ValueError):
         await storage.save(malicious_key, b"\x00\xff\x10")
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects: dict[str, bytes] = {}
+
+    async def put_object(self, Bucket, Key, Body):  # noqa: N803
+        self.objects[Key] = Body
+
+
+class FakeS3Session:
+    def __init__(self):
+        self.opened: list[FakeS3Client] = []
+        self.closed = 0
+
+    def client(self, service_name, endpoint_url=None, config=None):
+        session = self
+
+        @asynccontextmanager
+        async def open_client():
+            client = FakeS3Client()
+            session.opened.append(client)
+            try:
+                yield client
+            finally:
+                session.closed += 1
+
+        return open_client()
+
+
+def _fake_s3_storage() -> tuple[S3Storage, FakeS3Session]:
+    storage = S3Storage(bucket="b", access_key="a", secret_key="s", region="us-east-1")
+    session = FakeS3Session()
+    storage._session = session
+    return storage, session
+
+
+@pytest.mark.asyncio
+async def test_s3_opened_storage_reuses_one_client():
+    storage, session = _fake_s3_storage()
+
+    await storage.open()
+    for _ in range(3):
+        await storage.save(KEY, b"data")
+    assert len(session.opened) == 2  # one private, one public endpoint client
+    assert session.closed == 0
+
+    await storage.close()
+    assert session.closed == 2
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_without_open_uses_short_lived_clients():
+    storage, session = _fake_s3_storage()
+
+    await storage.save(KEY, b"data")
+    await storage.save(KEY, b"data")
+
+    assert len(session.opened) == 2
+    assert session.closed == 2
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core import worker_runtime
+from app.core.storage import LocalStorage, current_storage
+
+
+@pytest.fixture
+def local_runtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker_runtime, "create_storage", lambda: LocalStorage(tmp_path))
+    worker_runtime.init_worker_runtime()
+    yield
+    worker_runtime.shutdown_worker_runtime()
+
+
+async def _running_loop() -> asyncio.AbstractEventLoop:
+    return asyncio.get_running_loop()
+
+
+def test_run_async_reuses_the_process_loop(local_runtime):
+    first = worker_runtime.run_async(_running_loop())
+    second = worker_runtime.run_async(_running_loop())
+
+    assert first is second
+    assert isinstance(current_storage(), LocalStorage)
+
+
+def test_shutdown_closes_storage_and_loop(local_runtime):
+    loop = worker_runtime.run_async(_running_loop())
+
+    worker_runtime.shutdown_worker_runtime()
+
+    assert current_storage() is None
+    assert loop.is_closed()
+
+
+def test_run_async_without_runtime_uses_fresh_loops():
+    first = worker_runtime.run_async(_running_loop())
+    second = worker_runtime.run_async(_running_loop())
+
+    assert first is not second
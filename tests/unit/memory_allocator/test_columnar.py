@@ -0,0 +1,77 @@
+import io
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import select
+
+from app.memory_allocator.enums import ColumnarFormat
+from app.memory_allocator.models import TestCase
+from app.memory_allocator.repositories.test_repository import TestRepository
+from app.memory_allocator.schemas import TestFilter
+from app.memory_allocator.utils.columnar import (
+    BLOCK_SCHEMA,
+    REGION_SCHEMA,
+    ColumnarWriter,
+    record_batch,
+)
+
+ROWS = [(1, 10, 100, 0x8000_0000, 0x10_0000_0000, 16), (2, 11, 101, 0, 0, 0)]
+
+
+def _read(data: bytes, fmt: ColumnarFormat) -> pa.Table:
+    if fmt == ColumnarFormat.PARQUET:
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_stream(data).read_all()
+
+
+@pytest.mark.parametrize("fmt", list(ColumnarFormat))
+def test_writer_round_trip(fmt):
+    writer = ColumnarWriter(REGION_SCHEMA, fmt)
+
+    chunks = [writer.write(ROWS[:1]), writer.write([]), writer.write(ROWS[1:]), writer.finish()]
+
+    table = _read(b"".join(chunks), fmt)
+    assert table.schema.equals(REGION_SCHEMA)
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+    assert writer.rows_written == 2
+    assert writer.bytes_written == sum(map(len, chunks))
+
+
+@pytest.mark.parametrize("fmt", list(ColumnarFormat))
+def test_writer_emits_every_batch_before_finish(fmt):
+    writer = ColumnarWriter(REGION_SCHEMA, fmt)
+
+    assert writer.write(ROWS)
+    assert writer.write(ROWS)
+
+
+@pytest.mark.parametrize("fmt", list(ColumnarFormat))
+def test_empty_export_is_readable(fmt):
+    writer = ColumnarWriter(BLOCK_SCHEMA, fmt)
+
+    table = _read(writer.finish(), fmt)
+
+    assert table.num_rows == 0
+    assert table.schema.equals(BLOCK_SCHEMA)
+
+
+def test_record_batch_keeps_nulls_and_large_addresses():
+    batch = record_batch([(1, 1, 1, None, 1 << 62, 1)], REGION_SCHEMA)
+
+    assert batch.column("vaddr").to_pylist() == [None]
+    assert batch.column("paddr").to_pylist() == [1 << 62]
+
+
+@pytest.mark.parametrize(("build", "schema"), [
+    (TestRepository._layout_block_rows, BLOCK_SCHEMA),
+    (TestRepository._layout_region_rows, REGION_SCHEMA),
+])
+def test_queries_select_the_schema_columns(build, schema):
+    conditions = TestRepository._filter_conditions(TestFilter(), uuid.uuid4())
+    tests = select(TestCase.id, TestCase.duplicate_of_id.label("owner_id")).where(*conditions)
+
+    query = build(tests.subquery())
+
+    assert list(query.selected_columns.keys()) == schema.names
@@ -0,0 +1,92 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.memory_allocator.schemas import TestFilter
+from app.memory_allocator.utils.count_cache import (
+    CountLookup,
+    RedisCountCache,
+    filter_digest,
+)
+
+DIGEST = "a" * 64
+USER_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+OTHER_USER_ID = uuid.UUID("00000000-0000-0000-0000-000000000002")
+
+
+def test_filter_digest_ignores_order_duplicates_and_case():
+    first = TestFilter(statuses=["parsed", "error"], tags=["b", "a"], name="MIPS")
+    second = TestFilter(statuses=["error", "parsed", "error"], tags=["a", "b"], name="mips")
+
+    assert filter_digest(first, USER_ID) == filter_digest(second, USER_ID)
+    assert filter_digest(TestFilter(tags=[]), USER_ID) == filter_digest(TestFilter(), USER_ID)
+
+
+def test_filter_digest_separates_users_only_for_mine():
+    assert filter_digest(TestFilter(), USER_ID) == filter_digest(TestFilter(), OTHER_USER_ID)
+    assert (filter_digest(TestFilter(mine=True), USER_ID)
+            != filter_digest(TestFilter(mine=True), OTHER_USER_ID))
+    assert filter_digest(TestFilter(name="a"), USER_ID) != filter_digest(TestFilter(), USER_ID)
+
+
+def test_filter_digest_covers_metric_bounds():
+    low = TestFilter(min_mapped_bytes=4096)
+    high = TestFilter(max_mapped_bytes=4096)
+
+    assert filter_digest(low, USER_ID) != filter_digest(TestFilter(), USER_ID)
+    assert filter_digest(low, USER_ID) != filter_digest(high, USER_ID)
+    assert (filter_digest(low, USER_ID)
+            != filter_digest(TestFilter(min_shadow_bytes=4096), USER_ID))
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_keys_by_generation():
+    client = AsyncMock()
+    client.get.side_effect = [b"3", b"42"]
+    cache = RedisCountCache(client, ttl_seconds=60)
+
+    assert await cache.get(DIGEST) == CountLookup(f"test_count:3:{DIGEST}", 42)
+
+    assert client.get.await_args_list[-1].args == (f"test_count:3:{DIGEST}",)
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_stores_under_the_generation_of_the_lookup():
+    client = AsyncMock()
+    client.get.side_effect = [b"3", None]
+    cache = RedisCountCache(client, ttl_seconds=60)
+
+    lookup = await cache.get(DIGEST)
+    await cache.invalidate()  # a status changes while the total is counted
+    await cache.set(lookup.key, 7)
+
+    client.set.assert_awaited_once_with(f"test_count:3:{DIGEST}", 7, ex=60)
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_invalidate_bumps_generation():
+    client = AsyncMock()
+    client.get.return_value = None
+    cache = RedisCountCache(client, ttl_seconds=60)
+
+    await cache.set((await cache.get(DIGEST)).key, 7)
+    await cache.invalidate()
+
+    client.set.assert_awaited_once_with(f"test_count:0:{DIGEST}", 7, ex=60)
+    client.incr.assert_awaited_once_with(RedisCountCache.GENERATION_KEY)
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_failures_are_misses():
+    client = AsyncMock()
+    client.get.side_effect = ConnectionError("redis is down")
+    client.incr.side_effect = ConnectionError("redis is down")
+    cache = RedisCountCache(client, ttl_seconds=60)
+
+    lookup = await cache.get(DIGEST)
+    await cache.set(lookup.key, 7)
+    await cache.invalidate()
+
+    assert lookup == CountLookup(None, None)
+    client.set.assert_not_awaited()
@@ -1,8 +1,12 @@
+import asyncio
+import datetime
+import io
 import logging
 import zipfile
 from unittest.mock import Mock
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
 from app.memory_allocator.enums import TestStatus
 from app.memory_allocator.exceptions import (
@@ -11,17 +15,44 @@ from app.memory_allocator.exceptions import (
     StorageKeyNotFoundError,
     TestNotFoundError,
 )
-from app.memory_allocator.schemas import ArtifactContentDomain, ArtifactLinkDomain
+from app.memory_allocator.schemas import (
+    ArtifactContentDomain,
+    ArtifactFileDomain,
+    ArtifactLinkDomain,
+    TestFilter,
+)
 from app.memory_allocator.services.export_service import ExportService
-from tests.factories import make_test
+from app.memory_allocator.utils.zipstream import deflate
+from tests.factories import make_test, make_user
 
 
 def _make_service(mock_uow, mock_storage):
     return ExportService(uow=mock_uow, storage=mock_storage)
 
 
-def _artifact(filename: str) -> Mock:
-    return Mock(filename=filename, storage_key=f"artifacts/1/{filename}")
+def _artifact(filename: str, artifact_id: int = 1, size_bytes: int | None = 4) -> Mock:
+    return Mock(
+        id=artifact_id,
+        filename=filename,
+        storage_key=f"artifacts/1/{filename}",
+        deflate_storage_key=None,
+        size_bytes=size_bytes,
+        created_at=datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.UTC),
+    )
+
+
+def _precompressed_artifact(filename: str, content: bytes) -> tuple[Mock, bytes]:
+    deflated, crc = deflate(content)
+    artifact = _artifact(filename)
+    artifact.deflate_storage_key = f"artifacts/1/{filename}.deflate"
+    artifact.size_bytes = len(content)
+    artifact.deflated_size_bytes = len(deflated)
+    artifact.crc32 = crc
+    return artifact, deflated
+
+
+async def _collect(chunks) -> io.BytesIO:
+    return io.BytesIO(b"".join([chunk async for chunk in chunks]))
 
 
 @pytest.mark.asyncio
@@ -35,12 +66,34 @@ async def test_export_test_success(mock_uow, mock_storage):
     ]
     mock_storage.load.return_value = b"file-bytes"
 
-    buffer, filename = await service.export_test(test.id)
+    archive = await service.export_test(test.id)
 
-    assert filename == "mips.zip"
-    with zipfile.ZipFile(buffer) as zf:
+    assert isinstance(archive, ArtifactContentDomain)
+    assert archive.filename == "mips.zip"
+    with zipfile.ZipFile(await _collect(archive.chunks)) as zf:
         assert set(zf.namelist()) == {"memin.yaml", "status.yaml"}
         assert zf.read("memin.yaml") == b"file-bytes"
+        assert zf.getinfo("memin.yaml").date_time == (2024, 5, 1, 12, 30, 0)
+
+
+@pytest.mark.asyncio
+async def test_export_test_streams_lazily(mock_uow, mock_storage):
+    test = make_test(status=TestStatus.PARSED, name="mips")
+    service = _make_service(mock_uow, mock_storage)
+    mock_uow.tests.find_by_id.return_value = test
+    mock_uow.artifacts.list_by_test.return_value = [
+        _artifact("memin.yaml"),
+        _artifact("status.yaml"),
+    ]
+    mock_storage.load.return_value = b"file-bytes"
+
+    archive = await service.export_test(test.id)
+    mock_storage.open_read.assert_not_called()
+
+    first = await anext(archive.chunks)
+
+    assert first.startswith(b"PK\x03\x04")
+    mock_storage.open_read.assert_called_once_with("artifacts/1/memin.yaml")
 
 
 @pytest.mark.asyncio
@@ -83,12 +136,294 @@ async def test_export_test_skips_missing_artifact(mock_uow, mock_storage):
 
     mock_storage.load.side_effect = _load
 
-    buffer, _ = await service.export_test(test.id)
+    archive = await service.export_test(test.id)
 
-    with zipfile.ZipFile(buffer) as zf:
+    with zipfile.ZipFile(await _collect(archive.chunks)) as zf:
         assert zf.namelist() == ["memin.yaml"]
 
 
+@pytest.mark.asyncio
+async def test_export_test_splices_precompressed_artifacts(mock_uow, mock_storage):
+    content = b"allocated block\n" * 1000
+    log, deflated = _precompressed_artifact("memin.log", content)
+    mock_uow.tests.find_by_id.return_value = make_test(status=TestStatus.PARSED)
+    mock_uow.artifacts.list_by_test.return_value = [log, _artifact("status.yaml")]
+    mock_storage.load.side_effect = {
+        "artifacts/1/memin.log.deflate": deflated,
+        "artifacts/1/status.yaml": b"status: ok",
+    }.__getitem__
+
+    archive = await _make_service(mock_uow, mock_storage).export_test(1)
+
+    with zipfile.ZipFile(await _collect(archive.chunks)) as zf:
+        assert zf.testzip() is None
+        assert zf.read("memin.log") == content
+        assert zf.getinfo("memin.log").compress_size == len(deflated)
+    read_keys = [c.args[0] for c in mock_storage.load.await_args_list]
+    assert "artifacts/1/memin.log" not in read_keys
+
+
+@pytest.mark.asyncio
+async def test_export_test_falls_back_when_deflate_stream_is_missing(mock_uow, mock_storage):
+    content = b"allocated block\n" * 1000
+    log, _ = _precompressed_artifact("memin.log", content)
+    mock_uow.tests.find_by_id.return_value = make_test(status=TestStatus.PARSED)
+    mock_uow.artifacts.list_by_test.return_value = [log]
+    mock_storage.load.side_effect = {"artifacts/1/memin.log": content}.__getitem__
+
+    archive = await _make_service(mock_uow, mock_storage).export_test(1)
+
+    with zipfile.ZipFile(await _collect(archive.chunks)) as zf:
+        assert zf.read("memin.log") == content
+
+
+def _cached_service(mock_uow, mock_storage, cache_max_bytes: int = 10_000) -> ExportService:
+    test = make_test(status=TestStatus.PARSED, name="mips")
+    mock_uow.tests.find_by_id.return_value = test
+    mock_uow.artifacts.list_by_test.return_value = [
+        _artifact("memin.yaml", 1),
+        _artifact("status.yaml", 2),
+    ]
+    mock_storage.load.return_value = b"file-bytes"
+    return ExportService(uow=mock_uow, storage=mock_storage, cache_max_bytes=cache_max_bytes)
+
+
+@pytest.mark.asyncio
+async def test_export_test_miss_stores_the_streamed_archive(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage)
+
+    archive = await service.export_test(1)
+    sent = (await _collect(archive.chunks)).getvalue()
+
+    storage_key, stored = mock_storage.save.await_args.args
+    assert stored == sent
+    assert storage_key.startswith("exports/") and storage_key.endswith(".zip")
+    registered = mock_uow.export_archives.add.call_args.args[0]
+    assert registered.storage_key == storage_key
+    assert registered.size_bytes == len(sent)
+    mock_uow.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_export_test_hit_redirects_to_presigned_link(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage)
+    mock_uow.export_archives.find_by_key.return_value = Mock(storage_key="exports/1/x.zip")
+    mock_storage.exists.return_value = True
+    mock_storage.presigned_url.return_value = PRESIGNED_URL
+
+    archive = await service.export_test(1)
+
+    assert isinstance(archive, ArtifactLinkDomain)
+    assert archive.url == PRESIGNED_URL
+    assert mock_storage.presigned_url.await_args.kwargs["filename"] == "mips.zip"
+    mock_storage.open_read.assert_not_called()
+    mock_uow.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_export_test_hit_serves_local_file(mock_uow, mock_storage, tmp_path):
+    service = _cached_service(mock_uow, mock_storage)
+    mock_uow.export_archives.find_by_key.return_value = Mock()
+    mock_storage.exists.return_value = True
+    mock_storage.local_path.return_value = tmp_path / "cached.zip"
+
+    archive = await service.export_test(1)
+
+    assert isinstance(archive, ArtifactFileDomain)
+    assert archive.path == tmp_path / "cached.zip"
+    assert archive.filename == "mips.zip"
+
+
+@pytest.mark.asyncio
+async def test_export_test_key_follows_the_artifact_set(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage)
+    await service.export_test(1)
+    first_key = mock_uow.export_archives.find_by_key.await_args_list[0].args[0]
+
+    mock_uow.artifacts.list_by_test.return_value = [_artifact("memin.yaml", 1)]
+    await service.export_test(1)
+    second_key = mock_uow.export_archives.find_by_key.await_args_list[-1].args[0]
+
+    assert first_key != second_key
+    assert first_key.startswith("exports/1/") and second_key.startswith("exports/1/")
+
+
+@pytest.mark.asyncio
+async def test_export_test_evicts_stale_and_least_recently_used(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage, cache_max_bytes=100)
+    stale = Mock(id=7, storage_key="exports/1/old.zip")
+    lru = Mock(id=3, storage_key="exports/9/lru.zip")
+    mock_uow.export_archives.list_by_test.return_value = [stale]
+    mock_uow.export_archives.total_size.return_value = 150
+    mock_uow.export_archives.least_recently_used.return_value = [lru]
+
+    archive = await service.export_test(1)
+    await _collect(archive.chunks)
+
+    mock_uow.export_archives.least_recently_used.assert_awaited_once_with(50)
+    mock_storage.delete_many.assert_awaited_once_with(["exports/1/old.zip", "exports/9/lru.zip"])
+    mock_uow.export_archives.delete_many.assert_awaited_once_with([7, 3])
+
+
+@pytest.mark.asyncio
+async def test_export_test_registration_failure_completes_the_download(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage)
+    mock_uow.commit.side_effect = IntegrityError("INSERT", {}, Exception("duplicate key"))
+
+    archive = await service.export_test(1)
+    sent = await _collect(archive.chunks)
+
+    assert zipfile.ZipFile(sent).namelist() == ["memin.yaml", "status.yaml"]
+    mock_uow.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_export_test_incomplete_archive_is_not_cached(mock_uow, mock_storage):
+    service = _cached_service(mock_uow, mock_storage)
+    mock_storage.load.side_effect = KeyError("artifacts/1/status.yaml")
+
+    archive = await service.export_test(1)
+    await _collect(archive.chunks)
+
+    mock_uow.export_archives.add.assert_not_called()
+    storage_key = mock_storage.save.await_args.args[0]
+    mock_storage.delete_many.assert_awaited_once_with([storage_key])
+
+
+def _bulk_rows(*rows):
+    async def _stream(*args, **kwargs):
+        for row in rows:
+            yield row
+    return Mock(side_effect=_stream)
+
+
+@pytest.mark.asyncio
+async def test_export_many_splices_precompressed_artifacts(mock_uow, mock_storage):
+    content = b"allocated block\n" * 1000
+    log, deflated = _precompressed_artifact("memin.log", content)
+    service = _make_service(mock_uow, mock_storage)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows((1, "mips", log))
+    mock_storage.load.side_effect = {"artifacts/1/memin.log.deflate": deflated}.__getitem__
+
+    chunks = await service.export_many(TestFilter(), make_user())
+
+    with zipfile.ZipFile(await _collect(chunks)) as zf:
+        assert zf.read("1-mips/memin.log") == content
+
+
+@pytest.mark.asyncio
+async def test_export_many_one_directory_per_test(mock_uow, mock_storage):
+    service = _make_service(mock_uow, mock_storage)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows(
+        (1, "mips", _artifact("memin.yaml")),
+        (1, "mips", _artifact("status.yaml")),
+        (2, "arm/v8", _artifact("memin.yaml")),
+    )
+    mock_storage.load.side_effect = lambda key: key.encode()
+
+    chunks = await service.export_many(TestFilter(tags=["mips"]), make_user())
+
+    with zipfile.ZipFile(await _collect(chunks)) as zf:
+        assert zf.namelist() == ["1-mips/memin.yaml", "1-mips/status.yaml", "2-arm_v8/memin.yaml"]
+        assert zf.read("1-mips/status.yaml") == b"artifacts/1/status.yaml"
+    filters = mock_uow.tests.stream_parsed_artifacts.call_args.args[0]
+    assert filters.tags == ["mips"]
+
+
+@pytest.mark.asyncio
+async def test_export_many_bounds_prefetch(mock_uow, mock_storage):
+    service = ExportService(uow=mock_uow, storage=mock_storage, fetch_concurrency=2)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows(
+        *[(i, f"t{i}", _artifact("memin.yaml")) for i in range(6)]
+    )
+    in_flight = 0
+    peak = 0
+
+    async def slow_load(key):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return b"data"
+
+    mock_storage.load.side_effect = slow_load
+
+    chunks = await service.export_many(TestFilter(), make_user())
+    archive = await _collect(chunks)
+
+    assert peak == 2
+    with zipfile.ZipFile(archive) as zf:
+        assert len(zf.namelist()) == 6
+
+
+@pytest.mark.asyncio
+async def test_export_many_bounds_prefetch_by_bytes(mock_uow, mock_storage):
+    service = ExportService(uow=mock_uow, storage=mock_storage, fetch_concurrency=8,
+                            prefetch_max_bytes=10)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows(
+        *[(i, f"t{i}", _artifact("memin.yaml")) for i in range(6)]
+    )
+    in_flight = 0
+    peak = 0
+
+    async def slow_load(key):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return b"data"
+
+    mock_storage.load.side_effect = slow_load
+
+    chunks = await service.export_many(TestFilter(), make_user())
+    archive = await _collect(chunks)
+
+    assert peak == 2
+    with zipfile.ZipFile(archive) as zf:
+        assert len(zf.namelist()) == 6
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size_bytes", [None, 1024])
+async def test_export_many_streams_artifacts_over_the_budget(mock_uow, mock_storage, size_bytes):
+    service = ExportService(uow=mock_uow, storage=mock_storage, prefetch_max_bytes=16)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows(
+        (1, "mips", _artifact("memin.log", size_bytes=size_bytes)),
+        (1, "mips", _artifact("memin.yaml")),
+    )
+    mock_storage.load.side_effect = lambda key: key.encode()
+
+    chunks = await service.export_many(TestFilter(), make_user())
+
+    with zipfile.ZipFile(await _collect(chunks)) as zf:
+        assert zf.namelist() == ["1-mips/memin.log", "1-mips/memin.yaml"]
+        assert zf.read("1-mips/memin.log") == b"artifacts/1/memin.log"
+    mock_storage.open_read.assert_called_once_with("artifacts/1/memin.log")
+
+
+@pytest.mark.asyncio
+async def test_export_many_skips_missing_artifact(mock_uow, mock_storage):
+    service = _make_service(mock_uow, mock_storage)
+    mock_uow.tests.stream_parsed_artifacts = _bulk_rows(
+        (1, "mips", _artifact("memin.yaml")),
+        (1, "mips", _artifact("gone.yaml")),
+    )
+
+    def _load(key):
+        if key.endswith("gone.yaml"):
+            raise KeyError(key)
+        return b"ok"
+
+    mock_storage.load.side_effect = _load
+
+    chunks = await service.export_many(TestFilter(), make_user())
+
+    with zipfile.ZipFile(await _collect(chunks)) as zf:
+        assert zf.namelist() == ["1-mips/memin.yaml"]
+
+
 PRESIGNED_URL = "http://localhost:9011/autorunning/artifacts/1/memin.yaml?X-Amz-Signature=deadbeef"
 
 
@@ -127,8 +462,23 @@ async def test_artifact_download_returns_content_without_presigned(mock_uow, moc
     artifact = await service.artifact_download(test_id=1, artifact_id=1)
 
     assert isinstance(artifact, ArtifactContentDomain)
-    assert artifact.content == b"file-bytes"
+    assert b"".join([chunk async for chunk in artifact.chunks]) == b"file-bytes"
+    assert artifact.filename == "memin.yaml"
+
+
+@pytest.mark.asyncio
+async def test_artifact_download_returns_path_on_local_storage(mock_uow, mock_storage, tmp_path):
+    service = _make_service(mock_uow, mock_storage)
+    mock_uow.artifacts.find_by_id.return_value = _own_artifact()
+    mock_storage.exists.return_value = True
+    mock_storage.local_path.return_value = tmp_path / "memin.yaml"
+
+    artifact = await service.artifact_download(test_id=1, artifact_id=1)
+
+    assert isinstance(artifact, ArtifactFileDomain)
+    assert artifact.path == tmp_path / "memin.yaml"
     assert artifact.filename == "memin.yaml"
+    mock_storage.open_read.assert_not_called()
 
 
 @pytest.mark.asyncio
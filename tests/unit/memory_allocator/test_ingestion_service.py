@@ -1,19 +1,39 @@
+import asyncio
 import datetime
+import hashlib
 import io
-from unittest.mock import Mock
+import logging
+import os
+import zipfile
+import zlib
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from fastapi import UploadFile
 
+from app.core.storage import LocalStorage
+from app.memory_allocator.enums import ArtifactKind, MemoryMetric, TestStatus
 from app.memory_allocator.exceptions import (
     EmptyFileError,
     InvalidUploadError,
     ParsingError,
     PlatformExtractionError,
 )
-from app.memory_allocator.models import Platform
+from app.memory_allocator.models import Platform, TestArtifact, TestCase
+from app.memory_allocator.repositories.layout_repository import (
+    BlockRows,
+    ModuleRows,
+    PartitionRows,
+)
 from app.memory_allocator.schemas import TestDomain
-from app.memory_allocator.services import IngestionService
+from app.memory_allocator.services import IngestionService, ingestion_service
+from app.memory_allocator.utils.parse_cache import DiskParseCache
+from app.memory_allocator.utils.parser import parse_yaml
+from app.memory_allocator.utils.thread_utils import (
+    OffloadMode,
+    init_process_pool,
+    shutdown_process_pool,
+)
 from tests.conftest import make_zip
 from tests.factories import make_test, make_user
 
@@ -24,7 +44,8 @@ def _simulate_persist(test):
         test.id = 1
     if test.uploaded_at is None:
         test.uploaded_at = datetime.datetime.now(datetime.UTC)
-    for attr in ("module_count", "block_count", "kernel_entry_count", "user_entry_count"):
+    counters = ["module_count", "block_count", "kernel_entry_count", "user_entry_count"]
+    for attr in counters + list(MemoryMetric):
         if getattr(test, attr) is None:
             setattr(test, attr, 0)
 
@@ -108,7 +129,7 @@ async def test_accept_upload_success(mock_uow, mock_storage, example_correct_fol
     )
 
     orm_test = mock_uow.tests.add.call_args.args[0]
-    assert mock_storage.save.await_args.args[0] == f"uploads/{orm_test.id}.zip"
+    assert mock_storage.save_stream.await_args.args[0] == f"uploads/{orm_test.id}.zip"
     assert isinstance(result, TestDomain)
     assert result.name == "real_test"
     assert result.status == "pending"
@@ -116,6 +137,25 @@ async def test_accept_upload_success(mock_uow, mock_storage, example_correct_fol
     dispatch.assert_called_once_with(orm_test.id)
 
 
+@pytest.mark.asyncio
+async def test_accept_upload_streams_archive_to_storage(mock_uow, example_correct_folder, tmp_path):
+    storage = LocalStorage(tmp_path / "storage")
+    service = _make_service(mock_uow, storage)
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+    content = make_zip(example_correct_folder)
+
+    with patch.object(ingestion_service, "UPLOAD_CHUNK_SIZE", 1024):
+        await service.accept_upload(
+            file=UploadFile(file=io.BytesIO(content), filename="real_test.zip"),
+            uploaded_by=make_user()
+        )
+
+    assert await storage.load("uploads/1.zip") == content
+
+
 @pytest.mark.asyncio
 async def test_accept_upload_no_publish(
     mock_uow, mock_storage, example_correct_folder, mock_notifier
@@ -216,7 +256,88 @@ async def test_process_upload_delete_orphan_children(
     with pytest.raises(RuntimeError):
         await service.process_upload(test=test, content=content)
     mock_uow.rollback.assert_awaited_once()
-    assert mock_storage.delete.await_count == 2
+    mock_storage.delete.assert_not_awaited()
+    mock_storage.delete_many.assert_awaited_once()
+    saved_keys = {c.args[0] for c in mock_storage.save.await_args_list}
+    # Writers cancelled mid-stream leave nothing behind, deleting their keys is harmless
+    deleted_keys = set(mock_storage.delete_many.await_args.args[0])
+    assert saved_keys <= deleted_keys
+    assert all(key.startswith("artifacts/1/") for key in deleted_keys)
+
+
+@pytest.mark.asyncio
+async def test_process_upload_logs_every_artifact_failure(
+    mock_uow, mock_storage, example_correct_folder, caplog
+):
+    arrived = 0
+    both_saving = asyncio.Event()
+
+    async def failing_save(key, content):
+        nonlocal arrived
+        arrived += 1
+        if arrived == 2:
+            both_saving.set()
+        await both_saving.wait()
+        raise RuntimeError(f"full disk: {key}")
+
+    mock_storage.save.side_effect = failing_save
+    service = IngestionService(mock_uow, mock_storage, artifact_concurrency=2)
+
+    with caplog.at_level(logging.ERROR), pytest.raises(RuntimeError, match="full disk"):
+        await service.process_upload(test=make_test(id=1), content=make_zip(example_correct_folder))
+
+    failures = [r for r in caplog.records if r.message == "artifact.save_failed"]
+    assert len(failures) == 2
+    assert all(r.exc_info is not None for r in failures)
+
+
+@pytest.mark.asyncio
+async def test_process_upload_bounds_artifact_concurrency(
+    mock_uow, mock_storage, example_correct_folder
+):
+    in_flight = 0
+    peak = 0
+
+    async def slow_save(key, content):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    mock_storage.save.side_effect = slow_save
+    service = IngestionService(mock_uow, mock_storage, artifact_concurrency=2)
+    test = make_test(id=1)
+    await service.process_upload(test=test, content=make_zip(example_correct_folder))
+
+    assert mock_storage.save.await_count > 2
+    assert peak == 2
+    assert mock_uow.artifacts.add.call_count == mock_storage.save.await_count
+    mock_uow.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_upload_stores_deflate_streams(
+    mock_uow, mock_storage, example_correct_folder
+):
+    (example_correct_folder / "memin.log").write_text("allocated block\n" * 10_000)
+    service = IngestionService(mock_uow, mock_storage, precompress_min_bytes=64 * 1024)
+    test = make_test(id=1)
+
+    await service.process_upload(test=test, content=make_zip(example_correct_folder))
+
+    saved = {call.args[0]: call.args[1] for call in mock_storage.save.await_args_list}
+    deflated = saved["artifacts/1/memin.log.deflate"]
+    raw = saved["artifacts/1/memin.log"]
+    assert zlib.decompress(deflated, -15) == raw
+    artifacts = {a.filename: a for a in (c.args[0] for c in mock_uow.artifacts.add.call_args_list)}
+    log = artifacts["memin.log"]
+    assert log.deflate_storage_key == "artifacts/1/memin.log.deflate"
+    assert (log.size_bytes, log.deflated_size_bytes) == (len(raw), len(deflated))
+    assert log.crc32 == zlib.crc32(raw)
+    small = artifacts["status.yaml"]
+    assert small.deflate_storage_key is None and small.crc32 is None
+    assert small.size_bytes == len(saved["artifacts/1/status.yaml"])
 
 
 @pytest.mark.asyncio
@@ -270,3 +391,305 @@ async def test_accept_upload_rejects_non_zip(mock_uow, mock_storage):
         await service.accept_upload(upload, make_user())
 
     mock_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_upload_empty_constraints_names_archive_member(
+    mock_uow, mock_storage, example_correct_folder
+):
+    (example_correct_folder / "in_single_constraints.yaml").write_text("")
+    service = _make_service(mock_uow, mock_storage)
+    content = make_zip(example_correct_folder)
+
+    with pytest.raises(EmptyFileError, match="File in_single_constraints.yaml is empty"):
+        await service.process_upload(test=make_test(id=1), content=content)
+
+    mock_storage.save.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_upload_decompresses_each_member_once(
+    mock_uow, mock_storage, example_correct_folder
+):
+    service = _make_service(mock_uow, mock_storage)
+    content = make_zip(example_correct_folder)
+
+    with patch("zipfile.ZipFile.open", autospec=True, side_effect=zipfile.ZipFile.open) as opened:
+        await service.process_upload(test=make_test(id=1), content=content)
+
+    opened_names = [call.args[1].filename for call in opened.call_args_list]
+    assert sorted(opened_names) == sorted(set(opened_names))
+    assert "memin_test_info.yaml" not in opened_names
+
+
+@pytest.mark.asyncio
+async def test_process_upload_streams_artifacts(
+    mock_uow, mock_storage, example_correct_folder, monkeypatch
+):
+    monkeypatch.setattr(ingestion_service, "ARTIFACT_CHUNK_SIZE", 1024)
+    (example_correct_folder / "memin.log").write_text("allocated block\n" * 10_000)
+    service = _make_service(mock_uow, mock_storage)
+
+    with patch("zipfile.ZipFile.read", autospec=True, side_effect=zipfile.ZipFile.read) as read:
+        await service.process_upload(test=make_test(id=1), content=make_zip(example_correct_folder))
+
+    # Only what the parser needs is decompressed at once, artifacts go in chunks
+    assert sorted(call.args[1].filename for call in read.call_args_list) == [
+        "in_single_constraints.yaml", "out_single_arch_early.yaml"
+    ]
+    saved = {call.args[0]: call.args[1] for call in mock_storage.save.await_args_list}
+    assert saved["artifacts/1/memin.log"] == b"allocated block\n" * 10_000
+    artifacts = {a.filename: a for a in (c.args[0] for c in mock_uow.artifacts.add.call_args_list)}
+    assert artifacts["memin.log"].size_bytes == 160_000
+
+
+@pytest.mark.asyncio
+async def test_process_upload_drops_deflate_stream_that_does_not_shrink(
+    mock_uow, mock_storage, example_correct_folder
+):
+    (example_correct_folder / "memin.log").write_bytes(os.urandom(128 * 1024))
+    service = IngestionService(mock_uow, mock_storage, precompress_min_bytes=64 * 1024)
+
+    await service.process_upload(test=make_test(id=1), content=make_zip(example_correct_folder))
+
+    mock_storage.delete.assert_awaited_once_with("artifacts/1/memin.log.deflate")
+    artifacts = {a.filename: a for a in (c.args[0] for c in mock_uow.artifacts.add.call_args_list)}
+    assert artifacts["memin.log"].deflate_storage_key is None
+
+
+@pytest.mark.asyncio
+async def test_process_upload_bulk_persist(mock_uow, mock_storage, example_correct_folder):
+    service = IngestionService(mock_uow, mock_storage, bulk_persist=True)
+    test = make_test(id=1)
+    content = make_zip(example_correct_folder)
+
+    await service.process_upload(test=test, content=content)
+
+    mock_uow.layouts.bulk_insert.assert_awaited_once()
+    test_id, modules = mock_uow.layouts.bulk_insert.await_args.args
+    assert test_id == test.id
+    assert [m.values["name"] for m in modules] == ["single"]
+    assert sum(m.block_count for m in modules) == 72
+    assert test.modules == []
+    assert test.module_count == 1
+    assert test.block_count == 72
+    assert test.status == "parsed"
+
+
+@pytest.mark.asyncio
+async def test_process_upload_parses_in_process_pool(
+    mock_uow, mock_storage, example_correct_folder
+):
+    init_process_pool(max_workers=2)
+    try:
+        service = IngestionService(mock_uow, mock_storage, parse_mode=OffloadMode.PROCESS)
+        test = make_test(id=1)
+        await service.process_upload(test=test, content=make_zip(example_correct_folder))
+    finally:
+        shutdown_process_pool()
+
+    assert test.block_count == 72
+    assert test.kernel_entry_count == 2
+    assert test.user_entry_count == 6
+
+
+def _memory_block(size, access="RW", cache_policy="DEFAULT", is_shadow=False,
+                  is_contiguous=False) -> BlockRows:
+    values = dict(size=size, access=access, cache_policy=cache_policy, is_shadow=is_shadow,
+                  is_contiguous=is_contiguous)
+    return BlockRows(values=values, regions=[])
+
+
+@pytest.mark.asyncio
+async def test_process_upload_memory_metrics(mock_uow, mock_storage, example_correct_folder):
+    service = _make_service(mock_uow, mock_storage)
+    test = make_test(id=1)
+
+    await service.process_upload(test=test, content=make_zip(example_correct_folder))
+
+    data = parse_yaml((example_correct_folder / "in_single_constraints.yaml").read_bytes())
+    blocks = list(data["kernel_memory_blocks"].values())
+    blocks += [b for part in data["partitions"] for b in part["memory_blocks"].values()]
+    assert test.mapped_bytes == sum(b["size"] for b in blocks) > 0
+    assert test.executable_bytes == sum(b["size"] for b in blocks if "X" in b["access"])
+    assert test.uncached_bytes == sum(b["size"] for b in blocks
+                                      if b["cache_policy"] != "DEFAULT")
+    assert test.largest_contiguous_bytes == max(b["size"] for b in blocks
+                                                if b["is_contiguous"])
+
+
+def test_memory_metrics_single_pass_over_all_blocks():
+    modules = [
+        ModuleRows(
+            values={},
+            kernel_blocks=[
+                _memory_block(0x1000, access="RX", is_contiguous=True),
+                _memory_block(None, access="RWX", is_contiguous=True),  # size not given
+            ],
+            partitions=[PartitionRows(values={}, blocks=[
+                _memory_block(0x4000, cache_policy="IO", is_contiguous=True),
+                _memory_block(0x2000, access="R", is_shadow=True),
+            ])],
+        ),
+        ModuleRows(values={}, kernel_blocks=[_memory_block(0x8000, access="RW")], partitions=[]),
+    ]
+
+    assert IngestionService._memory_metrics(modules) == {
+        MemoryMetric.MAPPED_BYTES: 0xF000,
+        MemoryMetric.READABLE_BYTES: 0xF000,
+        MemoryMetric.WRITABLE_BYTES: 0xC000,
+        MemoryMetric.EXECUTABLE_BYTES: 0x1000,
+        MemoryMetric.UNCACHED_BYTES: 0x4000,
+        MemoryMetric.SHADOW_BYTES: 0x2000,
+        MemoryMetric.LARGEST_CONTIGUOUS_BYTES: 0x4000,
+    }
+
+
+def _parsed_twin() -> TestCase:
+    twin = make_test(id=7, status=TestStatus.PARSED, module_count=1, block_count=72,
+                     kernel_entry_count=2, user_entry_count=6, mapped_bytes=0x40000,
+                     largest_contiguous_bytes=0x10000)
+    twin.duplicate_of_id = None
+    return twin
+
+
+@pytest.mark.asyncio
+async def test_accept_upload_records_content_hash(mock_uow, example_correct_folder, tmp_path):
+    service = _make_service(mock_uow, LocalStorage(tmp_path))
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+    content = make_zip(example_correct_folder)
+
+    await service.accept_upload(
+        file=UploadFile(file=io.BytesIO(content), filename="real_test.zip"),
+        uploaded_by=make_user()
+    )
+
+    orm_test = mock_uow.tests.add.call_args.args[0]
+    assert orm_test.content_sha256 == hashlib.sha256(content).hexdigest()
+    mock_uow.tests.find_parsed_twin.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_accept_upload_links_duplicate_to_parsed_twin(
+    mock_uow, example_correct_folder, tmp_path
+):
+    storage = LocalStorage(tmp_path)
+    dispatch = Mock()
+    service = IngestionService(mock_uow, storage, enqueue_processing=dispatch,
+                               dedup_uploads=True)
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+    twin = _parsed_twin()
+    mock_uow.tests.find_parsed_twin.return_value = twin
+    mock_uow.artifacts.list_by_test.return_value = [
+        TestArtifact(kind=ArtifactKind.CONFIG, filename="memin.yaml",
+                     storage_key="artifacts/7/memin.yaml"),
+    ]
+
+    result = await service.accept_upload(_zip_upload(example_correct_folder), make_user())
+
+    orm_test = mock_uow.tests.add.call_args.args[0]
+    assert result.status == TestStatus.PARSED
+    assert result.block_count == 72
+    assert result.user_entry_count == 6
+    assert result.mapped_bytes == 0x40000
+    assert result.largest_contiguous_bytes == 0x10000
+    assert orm_test.duplicate_of_id == twin.id
+    assert [a.storage_key for a in orm_test.artifacts] == ["artifacts/7/memin.yaml"]
+    assert not await storage.exists(f"uploads/{orm_test.id}.zip")
+    mock_uow.commit.assert_awaited_once()
+    dispatch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_accept_upload_notifies_deduplicated_test_after_commit(
+    mock_uow, mock_storage, example_correct_folder, mock_notifier
+):
+    manager = Mock()
+    manager.attach_mock(mock_uow.commit, "commit")
+    manager.attach_mock(mock_notifier.test_status_changed, "publish")
+    service = IngestionService(mock_uow, mock_storage, enqueue_processing=Mock(),
+                               notifier=mock_notifier, dedup_uploads=True)
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+    mock_uow.tests.find_parsed_twin.return_value = _parsed_twin()
+    mock_uow.artifacts.list_by_test.return_value = []
+
+    await service.accept_upload(_zip_upload(example_correct_folder), make_user())
+
+    orm_test = mock_uow.tests.add.call_args.args[0]
+    assert [c[0] for c in manager.mock_calls] == ["commit", "publish"]
+    mock_notifier.test_status_changed.assert_awaited_once_with(orm_test)
+    assert orm_test.status == TestStatus.PARSED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("twin", [None, _parsed_twin()], ids=["queued", "deduplicated"])
+async def test_accept_upload_invalidates_counts_after_commit(
+    mock_uow, mock_storage, example_correct_folder, twin
+):
+    count_cache = AsyncMock()
+    manager = Mock()
+    manager.attach_mock(mock_uow.commit, "commit")
+    manager.attach_mock(count_cache.invalidate, "invalidate")
+    service = IngestionService(mock_uow, mock_storage, enqueue_processing=Mock(),
+                               dedup_uploads=True, count_cache=count_cache)
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+    mock_uow.tests.find_parsed_twin.return_value = twin
+    mock_uow.artifacts.list_by_test.return_value = []
+
+    await service.accept_upload(_zip_upload(example_correct_folder), make_user())
+
+    assert [c[0] for c in manager.mock_calls] == ["commit", "invalidate"]
+
+
+@pytest.mark.asyncio
+async def test_accept_upload_without_twin_is_queued(mock_uow, mock_storage, example_correct_folder):
+    dispatch = Mock()
+    service = IngestionService(mock_uow, mock_storage, enqueue_processing=dispatch,
+                               dedup_uploads=True)
+    mock_uow.tests.add.side_effect = _simulate_persist
+    mock_uow.platforms.get_or_create.return_value = Platform(
+        id=1, mmu_family="mips_r6000", page_size=4096
+    )
+
+    result = await service.accept_upload(_zip_upload(example_correct_folder), make_user())
+
+    assert result.status == TestStatus.PENDING
+    mock_uow.tests.find_parsed_twin.assert_awaited_once()
+    dispatch.assert_called_once_with(result.id)
+
+
+@pytest.mark.asyncio
+async def test_process_upload_reuses_cached_constraints(
+    mock_uow, mock_storage, example_correct_folder, tmp_path
+):
+    cache = DiskParseCache(tmp_path / "cache", ttl_seconds=3600, max_entries=10)
+    content = make_zip(example_correct_folder)
+
+    first = IngestionService(mock_uow, mock_storage, parse_cache=cache)
+    await first.process_upload(test=make_test(id=1), content=content)
+    second = IngestionService(mock_uow, mock_storage, parse_cache=cache)
+    parsed = []
+
+    def _counting_parse(data):
+        parsed.append(data)
+        return parse_yaml(data)
+
+    with patch.object(ingestion_service, "parse_yaml", _counting_parse):
+        test = make_test(id=2)
+        await second.process_upload(test=test, content=content)
+
+    assert cache.stats == {"hits": 1, "misses": 1}
+    assert parsed == []  # constraints came from the cache, output entries are streamed
+    assert test.block_count == 72
@@ -0,0 +1,130 @@
+from pathlib import Path
+
+import pytest
+
+from app.memory_allocator.enums import LayoutIssueKind
+from app.memory_allocator.utils.layout_analyzer import (
+    BlockGeometry,
+    RegionGeometry,
+    analyze_layout,
+)
+from app.memory_allocator.utils.parser import parse_yaml
+
+VALID_EXAMPLE = Path(__file__).parents[2] / "data/mips_valid_example"
+
+
+def _block(id, vaddr=None, paddr=None, size=0x1000, align=0x1000, space=1,
+           before=0, after=0) -> BlockGeometry:
+    return BlockGeometry(id, f"b{id}", space, vaddr, paddr, size, align, before, after)
+
+
+def _kinds(issues: list[dict]) -> list[str]:
+    return [issue["check"] for issue in issues]
+
+
+def _geometry(data: dict) -> tuple[list[BlockGeometry], list[RegionGeometry]]:
+    blocks, regions = [], []
+    spaces = [(-1, data["kernel_memory_blocks"])]
+    spaces += [(part["space_id"], part["memory_blocks"]) for part in data["partitions"]]
+    for space, members in spaces:
+        for name, b in members.items():
+            block_id = len(blocks) + 1
+            blocks.append(BlockGeometry(
+                block_id, name, space, b["vaddr"], b["paddr"], b["size"], b["align"],
+                b["safety_zone_before"], b["safety_zone_after"],
+            ))
+            regions += [RegionGeometry(block_id, r["vaddr"], r["paddr"], r["size"])
+                        for r in b.get("regions", [])]
+    return blocks, regions
+
+
+@pytest.mark.parametrize("name", ["in_single_constraints.yaml", "out_single_vdefinitions.yaml"])
+def test_valid_example_has_no_issues(name):
+    blocks, regions = _geometry(parse_yaml((VALID_EXAMPLE / name).read_bytes()))
+
+    assert analyze_layout(blocks, regions) == []
+
+
+def test_empty_layout():
+    assert analyze_layout([], []) == []
+
+
+@pytest.mark.parametrize(("second", "overlaps"), [
+    (_block(2, vaddr=0x800, align=0x800), True),
+    (_block(2, vaddr=0x1000), False),  # adjacent
+    (_block(2, vaddr=0x1000, space=2), False),  # another address space
+    (_block(2, vaddr=0x1000, before=0x1000), True),  # safety zone reaches the first block
+    (_block(2, vaddr=0x2000, before=0x1000), False),  # safety zone fills the gap
+    (_block(2, vaddr=0x800, size=0, align=1), False),  # empty
+    (_block(2, vaddr=None), False),  # not placed
+])
+def test_virtual_overlap(second, overlaps):
+    issues = analyze_layout([_block(1, vaddr=0), second], [])
+
+    assert _kinds(issues) == ([LayoutIssueKind.VIRTUAL_OVERLAP] if overlaps else [])
+
+
+def test_virtual_overlap_with_after_zone_and_nested_block():
+    blocks = [
+        _block(1, vaddr=0, size=0x10000),
+        _block(2, vaddr=0x2000),  # inside the first block
+        _block(3, vaddr=0x20000, after=0x1000),
+        _block(4, vaddr=0x22000),  # touches the after zone only
+        _block(5, vaddr=0x21000),  # inside the after zone of block 3
+    ]
+
+    issues = analyze_layout(blocks, [])
+
+    assert sorted(tuple(issue["blocks"]) for issue in issues) == [("b1", "b2"), ("b3", "b5")]
+
+
+def test_alignment():
+    blocks = [
+        _block(1, vaddr=0x1000, align=0x3000),
+        _block(2, vaddr=0x10010, paddr=0x20000, align=0x1000),
+        _block(3, vaddr=0x30000, paddr=0x40010, align=0x100),
+    ]
+
+    issues = analyze_layout(blocks, [])
+
+    assert sorted((issue["check"], issue["blocks"][0]) for issue in issues) == [
+        (LayoutIssueKind.BAD_ALIGN, "b1"),
+        (LayoutIssueKind.MISALIGNED, "b2"),
+        (LayoutIssueKind.MISALIGNED, "b3"),
+    ]
+
+
+def test_region_outside_block():
+    blocks = [_block(1, vaddr=0x10000, paddr=0x80000, size=0x2000)]
+    regions = [
+        RegionGeometry(1, 0x10000, 0x80000, 0x1000),
+        RegionGeometry(1, 0x11800, 0x81800, 0x1000),  # past the end
+    ]
+
+    issues = analyze_layout(blocks, regions)
+
+    assert _kinds(issues) == [LayoutIssueKind.REGION_OUTSIDE_BLOCK]
+
+
+def test_physical_overlap_within_space_only():
+    blocks = [
+        _block(1, vaddr=0x10000),
+        _block(2, vaddr=0x20000),
+        _block(3, vaddr=0x10000, space=2),  # e.g. memory shared with another partition
+    ]
+    regions = [
+        RegionGeometry(1, 0x10000, 0x80000, 0x1000),
+        RegionGeometry(2, 0x20000, 0x80800, 0x1000),
+        RegionGeometry(3, 0x10000, 0x80000, 0x1000),
+    ]
+
+    issues = analyze_layout(blocks, regions)
+
+    assert _kinds(issues) == [LayoutIssueKind.PHYSICAL_OVERLAP]
+    assert issues[0]["blocks"] == ["b1", "b2"]
+
+
+def test_issues_are_capped():
+    blocks = [_block(i, vaddr=0) for i in range(1, 20)]
+
+    assert len(analyze_layout(blocks, [], max_issues=5)) == 5
@@ -0,0 +1,152 @@
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+import pyarrow as pa
+import pytest
+
+from app.memory_allocator.enums import ColumnarFormat, LayoutExportStatus, LayoutTable
+from app.memory_allocator.exceptions import LayoutExportNotFoundError, LayoutExportNotReadyError
+from app.memory_allocator.schemas import (
+    ArtifactFileDomain,
+    ArtifactLinkDomain,
+    LayoutExportRequest,
+    TestFilter,
+)
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from tests.factories import make_layout_export, make_user
+
+
+def _row_batches(*batches):
+    async def _stream(*args, **kwargs):
+        for batch in batches:
+            yield batch
+    return Mock(side_effect=_stream)
+
+
+def _region_rows(test_id: int, count: int) -> list[tuple]:
+    return [(test_id, 1, i, i * 16, 0x8000 + i * 16, 16) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_stream_writes_one_record_batch_per_cursor_batch(mock_uow, mock_storage):
+    mock_uow.tests.stream_layout_rows = _row_batches(_region_rows(1, 3), _region_rows(2, 2))
+    service = LayoutExportService(mock_uow, mock_storage, batch_size=3)
+    user = make_user()
+    request = LayoutExportRequest(table=LayoutTable.REGIONS, tags=["mips"])
+
+    export = await service.stream(request, user)
+
+    reader = pa.ipc.open_stream(b"".join([chunk async for chunk in export.chunks]))
+    batches = list(reader)
+    assert export.filename == "regions.arrows"
+    assert [b.num_rows for b in batches] == [3, 2]
+    assert batches[1].column("test_id").to_pylist() == [2, 2]
+    table, filters, user_id = mock_uow.tests.stream_layout_rows.call_args.args
+    assert (table, filters.tags, user_id) == (LayoutTable.REGIONS, ["mips"], user.id)
+    assert mock_uow.tests.stream_layout_rows.call_args.kwargs == {"batch_size": 3}
+
+
+@pytest.mark.asyncio
+async def test_request_export_stores_filters_and_enqueues(mock_uow, mock_storage):
+    enqueue = Mock()
+    service = LayoutExportService(mock_uow, mock_storage, enqueue_export=enqueue)
+    user = make_user()
+
+    async def _flush_defaults():
+        added = mock_uow.layout_exports.add.call_args.args[0]
+        added.id, added.requested_at = 7, datetime.now(UTC)
+    mock_uow.commit.side_effect = _flush_defaults
+
+    export = await service.request_export(
+        LayoutExportRequest(format=ColumnarFormat.PARQUET, mine=True), user
+    )
+
+    stored = mock_uow.layout_exports.add.call_args.args[0]
+    assert stored.requested_by_id == user.id
+    assert stored.filters == TestFilter(mine=True).model_dump(mode="json")
+    assert (export.id, export.status, export.format) == (
+        7, LayoutExportStatus.PENDING, ColumnarFormat.PARQUET
+    )
+    enqueue.assert_called_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_perform_export_writes_file_to_storage(mock_uow, mock_storage):
+    export = make_layout_export(id=3, table=LayoutTable.REGIONS, filters={"tags": ["arm"]})
+    mock_uow.layout_exports.find_by_id.return_value = export
+    mock_uow.tests.stream_layout_rows = _row_batches(_region_rows(1, 4))
+    service = LayoutExportService(mock_uow, mock_storage)
+
+    await service.perform_export(3)
+
+    key, data = mock_storage.save.call_args.args
+    assert key == export.storage_key == "layout-exports/3/regions.arrows"
+    assert pa.ipc.open_stream(data).read_all().num_rows == 4
+    assert (export.status, export.row_count, export.size_bytes) == (
+        LayoutExportStatus.COMPLETED, 4, len(data)
+    )
+    assert export.finished_at is not None
+    table, filters, user_id = mock_uow.tests.stream_layout_rows.call_args.args
+    assert (filters.tags, user_id) == (["arm"], export.requested_by_id)
+
+
+@pytest.mark.asyncio
+async def test_perform_export_skips_completed(mock_uow, mock_storage):
+    mock_uow.layout_exports.find_by_id.return_value = make_layout_export(
+        status=LayoutExportStatus.COMPLETED
+    )
+    service = LayoutExportService(mock_uow, mock_storage)
+
+    await service.perform_export(1)
+
+    mock_uow.tests.stream_layout_rows.assert_not_called()
+    mock_storage.save.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_perform_export_missing(mock_uow, mock_storage):
+    mock_uow.layout_exports.find_by_id.return_value = None
+
+    await LayoutExportService(mock_uow, mock_storage).perform_export(1)
+
+    mock_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_hides_exports_of_other_users(mock_uow, mock_storage):
+    mock_uow.layout_exports.find_by_id.return_value = make_layout_export()
+
+    with pytest.raises(LayoutExportNotFoundError):
+        await LayoutExportService(mock_uow, mock_storage).get(1, make_user())
+
+
+@pytest.mark.asyncio
+async def test_download_not_completed(mock_uow, mock_storage):
+    user = make_user()
+    mock_uow.layout_exports.find_by_id.return_value = make_layout_export(
+        status=LayoutExportStatus.RUNNING, requested_by_id=user.id
+    )
+
+    with pytest.raises(LayoutExportNotReadyError):
+        await LayoutExportService(mock_uow, mock_storage).download(1, user)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("url", "path", "expected"), [
+    ("https://s3/layout-exports/1/blocks.parquet", None, ArtifactLinkDomain),
+    (None, Path("/data/layout-exports/1/blocks.parquet"), ArtifactFileDomain),
+])
+async def test_download_completed(mock_uow, mock_storage, url, path, expected):
+    user = make_user()
+    mock_uow.layout_exports.find_by_id.return_value = make_layout_export(
+        status=LayoutExportStatus.COMPLETED, format=ColumnarFormat.PARQUET,
+        storage_key="layout-exports/1/blocks.parquet", requested_by_id=user.id,
+    )
+    mock_storage.presigned_url.return_value = url
+    mock_storage.local_path.return_value = path
+
+    file = await LayoutExportService(mock_uow, mock_storage).download(1, user)
+
+    assert isinstance(file, expected)
+    assert file.filename == "blocks.parquet"
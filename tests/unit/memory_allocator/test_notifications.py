@@ -17,6 +17,17 @@ async def test_publish_correct_channel(mock_bus):
     assert mock_bus.publish.await_args.args[0] == "test:4"
 
 
+@pytest.mark.asyncio
+async def test_test_status_changed_invalidates_counts(mock_bus):
+    count_cache = AsyncMock()
+    notifier = StatusNotifier(mock_bus, count_cache)
+
+    await notifier.test_status_changed(make_test())
+
+    count_cache.invalidate.assert_awaited_once()
+    mock_bus.publish.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_publish_test_status_changed(mock_bus):
     test = make_test(status="error", error_message="low_ram")
@@ -0,0 +1,150 @@
+import json
+import os
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.memory_allocator.utils import parse_cache
+from app.memory_allocator.utils.parse_cache import DiskParseCache, RedisParseCache
+from app.memory_allocator.utils.parser import parse_yaml
+
+VALID_EXAMPLE = Path(__file__).parents[2] / "data/mips_valid_example"
+DIGEST = "a" * 64
+DATA = {"module_name": "single", "kernel_memory_blocks": {".TEXT": {"size": 4096}}}
+
+
+def _disk_cache(tmp_path, ttl_seconds=3600, max_entries=10) -> DiskParseCache:
+    return DiskParseCache(tmp_path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_round_trip_counts_hits_and_misses(tmp_path):
+    cache = _disk_cache(tmp_path)
+
+    assert await cache.get(DIGEST) is None
+    await cache.set(DIGEST, DATA)
+
+    assert await cache.get(DIGEST) == DATA
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_drops_expired_entries(tmp_path):
+    cache = _disk_cache(tmp_path, ttl_seconds=60)
+    await cache.set(DIGEST, DATA)
+    expired = time.time() - 120
+    os.utime(cache._path(DIGEST), (expired, expired))
+
+    assert await cache.get(DIGEST) is None
+    assert not cache._path(DIGEST).exists()
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = _disk_cache(tmp_path, max_entries=2)
+    for index, digest in enumerate(["1" * 64, "2" * 64]):
+        await cache.set(digest, DATA)
+        stamp = time.time() - 100 + index
+        os.utime(cache._path(digest), (stamp, stamp))
+    await cache.get("1" * 64)
+
+    await cache.set("3" * 64, DATA)
+
+    assert await cache.get("1" * 64) == DATA
+    assert await cache.get("2" * 64) is None
+    assert await cache.get("3" * 64) == DATA
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_ignores_other_parser_versions(tmp_path, monkeypatch):
+    await _disk_cache(tmp_path).set(DIGEST, DATA)
+    monkeypatch.setattr(parse_cache, "PARSER_VERSION", "next")
+    cache = _disk_cache(tmp_path)
+
+    cache.purge_stale_versions()
+
+    assert await cache.get(DIGEST) is None
+    assert [p.name for p in tmp_path.iterdir()] == []
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_keys_by_parser_version_and_slides_ttl():
+    client = AsyncMock()
+    client.getex.return_value = json.dumps(DATA).encode()
+    cache = RedisParseCache(client, ttl_seconds=60)
+
+    assert await cache.get(DIGEST) == DATA
+
+    client.getex.assert_awaited_once_with(
+        f"parse_cache:{parse_cache.PARSER_VERSION}:{DIGEST}", ex=60
+    )
+    client.hincrby.assert_awaited_once_with(RedisParseCache.STATS_KEY, "hits", 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["in_single_constraints.yaml", "out_single_arch_early.yaml"])
+async def test_disk_cache_hit_equals_a_fresh_parse(tmp_path, name):
+    data = parse_yaml((VALID_EXAMPLE / name).read_bytes())
+    cache = _disk_cache(tmp_path)
+
+    await cache.set(DIGEST, data)
+
+    assert await cache.get(DIGEST) == data
+
+
+@pytest.mark.asyncio
+async def test_cache_skips_documents_json_would_change(tmp_path):
+    cache = _disk_cache(tmp_path)
+
+    await cache.set(DIGEST, parse_yaml(b"spaces:\n  1: kernel\n  2: user\n"))
+
+    assert await cache.get(DIGEST) is None
+    assert not cache._path(DIGEST).exists()
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_stores_json():
+    client = AsyncMock()
+    cache = RedisParseCache(client, ttl_seconds=60)
+
+    await cache.set(DIGEST, DATA)
+
+    assert json.loads(client.set.await_args.args[1]) == DATA
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_rejects_pickled_entries():
+    client = AsyncMock()
+    client.getex.return_value = b"\x80\x04\x95cos\nsystem\n."
+    cache = RedisParseCache(client, ttl_seconds=60)
+
+    assert await cache.get(DIGEST) is None
+    assert cache.stats == {"hits": 0, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_purges_pickled_entries(tmp_path):
+    cache = _disk_cache(tmp_path)
+    await cache.set(DIGEST, DATA)
+    legacy = cache._path(DIGEST).with_suffix(".pickle")
+    legacy.write_bytes(b"\x80\x04.")
+
+    cache.purge_stale_versions()
+
+    assert not legacy.exists()
+    assert await cache.get(DIGEST) == DATA
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_failure_counts_as_miss():
+    client = AsyncMock()
+    client.getex.side_effect = ConnectionError("redis is down")
+    client.set.side_effect = ConnectionError("redis is down")
+    cache = RedisParseCache(client, ttl_seconds=60)
+
+    assert await cache.get(DIGEST) is None
+    await cache.set(DIGEST, DATA)
+
+    assert cache.stats == {"hits": 0, "misses": 1}
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from app.memory_allocator.utils import parser
+from app.memory_allocator.utils.parser import YAMLLoader, count_output_entries, parse_yaml
+
+DATA_DIR = Path(__file__).parents[2] / "data"
+YAML_FIXTURES = sorted(DATA_DIR.rglob("*.yaml"))
+
+requires_libyaml = pytest.mark.skipif(
+    not yaml.__with_libyaml__, reason="PyYAML is built without libyaml"
+)
+
+
+@requires_libyaml
+@pytest.mark.parametrize("path", YAML_FIXTURES, ids=lambda p: p.name)
+def test_c_loader_matches_python_loader(path):
+    content = path.read_bytes()
+
+    assert yaml.load(content, Loader=parser.CYAMLLoader) == yaml.load(content, Loader=YAMLLoader)
+
+
+@requires_libyaml
+def test_parse_yaml_prefers_libyaml():
+    assert parser.FastestLoader is parser.CYAMLLoader
+
+
+@pytest.mark.parametrize("tag", [*parser.JET_MAPPING_TAGS])
+def test_parse_yaml_jet_mapping_tags(tag):
+    assert parse_yaml(f"block: {tag}\n  size: 0x1000\n") == {"block": {"size": 4096}}
+
+
+@pytest.mark.parametrize("tag", [*parser.JET_FLOAT_TAGS])
+def test_parse_yaml_jet_float_tags(tag):
+    assert parse_yaml(f"scale: {tag} 1.5\n") == {"scale": 1.5}
+
+
+OUTPUT_FIXTURES = sorted(DATA_DIR.rglob("out_*_arch_early.yaml"))
+OUTPUT_DOCUMENTS = {
+    "empty": "",
+    "null": "~\n",
+    "empty_mapping": "{}\n",
+    "no_user_entries": "kernel_entries: [1, 2]\n",
+    "flow_style": "{kernel_entries: [{a: 1}], user_entries: {map_entries: [[1, 2], [], [3]]}}\n",
+    "anchored_items": "kernel_entries: [&e {a: 1}, *e, *e]\nuser_entries: {map_entries: [[*e]]}\n",
+    "aliased_space": "k: &s [1, 2]\nuser_entries: {map_entries: [*s, *s]}\n",
+    "merge_key": "base: &b {kernel_entries: [1]}\nroot: {<<: *b}\nkernel_entries: [1, 2, 3]\n",
+    "duplicate_key": "kernel_entries: [1]\nkernel_entries: [1, 2]\n",
+    "mapping_entries": "kernel_entries: {a: 1, b: 2}\n",
+    "jet_tag": "kernel_entries:\n- !JetMemoryBlock {size: 1}\n",
+}
+
+
+@pytest.mark.parametrize("path", OUTPUT_FIXTURES, ids=lambda p: p.name)
+def test_count_output_entries_fixtures(path):
+    content = path.read_bytes()
+    data = parse_yaml(content)
+
+    assert count_output_entries(content) == (
+        len(data["kernel_entries"]),
+        sum(len(space) for space in data["user_entries"]["map_entries"]),
+    )
+
+
+@pytest.mark.parametrize("document", OUTPUT_DOCUMENTS.values(), ids=OUTPUT_DOCUMENTS.keys())
+def test_count_output_entries_matches_full_parse(document):
+    assert count_output_entries(document) == parser._count_output_entries_parsed(document)
+
+
+def test_count_output_entries_does_not_construct_documents(monkeypatch):
+    monkeypatch.setattr(parser, "parse_yaml", lambda content: pytest.fail("full parse"))
+
+    document = "kernel_entries: [1, 2]\nuser_entries:\n  map_entries: [[1], [2, 3]]\n"
+
+    assert count_output_entries(document) == (2, 3)
+
+
+@pytest.mark.parametrize(("document", "error"), [
+    ("kernel_entries: [1\n", yaml.YAMLError),
+    ("kernel_entries: [!unknown 1]\n", yaml.YAMLError),
+    ("--- {}\n--- {}\n", yaml.YAMLError),
+    ("kernel_entries: ~\n", TypeError),
+])
+def test_count_output_entries_rejects_what_parse_yaml_rejects(document, error):
+    with pytest.raises(error):
+        parser._count_output_entries_parsed(document)
+    with pytest.raises(error):
+        count_output_entries(document)
@@ -0,0 +1,18 @@
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from app.memory_allocator.tasks import tasks_facet_rollup
+
+
+@asynccontextmanager
+async def _fake_uow(uow):
+    yield uow
+
+
+def test_task_returns_compacted_rows(mock_uow):
+    mock_uow.tests.compact_facet_rollup.return_value = 2
+
+    with patch.object(tasks_facet_rollup, "build_uow", lambda: _fake_uow(mock_uow)):
+        assert tasks_facet_rollup.compact_facet_rollup() == 2
+
+    mock_uow.commit.assert_awaited_once()
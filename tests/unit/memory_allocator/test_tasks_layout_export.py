@@ -0,0 +1,50 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.memory_allocator.enums import LayoutExportStatus
+from app.memory_allocator.services.layout_export_service import LayoutExportService
+from app.memory_allocator.tasks import tasks_layout_export
+from tests.factories import make_layout_export
+
+
+@asynccontextmanager
+async def _fake_uow(uow):
+    yield uow
+
+
+@pytest.mark.asyncio
+async def test_export_layout_happy(mock_uow, mock_storage):
+    fake_service = LayoutExportService(mock_uow, mock_storage)
+    fake_service.perform_export = AsyncMock()
+
+    with patch.object(tasks_layout_export, "build_uow", lambda: _fake_uow(mock_uow)), \
+         patch.object(tasks_layout_export, "get_storage", return_value=mock_storage), \
+         patch.object(tasks_layout_export, "LayoutExportService", return_value=fake_service):
+        await tasks_layout_export._export_layout(1)
+
+    fake_service.perform_export.assert_awaited_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_mark_failed_sets_failed(mock_uow):
+    export = make_layout_export(status=LayoutExportStatus.RUNNING)
+    mock_uow.layout_exports.find_by_id.return_value = export
+
+    with patch.object(tasks_layout_export, "build_uow", lambda: _fake_uow(mock_uow)):
+        await tasks_layout_export._mark_failed(1)
+
+    assert export.status == LayoutExportStatus.FAILED
+    assert export.finished_at is not None
+    mock_uow.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_mark_failed_missing_export(mock_uow):
+    mock_uow.layout_exports.find_by_id.return_value = None
+
+    with patch.object(tasks_layout_export, "build_uow", lambda: _fake_uow(mock_uow)):
+        await tasks_layout_export._mark_failed(1)
+
+    mock_uow.commit.assert_not_awaited()
@@ -21,7 +21,12 @@ async def test_process_test_happy(mock_uow, mock_storage):
     mock_storage.load.return_value = b"zip-bytes"
 
     fake_service = IngestionService(mock_uow, mock_storage)
-    fake_service.process_upload = AsyncMock()
+    received = []
+
+    async def _process_upload(test, archive):
+        received.append(archive.read())
+
+    fake_service.process_upload = AsyncMock(side_effect=_process_upload)
 
     with patch.object(tasks_testcase, "build_uow", lambda: _fake_uow(mock_uow)), \
          patch.object(tasks_testcase, "get_storage", return_value=mock_storage), \
@@ -30,8 +35,9 @@ async def test_process_test_happy(mock_uow, mock_storage):
 
     assert test.status == tasks_testcase.TestStatus.PROCESSING
     mock_uow.commit.assert_awaited_once()
-    mock_storage.load.assert_awaited_once_with("uploads/1.zip")
-    fake_service.process_upload.assert_awaited_once_with(test, b"zip-bytes")
+    mock_storage.open_read.assert_called_once_with("uploads/1.zip")
+    fake_service.process_upload.assert_awaited_once()
+    assert received == [b"zip-bytes"]
 
 
 @pytest.mark.asyncio
@@ -1,29 +1,249 @@
+import json
+from unittest.mock import AsyncMock, Mock
+
 import pytest
+from pydantic import ValidationError
 
+from app.memory_allocator.enums import FacetSource, MemoryMetric, TestStatus, TotalMode
 from app.memory_allocator.exceptions import TagNotFoundError, TestNotFoundError
-from app.memory_allocator.schemas import TestDomain, TestFilter, TestPagination
+from app.memory_allocator.repositories.layout_repository import (
+    BlockDocument,
+    ModuleHead,
+    PartitionHead,
+)
+from app.memory_allocator.repositories.test_repository import FacetCounts
+from app.memory_allocator.schemas import (
+    BlockLayout,
+    TestDomain,
+    TestFilter,
+    TestLayoutResponse,
+    TestOverlapQuery,
+    TestPagination,
+)
 from app.memory_allocator.services import TestcaseService
-from tests.factories import make_tag, make_test, make_user
+from app.memory_allocator.utils.count_cache import CountLookup, filter_digest
+from app.memory_allocator.utils.cursor import encode_cursor
+from tests.factories import make_block, make_tag, make_test, make_user
 
 
 @pytest.mark.asyncio
 async def test_list_tests(mock_uow, ):
     expected = [make_test(), make_test(id=2)]
-    mock_uow.tests.list_filtered.return_value = (expected, 2)
+    mock_uow.tests.list_filtered.return_value = (expected, False)
+    mock_uow.tests.count_filtered.return_value = 2
     service = TestcaseService(mock_uow)
     pagination = TestPagination()
     filters = TestFilter()
     user = make_user()
-    tests, total = await service.list_tests(
+    page = await service.list_tests(
         filters=filters, pagination=pagination, current_user=user
     )
-    assert all(isinstance(test, TestDomain) for test in tests)
-    assert [test.id for test in tests] == [1, 2]
-    assert total == len(expected) == 2
+    assert all(isinstance(test, TestDomain) for test in page.tests)
+    assert [test.id for test in page.tests] == [1, 2]
+    assert page.total == len(expected) == 2
+    assert page.total_mode == TotalMode.EXACT
+    assert page.next_cursor is None
     mock_uow.tests.list_filtered.assert_awaited_once()
     assert mock_uow.tests.list_filtered.await_args.kwargs["user_id"] == user.id
 
 
+@pytest.mark.asyncio
+async def test_list_tests_cursor_points_past_the_page(mock_uow):
+    mock_uow.tests.list_filtered.return_value = ([make_test(id=9), make_test(id=7)], True)
+    service = TestcaseService(mock_uow)
+
+    page = await service.list_tests(
+        filters=TestFilter(), pagination=TestPagination(limit=2, include_total=False),
+        current_user=make_user(),
+    )
+
+    assert page.total is None and page.total_mode is None
+    mock_uow.tests.count_filtered.assert_not_awaited()
+    assert TestPagination(after=page.next_cursor).after_id == 7
+
+
+@pytest.mark.asyncio
+async def test_list_tests_estimated_total(mock_uow):
+    mock_uow.tests.list_filtered.return_value = ([], False)
+    mock_uow.tests.estimate_filtered.return_value = 1_900_000
+    service = TestcaseService(mock_uow, count_mode=TotalMode.ESTIMATED)
+
+    page = await service.list_tests(TestFilter(), TestPagination(), make_user())
+
+    assert (page.total, page.total_mode) == (1_900_000, TotalMode.ESTIMATED)
+    mock_uow.tests.count_filtered.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_list_tests_cached_total(mock_uow):
+    mock_uow.tests.list_filtered.return_value = ([], False)
+    mock_uow.tests.count_filtered.return_value = 12
+    count_cache = AsyncMock()
+    count_cache.get.side_effect = [CountLookup("test_count:3:x", None),
+                                   CountLookup("test_count:3:x", 12)]
+    service = TestcaseService(mock_uow, count_cache=count_cache)
+    pagination = TestPagination(total_mode=TotalMode.CACHED)
+    user = make_user()
+
+    miss = await service.list_tests(TestFilter(tags=["mips"]), pagination, user)
+    hit = await service.list_tests(TestFilter(tags=["mips"]), pagination, user)
+
+    assert (miss.total, miss.total_mode) == (12, TotalMode.EXACT)
+    assert (hit.total, hit.total_mode) == (12, TotalMode.CACHED)
+    mock_uow.tests.count_filtered.assert_awaited_once()
+    digest = filter_digest(TestFilter(tags=["mips"]), user.id)
+    assert count_cache.get.await_args.args == (digest,)
+    count_cache.set.assert_awaited_once_with("test_count:3:x", 12)
+
+
+@pytest.mark.asyncio
+async def test_list_tests_cached_total_without_cache_counts(mock_uow):
+    mock_uow.tests.list_filtered.return_value = ([], False)
+    mock_uow.tests.count_filtered.return_value = 3
+    service = TestcaseService(mock_uow, count_cache=None)
+
+    page = await service.list_tests(
+        TestFilter(), TestPagination(total_mode=TotalMode.CACHED), make_user()
+    )
+
+    assert (page.total, page.total_mode) == (3, TotalMode.EXACT)
+
+
+@pytest.mark.asyncio
+async def test_attach_tag_invalidates_counts(mock_uow):
+    test = make_test(id=1)
+    mock_uow.tests.find_with_tags.return_value = test
+    mock_uow.tags.find_by_id.return_value = make_tag(id=1)
+    count_cache = AsyncMock()
+    service = TestcaseService(mock_uow, count_cache=count_cache)
+
+    await service.attach_tag(1, 1)
+
+    count_cache.invalidate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_facets_sorted_by_count(mock_uow):
+    mock_uow.tests.facet_counts.return_value = FacetCounts(
+        total=5,
+        statuses={TestStatus.PARSED: 2, TestStatus.ERROR: 3},
+        platforms={1: 1, 2: 4},
+        tags=[(1, "mips", 2), (2, "arm", 2), (3, "regression", 5)],
+    )
+    service = TestcaseService(mock_uow, facets_rollup=True)
+    user = make_user()
+
+    facets = await service.facets(TestFilter(name="case"), user)
+
+    assert facets.total == 5
+    assert facets.source == FacetSource.QUERY
+    assert [(f.status, f.count) for f in facets.statuses] == [
+        (TestStatus.ERROR, 3), (TestStatus.PARSED, 2)
+    ]
+    assert [(f.platform_id, f.count) for f in facets.platforms] == [(2, 4), (1, 1)]
+    assert [f.name for f in facets.tags] == ["regression", "arm", "mips"]
+    mock_uow.tests.facet_counts.assert_awaited_once_with(TestFilter(name="case"), user.id)
+    mock_uow.tests.rollup_facet_counts.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_facets_from_rollup(mock_uow):
+    mock_uow.tests.rollup_facet_counts.return_value = FacetCounts(
+        total=2, statuses={TestStatus.PARSED: 2}, platforms={1: 2}, tags=[]
+    )
+    service = TestcaseService(mock_uow, facets_rollup=True)
+    filters = TestFilter(statuses=[TestStatus.PARSED], platform_ids=[1])
+
+    facets = await service.facets(filters, make_user())
+
+    assert facets.source == FacetSource.ROLLUP
+    assert facets.total == 2
+    mock_uow.tests.facet_counts.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_facets_metric_range_needs_query(mock_uow):
+    mock_uow.tests.facet_counts.return_value = FacetCounts(0, {}, {}, [])
+    service = TestcaseService(mock_uow, facets_rollup=True)
+
+    facets = await service.facets(TestFilter(min_mapped_bytes=4096), make_user())
+
+    assert facets.source == FacetSource.QUERY
+    mock_uow.tests.rollup_facet_counts.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_facets_rollup_disabled(mock_uow):
+    mock_uow.tests.facet_counts.return_value = FacetCounts(0, {}, {}, [])
+    service = TestcaseService(mock_uow)
+
+    facets = await service.facets(TestFilter(), make_user())
+
+    assert facets.source == FacetSource.QUERY
+    assert (facets.total, facets.statuses, facets.platforms, facets.tags) == (0, [], [], [])
+    mock_uow.tests.rollup_facet_counts.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_compact_facet_rollup_commits(mock_uow):
+    mock_uow.tests.compact_facet_rollup.return_value = 3
+    service = TestcaseService(mock_uow)
+
+    assert await service.compact_facet_rollup() == 3
+    mock_uow.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_list_overlapping(mock_uow):
+    mock_uow.tests.list_overlapping.return_value = ([make_test(id=9), make_test(id=7)], True)
+    service = TestcaseService(mock_uow)
+    query = TestOverlapQuery(start=0, end=4096, limit=2)
+    user = make_user()
+
+    page = await service.list_overlapping(query, query, query, user)
+
+    assert [test.id for test in page.tests] == [9, 7]
+    assert page.total is None
+    assert page.next_cursor == encode_cursor(7)
+    mock_uow.tests.count_filtered.assert_not_awaited()
+    assert mock_uow.tests.list_overlapping.await_args.kwargs["user_id"] == user.id
+
+
+@pytest.mark.parametrize(("start", "end"), [(10, 10), (10, 5), (-1, 5), (0, 1 << 63)])
+def test_overlap_query_rejects_bad_range(start, end):
+    with pytest.raises(ValidationError):
+        TestOverlapQuery(start=start, end=end)
+
+
+def test_pagination_rejects_malformed_cursor():
+    for cursor in ("not-a-cursor", encode_cursor(1)[:-2], "eyJpZCI6ImEifQ", encode_cursor(1 << 31)):
+        with pytest.raises(ValidationError):
+            TestPagination(after=cursor)
+
+
+def test_pagination_accepts_largest_test_id():
+    assert TestPagination(after=encode_cursor((1 << 31) - 1)).after_id == (1 << 31) - 1
+
+
+def test_pagination_rejects_cursor_with_offset():
+    with pytest.raises(ValidationError):
+        TestPagination(after=encode_cursor(5), offset=10)
+
+
+def test_filter_metric_bounds():
+    filters = TestFilter(min_mapped_bytes=4096, max_mapped_bytes=4096, max_shadow_bytes=0)
+
+    assert filters.metric_bounds == {
+        MemoryMetric.MAPPED_BYTES: (4096, 4096),
+        MemoryMetric.SHADOW_BYTES: (None, 0),
+    }
+    assert TestFilter().metric_bounds == {}
+    with pytest.raises(ValidationError):
+        TestFilter(min_mapped_bytes=8192, max_mapped_bytes=4096)
+    with pytest.raises(ValidationError):
+        TestFilter(min_executable_bytes=-1)
+
+
 @pytest.mark.asyncio
 async def test_get_by_id_found(mock_uow):
     test = make_test(id=1)
@@ -146,3 +366,84 @@ async def test_detach_tag_nonexisting_tag(mock_uow):
         await service.detach_tag(test.id, 1)
 
     mock_uow.commit.assert_not_awaited()
+
+
+def _block_document(block_id: int, module_id: int, partition_id: int | None = None,
+                    regions: int = 0) -> BlockDocument:
+    block = make_block(id=block_id, name=f"block_{block_id}", vaddr=block_id * 0x1000)
+    values = {field: getattr(block, field) for field in BlockLayout.model_fields}
+    values["regions"] = [{"id": block_id * 10 + i, "vaddr": 0, "paddr": 0, "size": 16}
+                         for i in range(regions)]
+    return BlockDocument(module_id, partition_id, json.dumps(values))
+
+
+def _block_stream(*rows):
+    async def _stream(*args, **kwargs):
+        for row in rows:
+            yield row
+    return Mock(side_effect=_stream)
+
+
+async def _read_layout(chunks) -> TestLayoutResponse:
+    return TestLayoutResponse.model_validate_json(b"".join([chunk async for chunk in chunks]))
+
+
+@pytest.mark.asyncio
+async def test_layout_nests_blocks_into_modules_and_partitions(mock_uow):
+    mock_uow.tests.find_by_id.return_value = make_test(id=3)
+    mock_uow.layouts.list_modules.return_value = [
+        ModuleHead(1, "kernel", 0x80000000), ModuleHead(2, "empty", None)
+    ]
+    mock_uow.layouts.list_partitions.return_value = [
+        PartitionHead(10, 1, "p0", 0), PartitionHead(11, 1, "p1", 1), PartitionHead(12, 2, "p2", 2)
+    ]
+    mock_uow.layouts.stream_block_documents = _block_stream(
+        _block_document(1, 1), _block_document(2, 1),
+        _block_document(3, 1, 10, regions=2),
+        _block_document(4, 1, 11), _block_document(5, 1, 11),
+    )
+
+    layout = await _read_layout(await TestcaseService(mock_uow).layout(3))
+
+    assert layout.test_id == 3
+    kernel, empty = layout.modules
+    assert kernel.address_space_base == 0x80000000
+    assert [b.id for b in kernel.kernel_blocks] == [1, 2]
+    assert [(p.name, [b.id for b in p.blocks]) for p in kernel.partitions] == [
+        ("p0", [3]), ("p1", [4, 5])
+    ]
+    assert [r.id for r in kernel.partitions[0].blocks[0].regions] == [30, 31]
+    assert empty.kernel_blocks == []
+    assert [(p.name, p.blocks) for p in empty.partitions] == [("p2", [])]
+
+
+@pytest.mark.asyncio
+async def test_layout_of_unparsed_test_is_empty(mock_uow):
+    mock_uow.tests.find_by_id.return_value = make_test(status=TestStatus.PENDING)
+    mock_uow.layouts.stream_block_documents = _block_stream()
+
+    layout = await _read_layout(await TestcaseService(mock_uow).layout(1))
+
+    assert layout.modules == []
+
+
+@pytest.mark.asyncio
+async def test_layout_of_duplicate_reads_the_original(mock_uow):
+    mock_uow.tests.find_by_id.return_value = make_test(id=5, duplicate_of_id=2)
+    mock_uow.layouts.stream_block_documents = _block_stream()
+
+    layout = await _read_layout(await TestcaseService(mock_uow).layout(5))
+
+    assert layout.test_id == 5
+    mock_uow.layouts.list_modules.assert_awaited_once_with(2)
+    assert mock_uow.layouts.stream_block_documents.call_args.args[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_layout_nonexisting_test(mock_uow):
+    mock_uow.tests.find_by_id.return_value = None
+
+    with pytest.raises(TestNotFoundError):
+        await TestcaseService(mock_uow).layout(1)
+
+    mock_uow.layouts.list_modules.assert_not_awaited()
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app.memory_allocator.utils import thread_utils
+from app.memory_allocator.utils.parser import parse_yaml
+from app.memory_allocator.utils.thread_utils import (
+    OffloadMode,
+    init_process_pool,
+    run_in_process,
+    run_offloaded,
+    shutdown_process_pool,
+)
+
+
+@pytest.fixture
+def process_pool():
+    init_process_pool(max_workers=2)
+    yield
+    shutdown_process_pool()
+
+
+@pytest.mark.asyncio
+async def test_run_in_process_requires_pool():
+    with pytest.raises(RuntimeError):
+        await run_in_process(parse_yaml, "a: 1")
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("process_pool")
+async def test_run_in_process_returns_result():
+    assert await run_in_process(parse_yaml, b"a: !JetMemoryBlock\n  size: 0x10\n") == {
+        "a": {"size": 16}
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("process_pool")
+async def test_run_offloaded_routes_by_mode():
+    assert await run_offloaded(OffloadMode.PROCESS, os.getpid) != os.getpid()
+    assert await run_offloaded(OffloadMode.THREAD, os.getpid) == os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_run_offloaded_falls_back_to_thread_without_pool():
+    assert await run_offloaded(OffloadMode.PROCESS, os.getpid) == os.getpid()
+
+
+@pytest.fixture
+def daemonic_process(monkeypatch):
+    """Pretend to be a Celery prefork child, which is daemonic."""
+    monkeypatch.setattr(multiprocessing.current_process(), "daemon", True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("daemonic_process", "process_pool")
+async def test_daemonic_process_parses_in_pool():
+    assert await run_offloaded(OffloadMode.PROCESS, os.getpid) != os.getpid()
+    assert await run_offloaded(OffloadMode.PROCESS, parse_yaml, b"a: 1\n") == {"a": 1}
+
+
+@pytest.mark.usefixtures("process_pool")
+def test_init_process_pool_is_idempotent():
+    pool = thread_utils._process_holder.pool
+
+    init_process_pool(max_workers=4)
+
+    assert thread_utils._process_holder.pool is pool
@@ -1,12 +1,13 @@
 from functools import partial
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
-from app.memory_allocator.enums import ValidationStatus
+from app.memory_allocator.enums import LayoutIssueKind, ValidationStatus
 from app.memory_allocator.exceptions import TestNotFoundError, TestNotValidatableError
 from app.memory_allocator.schemas import ValidationDomain
 from app.memory_allocator.services import ValidationService
+from app.memory_allocator.utils.layout_analyzer import ANALYZER_VERSION, BlockGeometry
 from tests.factories import make_test, make_validation_result
 
 
@@ -16,12 +17,22 @@ def _simulate_persist(vr, test):
     vr.test_id = test.id
 
 
-def _make_service(mock_uow, mock_checker, mock_notifier=None, dispatch=None):
+def _make_service(mock_uow, mock_checker, mock_notifier=None, dispatch=None, precheck=False):
     return ValidationService(
         mock_uow,
         mock_checker,
         enqueue_validation=dispatch or Mock(),
-        notifier=mock_notifier
+        notifier=mock_notifier,
+        precheck=precheck,
+    )
+
+
+def _pending_validation(test):
+    return make_validation_result(
+        test=test,
+        status=ValidationStatus.PENDING,
+        valid=None, schema_valid=None, errors=None,
+        checker_version=None, checked_at=None,
     )
 
 
@@ -120,6 +131,45 @@ async def test_perform_validation_success(mock_uow, mock_checker):
     assert mock_uow.commit.await_count == 2
 
 
+@pytest.mark.asyncio
+async def test_perform_validation_precheck_short_circuits(mock_uow, mock_checker):
+    test = make_test(id=2, status="parsed", duplicate_of_id=1)
+    mock_checker.check = AsyncMock(wraps=mock_checker.check)
+    service = _make_service(mock_uow, mock_checker, precheck=True)
+    vr = _pending_validation(test)
+    mock_uow.validations.find_by_id.return_value = vr
+    mock_uow.layouts.block_geometry.return_value = [
+        BlockGeometry(1, "a", 1, 0x1000, None, 0x1000, 0x1000, 0, 0),
+        BlockGeometry(2, "b", 1, 0x1800, None, 0x1000, 0x800, 0, 0),
+    ]
+
+    await service.perform_validation(vr.id)
+
+    assert vr.status == ValidationStatus.COMPLETED
+    assert vr.valid is False
+    assert vr.schema_valid is None
+    assert [e["check"] for e in vr.errors] == [LayoutIssueKind.VIRTUAL_OVERLAP]
+    assert vr.checker_version == ANALYZER_VERSION
+    assert vr.checked_at is not None
+    mock_checker.check.assert_not_awaited()
+    mock_uow.layouts.block_geometry.assert_awaited_once_with(1)  # the twin's layout
+
+
+@pytest.mark.asyncio
+async def test_perform_validation_precheck_passes_to_checker(mock_uow, mock_checker):
+    mock_checker.check = AsyncMock(wraps=mock_checker.check)
+    service = _make_service(mock_uow, mock_checker, precheck=True)
+    vr = _pending_validation(make_test(id=1, status="parsed"))
+    mock_uow.validations.find_by_id.return_value = vr
+
+    await service.perform_validation(vr.id)
+
+    assert vr.valid is True
+    assert vr.checker_version == "mock-1.0"
+    mock_checker.check.assert_awaited_once()
+    mock_uow.layouts.region_geometry.assert_awaited_once_with(1)
+
+
 @pytest.mark.asyncio
 async def test_perform_validation_publish_after_commit(mock_uow, mock_checker, mock_notifier):
     test = make_test(id=1, status="parsed")
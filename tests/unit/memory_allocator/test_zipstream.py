@@ -0,0 +1,152 @@
+import io
+import os
+import zipfile
+import zlib
+
+import pytest
+
+from app.memory_allocator.utils import zipstream
+from app.memory_allocator.utils.zipstream import ZipStreamWriter
+
+FILES = {
+    "memin.yaml": b"mmu_family: mips\n" * 500,
+    "nested/out_single_arch_early.yaml": os.urandom(10_000),
+    "empty.log": b"",
+    "résumé.txt": "ünïcode".encode(),
+}
+
+
+async def _chunked(data: bytes, chunk_size: int = 1000):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def _build(writer: ZipStreamWriter, files: dict[str, bytes], zip64: bool = False) -> bytes:
+    archive = bytearray()
+    for name, data in files.items():
+        async for chunk in writer.add(name, _chunked(data), zip64=zip64):
+            archive += chunk
+    archive += writer.finish()
+    return bytes(archive)
+
+
+def _read_back(archive: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+@pytest.mark.parametrize("zip64", [False, True])
+async def test_archive_round_trips(compression, zip64):
+    writer = ZipStreamWriter(compression=compression)
+
+    archive = await _build(writer, FILES, zip64=zip64)
+
+    assert _read_back(archive) == FILES
+    assert writer.bytes_written == len(archive)
+
+
+@pytest.mark.asyncio
+async def test_entries_are_streamed_before_the_source_is_exhausted():
+    writer = ZipStreamWriter(compression=zipfile.ZIP_STORED)
+    pulled = []
+
+    async def source():
+        for chunk in (b"first", b"second"):
+            pulled.append(chunk)
+            yield chunk
+
+    entry = writer.add("file.txt", source())
+    header = await anext(entry)
+    first = await anext(entry)
+
+    assert header.startswith(b"PK\x03\x04")
+    assert first == b"first"
+    assert pulled == [b"first"]
+
+
+@pytest.mark.asyncio
+async def test_central_directory_switches_to_zip64(monkeypatch):
+    monkeypatch.setattr(zipstream, "ZIP64_LIMIT", 100)
+    monkeypatch.setattr(zipstream, "ZIP_FILECOUNT_LIMIT", 2)
+
+    archive = await _build(ZipStreamWriter(), FILES, zip64=True)
+
+    assert b"PK\x06\x06" in archive  # ZIP64 end of central directory record
+    assert _read_back(archive) == FILES
+
+
+@pytest.mark.asyncio
+async def test_oversized_entry_requires_zip64(monkeypatch):
+    monkeypatch.setattr(zipstream, "ZIP64_LIMIT", 100)
+    writer = ZipStreamWriter()
+
+    with pytest.raises(zipfile.LargeZipFile):
+        async for _ in writer.add("memin.yaml", _chunked(FILES["memin.yaml"])):
+            pass
+
+
+def test_finish_closes_the_archive():
+    writer = ZipStreamWriter()
+
+    assert _read_back(writer.finish()) == {}
+    with pytest.raises(ValueError):
+        writer.finish()
+
+
+def test_deflater_matches_deflate_chunk_by_chunk():
+    data = FILES["memin.yaml"]
+    deflater = zipstream.Deflater()
+
+    stream = b"".join(deflater.compress(data[i:i + 1000]) for i in range(0, len(data), 1000))
+    stream += deflater.flush()
+
+    assert zlib.decompress(stream, -15) == data
+    assert deflater.crc == zipstream.deflate(data)[1]
+    assert (deflater.size, deflater.compressed_size) == (len(data), len(stream))
+
+
+async def _build_precompressed(writer: ZipStreamWriter, files: dict[str, bytes]) -> bytes:
+    archive = bytearray()
+    for name, data in files.items():
+        deflated, crc = zipstream.deflate(data)
+        async for chunk in writer.add_precompressed(name, _chunked(deflated), crc=crc,
+                                                    size=len(data),
+                                                    compressed_size=len(deflated)):
+            archive += chunk
+    archive += writer.finish()
+    return bytes(archive)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+async def test_precompressed_entries_round_trip(compression):
+    writer = ZipStreamWriter(compression=compression)
+
+    archive = await _build_precompressed(writer, FILES)
+
+    assert _read_back(archive) == FILES
+    assert writer.bytes_written == len(archive)
+
+
+@pytest.mark.asyncio
+async def test_precompressed_entries_switch_to_zip64(monkeypatch):
+    monkeypatch.setattr(zipstream, "ZIP64_LIMIT", 100)
+
+    archive = await _build_precompressed(ZipStreamWriter(), FILES)
+
+    assert _read_back(archive) == FILES
+
+
+@pytest.mark.asyncio
+async def test_precompressed_entry_checks_its_length():
+    deflated, crc = zipstream.deflate(FILES["memin.yaml"])
+    writer = ZipStreamWriter()
+
+    with pytest.raises(ValueError):
+        async for _ in writer.add_precompressed("memin.yaml", _chunked(deflated[:-1]), crc=crc,
+                                                size=len(FILES["memin.yaml"]),
+                                                compressed_size=len(deflated)):
+            pass